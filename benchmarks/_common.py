@@ -0,0 +1,59 @@
+"""utilidades compartidas por los benchmarks: resultados JSON y comparacion con baseline."""
+
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def write_results(name: str, results: dict, path: str | Path | None = None) -> Path:
+    path = Path(path) if path else RESULTS_DIR / f"{name}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"benchmark": name, "environment": environment(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=4)
+    return path
+
+
+def load_results(path: str | Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    current: dict, baseline: dict, metric: str, tolerance: float
+) -> list[str]:
+    """casos cuyo `metric` empeoro mas de `tolerance` (fraccion) respecto al baseline."""
+    regressions = []
+    for case, values in current.items():
+        if case not in baseline:
+            continue
+        before, after = baseline[case][metric], values[metric]
+        if before > 0 and after > before * (1 + tolerance):
+            regressions.append(
+                f"{case}: {metric} {before:.4f} -> {after:.4f} (+{(after / before - 1):.0%})"
+            )
+    return regressions
+
+
+def report(current: dict, baseline_path: str | None, metric: str, tolerance: float) -> int:
+    """imprime regresiones contra el baseline; devuelve el exit code."""
+    if not baseline_path:
+        return 0
+    regressions = compare(current, load_results(baseline_path), metric, tolerance)
+    for line in regressions:
+        print(f"REGRESION {line}", file=sys.stderr)
+    if not regressions:
+        print(f"sin regresiones vs {baseline_path} (tolerancia {tolerance:.0%})")
+    return 1 if regressions else 0
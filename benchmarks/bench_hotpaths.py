@@ -0,0 +1,159 @@
+"""
+BENCHMARK DE CAMINOS CRITICOS
+mide las funciones por las que pasa cada ciudad en train/predict sobre datos
+sinteticos reproducibles (src.utils.synthetic): N ubicaciones x Y años.
+cada caso se repite y se reporta la mediana; la preparacion de las entradas
+queda fuera del tiempo medido
+
+uso:
+    python -m benchmarks.bench_hotpaths --locations 5 --years 10 --repeats 3
+    python -m benchmarks.bench_hotpaths --save-baseline benchmarks/results/hotpaths_baseline.json
+    python -m benchmarks.bench_hotpaths --baseline benchmarks/results/hotpaths_baseline.json
+    python -m benchmarks.bench_hotpaths --cases forecast_future evaluate_model
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+from benchmarks._common import report, write_results
+
+
+def _setup(locations: int, years: int, seed: int) -> dict:
+    """entradas de cada etapa, calculadas una vez (fuera del tiempo medido)."""
+    from src.etl.transform import clean_and_transform
+    from src.modeling.train import prepare_training_data, train_temperature_model
+    from src.utils.synthetic import hourly_from_daily, synthetic_dataset
+
+    raw = synthetic_dataset(locations, years, seed=seed)
+    hourly = {name: hourly_from_daily(df) for name, df in raw.items()}
+    clean = {name: clean_and_transform(df) for name, df in raw.items()}
+    training = {name: prepare_training_data(df) for name, df in clean.items()}
+    payloads = {}
+    for name, (X, y, features) in training.items():
+        model = train_temperature_model(X, y, n_jobs=1)
+        payloads[name] = {"model": model, "features": features, "strategy": "recursive"}
+    return {"raw": raw, "hourly": hourly, "clean": clean, "training": training, "payloads": payloads}
+
+
+def _cases(data: dict, forecast_days: int) -> dict[str, tuple[Callable[[], None], int]]:
+    """caso → (funcion que procesa todas las ubicaciones, filas de entrada)."""
+    import pandas as pd
+
+    from src.analysis.metrics import compute_weather_metrics
+    from src.etl.hourly import aggregate_daily
+    from src.etl.transform import clean_and_transform
+    from src.modeling.features.temporal_features import (
+        add_temporal_features,
+        add_temporal_features_long,
+    )
+    from src.modeling.predict import forecast_future
+    from src.modeling.train import evaluate_model, prepare_training_data
+
+    raw, clean, training, payloads = (
+        data["raw"], data["clean"], data["training"], data["payloads"]
+    )
+    raw_rows = sum(len(df) for df in raw.values())
+    hourly_rows = sum(len(df) for df in data["hourly"].values())
+    clean_rows = sum(len(df) for df in clean.values())
+    train_rows = sum(len(X) for X, _, _ in training.values())
+    long = pd.concat(
+        [df.assign(location=name) for name, df in clean.items()], ignore_index=True
+    )
+
+    def each(fn, frames):
+        return lambda: [fn(df) for df in frames.values()]
+
+    return {
+        "aggregate_daily": (each(aggregate_daily, data["hourly"]), hourly_rows),
+        "clean_and_transform": (each(clean_and_transform, raw), raw_rows),
+        # las funciones de features/metricas pueden modificar la entrada: copia
+        "add_temporal_features": (
+            each(lambda df: add_temporal_features(df.copy()), clean), clean_rows
+        ),
+        # las mismas features para todas las ubicaciones en una pasada (modelo global)
+        "add_temporal_features_long": (
+            lambda: add_temporal_features_long(long), clean_rows
+        ),
+        "prepare_training_data": (each(prepare_training_data, clean), clean_rows),
+        "evaluate_model": (
+            lambda: [evaluate_model(X, y, n_jobs=1) for X, y, _ in training.values()],
+            train_rows,
+        ),
+        "forecast_future": (
+            lambda: [
+                forecast_future(payloads[name], clean[name], days_ahead=forecast_days)
+                for name in clean
+            ],
+            len(clean) * forecast_days,
+        ),
+        "compute_weather_metrics": (
+            each(lambda df: compute_weather_metrics(df.copy()), clean), clean_rows
+        ),
+    }
+
+
+def measure(fn: Callable[[], None], rows: int, repeats: int) -> dict:
+    fn()  # calentamiento (imports diferidos, caches de numpy/xgboost)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    median = statistics.median(times)
+    return {
+        "median_s": round(median, 5),
+        "min_s": round(min(times), 5),
+        "rows": rows,
+        "rows_per_s": round(rows / median, 1) if median > 0 else None,
+        "repeats": repeats,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="micro-benchmarks de los caminos criticos")
+    parser.add_argument("--locations", type=int, default=2)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--forecast-days", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", help="solo estos casos")
+    parser.add_argument("--output", help="ruta del JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de un run anterior para comparar")
+    parser.add_argument("--save-baseline", help="guardar este run como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # los logs de cada funcion ensuciarian la salida y el tiempo medido
+    logging.disable(logging.INFO)
+
+    data = _setup(args.locations, args.years, args.seed)
+    cases = _cases(data, args.forecast_days)
+    unknown = set(args.cases or []) - set(cases)
+    if unknown:
+        parser.error(f"casos desconocidos: {sorted(unknown)}")
+
+    results = {}
+    for name, (fn, rows) in cases.items():
+        if args.cases and name not in args.cases:
+            continue
+        results[name] = measure(fn, rows, args.repeats)
+        print(
+            f"{name:<26} {results[name]['median_s'] * 1000:>10.2f} ms"
+            f"  {results[name]['rows_per_s'] or 0:>12.0f} filas/s"
+        )
+
+    # el tamaño del dataset va en el nombre: baselines de distinto tamaño no se mezclan
+    label = f"hotpaths_{args.locations}x{args.years}y"
+    print(f"resultados: {write_results(label, results, args.output)}")
+    if args.save_baseline:
+        write_results(label, results, args.save_baseline)
+    return report(results, args.baseline, "median_s", args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
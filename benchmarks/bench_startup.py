@@ -0,0 +1,86 @@
+"""
+BENCHMARK DE ARRANQUE
+mide, en un proceso nuevo por repeticion, cuanto tarda cada subcomando de
+main.py en importar lo que necesita (main.COMMAND_MODULES)
+
+uso:
+    python -m benchmarks.bench_startup --repeats 5
+    python -m benchmarks.bench_startup --save-baseline benchmarks/results/startup_baseline.json
+    python -m benchmarks.bench_startup --baseline benchmarks/results/startup_baseline.json
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks._common import report, write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# el proceso hijo imprime solo su tiempo de import (sin el arranque del interprete)
+SNIPPET = """
+import importlib, time
+t0 = time.perf_counter()
+import main
+for name in main.COMMAND_MODULES[{command!r}]:
+    importlib.import_module(name)
+print(time.perf_counter() - t0)
+"""
+
+
+def _commands() -> list[str]:
+    sys.path.insert(0, str(ROOT))
+    from main import COMMAND_MODULES
+
+    return list(COMMAND_MODULES)
+
+
+def measure(command: str, repeats: int) -> dict:
+    import_times, process_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(command=command)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        process_times.append(time.perf_counter() - start)
+        import_times.append(float(out.stdout.strip().splitlines()[-1]))
+
+    return {
+        "import_s": round(statistics.median(import_times), 4),
+        "process_s": round(statistics.median(process_times), 4),
+        "repeats": repeats,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="tiempo de arranque por subcomando")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="ruta del JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de un run anterior para comparar")
+    parser.add_argument("--save-baseline", help="guardar este run como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    for command in _commands():
+        results[command] = measure(command, args.repeats)
+        print(
+            f"{command:<22} import {results[command]['import_s']:.3f}s"
+            f"  proceso {results[command]['process_s']:.3f}s"
+        )
+
+    print(f"resultados: {write_results('startup', results, args.output)}")
+    if args.save_baseline:
+        write_results("startup", results, args.save_baseline)
+    return report(results, args.baseline, "import_s", args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,73 +1,546 @@
 import argparse
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 
 from src.config.logger import setup_logging
-from src.config.settings import CITIES, DEFAULT_DAYS_BACK, DEFAULT_FORECAST_DAYS
-from src.modeling.predict import (
-    forecast_future,
-    load_features,
-    load_model,
-    save_forecast,
+from src.config.settings import (
+    CITIES,
+    DEFAULT_DAYS_BACK,
+    DEFAULT_FORECAST_DAYS,
+    FORECAST_STRATEGY,
+    SERVE_CACHE_MB,
+    SERVE_HOST,
+    SERVE_PORT,
+    STREAM_HISTORY_YEARS,
 )
-from src.pipeline import WeatherPipeline, load_clean_data
-from src.visualization.plots import plot_forecast
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# modulos pesados de cada subcomando: se importan dentro de cada cmd_* para que
+# un subcomando no pague por las dependencias de los demas (matplotlib, sklearn,
+# statsmodels...). benchmarks/bench_startup.py mide esta lista; mantenerla al dia
+COMMAND_MODULES = {
+    "train": ["src.pipeline", "src.etl.extract", "src.etl.incremental"],
+    "train --stream": ["src.pipeline", "src.etl.streaming"],
+    "predict": ["src.modeling.predict", "src.etl.transform", "src.visualization.renderer"],
+    "predict --no-plots": ["src.modeling.predict", "src.etl.transform"],
+    "serve": ["src.serving.server"],
+    "tune": ["src.modeling.tuning", "src.modeling.train", "src.etl.transform"],
+    "predict --global": ["src.modeling.global_model", "src.etl.transform"],
+}
 
-def cmd_train():
-    for city, (lat, lon) in CITIES.items():
+
+def _prefetch_raw(incremental: bool) -> dict:
+    """descarga todas las ciudades por lotes; las que falten se bajan por separado."""
+    from src.etl.extract import fetch_historical_batch
+    from src.etl.incremental import fetch_incremental_batch
+    from src.utils.instrumentation import stage
+
+    try:
+        with stage("fetch", cities=len(CITIES)) as record:
+            if incremental:
+                frames = fetch_incremental_batch(CITIES, days_back=DEFAULT_DAYS_BACK)
+            else:
+                frames = fetch_historical_batch(CITIES, days=DEFAULT_DAYS_BACK)
+            record["rows"] = sum(len(df) for df in frames.values())
+        return frames
+    except Exception as e:
+        logger.exception("descarga por lotes fallo, se descargara por ciudad: %s", e)
+        return {}
+
+
+def _train_city(
+    city: str,
+    lat: float,
+    lon: float,
+    incremental: bool = False,
+    df_raw=None,
+    n_jobs: int | None = None,
+    strategy: str = FORECAST_STRATEGY,
+    stream_years: int | None = None,
+    use_cache: bool = True,
+    hourly: bool = False,
+    global_model: bool = False,
+) -> str | None:
+    """
+    entrena una ciudad; devuelve el error como texto para aislar fallos por ciudad.
+    con global_model solo corre ETL y analisis (el modelo se entrena al final)
+    """
+    from src.config.settings import STAGE_CACHE_MB
+    from src.pipeline import WeatherPipeline
+    from src.utils.cache import StageCache
+
+    try:
+        logger.info("=" * 50)
+        logger.info("Entrenando: %s", city)
+        logger.info("=" * 50)
+
+        cache = StageCache(max_bytes=STAGE_CACHE_MB * 1024 * 1024) if use_cache else None
+        pipeline = WeatherPipeline(
+            city, lat, lon, n_jobs=n_jobs, cache=cache, hourly=hourly
+        )
+        if stream_years:
+            df_clean = pipeline.run_etl_streaming(years=stream_years)
+        else:
+            df_clean = pipeline.run_etl(
+                days_back=DEFAULT_DAYS_BACK,
+                incremental=incremental,
+                df_raw=df_raw,
+            )
+
+        if df_clean is not None:
+            pipeline.run_analysis(df_clean, incremental=incremental)
+            if not global_model:
+                pipeline.run_modeling(df_clean, strategy=strategy)
+        return None
+
+    except Exception as e:
+        logger.exception("Error procesando %s: %s", city, e)
+        return f"{type(e).__name__}: {e}"
+
+
+def _train_city_in_worker(profile: bool, *args) -> tuple[str | None, dict]:
+    """_train_city en un proceso del pool; devuelve tambien sus etapas medidas."""
+    from src.utils.instrumentation import detach_run, stage, start_run
+    from src.visualization.renderer import flush_renders
+
+    start_run("train", profile=profile)
+    try:
+        error = _train_city(*args)
+    finally:
+        # los graficos encolados en este proceso deben terminar antes de devolverlo
+        with stage("plots_wait", args[0]):
+            flush_renders()
+    return error, detach_run()
+
+
+def _init_worker(n_threads: int) -> None:
+    # evita sobre-suscripcion de BLAS/OpenMP en las librerias ya cargadas del proceso
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(n_threads)
+
+
+@contextmanager
+def _worker_env(n_threads: int):
+    """
+    OMP_NUM_THREADS para los procesos del pool: las librerias OpenMP lo leen al
+    cargarse, asi que debe estar en el entorno antes de crear los procesos (en el
+    initializer ya es tarde). se restaura el valor anterior al cerrar el pool
+    """
+    previous = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = str(n_threads)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("OMP_NUM_THREADS", None)
+        else:
+            os.environ["OMP_NUM_THREADS"] = previous
+
+
+def _log_train_summary(errors: dict[str, str | None]) -> None:
+    failed = {city: err for city, err in errors.items() if err is not None}
+    logger.info("=" * 50)
+    logger.info("resumen: %d/%d ciudades ok", len(errors) - len(failed), len(errors))
+    for city, err in failed.items():
+        logger.error("fallo %s: %s", city, err)
+
+
+def cmd_train(
+    incremental: bool = False,
+    workers: int = 1,
+    strategy: str = FORECAST_STRATEGY,
+    stream_years: int | None = None,
+    use_cache: bool = True,
+    profile: bool = False,
+    hourly: bool = False,
+    global_model: bool = False,
+) -> dict[str, str | None]:
+    """entrena todas las ciudades y deja el reporte del run en data/runs/."""
+    from src.utils.instrumentation import finish_run, start_run
+
+    start_run("train", profile=profile)
+    try:
+        return _train_all(
+            incremental,
+            workers,
+            strategy,
+            stream_years,
+            use_cache,
+            profile,
+            hourly,
+            global_model,
+        )
+    finally:
+        finish_run()
+
+
+def _train_all(
+    incremental: bool,
+    workers: int,
+    strategy: str,
+    stream_years: int | None,
+    use_cache: bool,
+    profile: bool = False,
+    hourly: bool = False,
+    global_model: bool = False,
+) -> dict[str, str | None]:
+    from src.utils.instrumentation import current_run, stage
+    from src.visualization.renderer import flush_renders
+
+    # en streaming cada ciudad descarga sus años por separado; en modo horario
+    # cada ciudad pide sus horas (el lote diario no sirve)
+    raw_frames = {} if stream_years or hourly else _prefetch_raw(incremental)
+    errors: dict[str, str | None] = {}
+
+    if workers <= 1:
+        for city, (lat, lon) in CITIES.items():
+            errors[city] = _train_city(
+                city,
+                lat,
+                lon,
+                incremental,
+                raw_frames.get(city),
+                None,
+                strategy,
+                stream_years,
+                use_cache,
+                hourly,
+                global_model,
+            )
+        # los graficos se dibujaron en segundo plano mientras seguia el entrenamiento
+        with stage("plots_wait"):
+            flush_renders()
+        if global_model:
+            _train_global(errors)
+        _log_train_summary(errors)
+        return errors
+
+    workers = min(workers, len(CITIES))
+    n_threads = max(1, (os.cpu_count() or 1) // workers)
+    logger.info(
+        "entrenamiento paralelo: %d procesos x %d hilos", workers, n_threads
+    )
+
+    with _worker_env(n_threads), ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(n_threads,)
+    ) as pool:
+        futures = {
+            pool.submit(
+                _train_city_in_worker,
+                profile,
+                city,
+                lat,
+                lon,
+                incremental,
+                raw_frames.get(city),
+                n_threads,
+                strategy,
+                stream_years,
+                use_cache,
+                hourly,
+                global_model,
+            ): city
+            for city, (lat, lon) in CITIES.items()
+        }
+        for future in as_completed(futures):
+            city = futures[future]
+            try:
+                errors[city], partial = future.result()
+                current_run().merge(partial)
+            except Exception as e:
+                # el proceso murio (p.ej. OOM) antes de poder reportar el error
+                errors[city] = f"{type(e).__name__}: {e}"
+
+    if global_model:
+        _train_global(errors)
+    _log_train_summary(errors)
+    return errors
+
+
+def _train_global(errors: dict[str, str | None]) -> None:
+    """un solo modelo con las ciudades cuyo ETL termino bien (errores en `errors`)."""
+    from src.etl.transform import load_clean_data
+    from src.modeling.global_model import GLOBAL_MODEL_NAME, train_global_model
+    from src.modeling.tuning import load_best_params
+    from src.utils.instrumentation import stage
+
+    cities = [city for city, err in errors.items() if err is None]
+    try:
+        with stage("global_modeling", GLOBAL_MODEL_NAME, locations=len(cities)):
+            # una ciudad sin datos (run_etl devolvio None) no frena el modelo global
+            histories = {}
+            for city in cities:
+                try:
+                    histories[city] = load_clean_data(city)
+                except FileNotFoundError as e:
+                    logger.warning("sin datos para %s, se omite del modelo global: %s", city, e)
+            train_global_model(
+                histories, CITIES, params=load_best_params(GLOBAL_MODEL_NAME)
+            )
+        errors[GLOBAL_MODEL_NAME] = None
+    except Exception as e:
+        logger.exception("error entrenando el modelo global: %s", e)
+        errors[GLOBAL_MODEL_NAME] = f"{type(e).__name__}: {e}"
+
+
+def cmd_tune(
+    workers: int | None = None, n_candidates: int | None = None
+) -> dict[str, str | None]:
+    """
+    busca hiperparametros por ciudad sobre los datos procesados de `train`.
+    workers = trials en paralelo (None = todos los nucleos)
+    """
+    from src.config.settings import TUNING_N_CANDIDATES
+    from src.etl.transform import load_clean_data
+    from src.modeling.train import prepare_training_data
+    from src.modeling.tuning import tune_hyperparameters
+
+    errors: dict[str, str | None] = {}
+    for city in CITIES:
         try:
             logger.info("=" * 50)
-            logger.info("Entrenando: %s", city)
+            logger.info("tuning: %s", city)
             logger.info("=" * 50)
 
-            pipeline = WeatherPipeline(city, lat, lon)
-            df_clean = pipeline.run_etl(days_back=DEFAULT_DAYS_BACK)
+            X, y, _ = prepare_training_data(load_clean_data(city))
+            tune_hyperparameters(
+                city,
+                X,
+                y,
+                n_candidates=n_candidates or TUNING_N_CANDIDATES,
+                n_jobs=workers,
+            )
+            errors[city] = None
+        except Exception as e:
+            logger.exception("error en tuning de %s: %s", city, e)
+            errors[city] = f"{type(e).__name__}: {e}"
 
-            if df_clean is not None:
-                pipeline.run_analysis(df_clean)
-                pipeline.run_modeling(df_clean)
+    _log_train_summary(errors)
+    return errors
 
-        except Exception as e:
-            logger.exception("Error procesando %s: %s", city, e)
-            continue
+
+def cmd_predict(plots: bool = True, profile: bool = False, global_model: bool = False):
+    from src.utils.instrumentation import finish_run, start_run
+
+    start_run("predict", profile=profile)
+    try:
+        if global_model:
+            _predict_global(plots)
+        else:
+            _predict_all(plots)
+    finally:
+        finish_run()
+
+
+def _predict_global(plots: bool) -> None:
+    """todas las ciudades con el modelo global: un predict por dia para todas."""
+    from src.etl.transform import load_clean_data
+    from src.modeling.global_model import forecast_global, load_global_payload
+    from src.modeling.predict import save_forecast
+    from src.utils.instrumentation import stage
+
+    if plots:
+        from src.visualization.renderer import flush_renders, get_renderer
+
+    histories = {}
+    with stage("load") as record:
+        model_payload = load_global_payload()
+        for city in CITIES:
+            try:
+                histories[city] = load_clean_data(city)
+            except FileNotFoundError as e:
+                logger.error("sin datos para %s: %s", city, e)
+        record["rows"] = sum(len(df) for df in histories.values())
+
+    with stage("forecast", locations=len(histories)):
+        forecasts = forecast_global(
+            model_payload, histories, CITIES, days_ahead=DEFAULT_FORECAST_DAYS
+        )
+
+    for city, forecast_df in forecasts.items():
+        with stage("persist", city, rows=len(forecast_df)):
+            save_forecast(city, forecast_df)
+        if plots:
+            with stage("plots", city):
+                get_renderer().submit(
+                    "forecast", city, forecast_df, history=histories[city]
+                )
+
+    if plots:
+        with stage("plots_wait"):
+            flush_renders()
 
 
-def cmd_predict():
-    for city, (lat, lon) in CITIES.items():
+def _predict_all(plots: bool) -> None:
+    from src.etl.transform import load_clean_data
+    from src.modeling.predict import forecast_future, load_model_payload, save_forecast
+    from src.utils.instrumentation import stage
+
+    if plots:
+        from src.visualization.renderer import flush_renders, get_renderer
+
+    for city in CITIES:
         try:
             logger.info("=" * 50)
             logger.info("pronosticando: %s", city)
             logger.info("=" * 50)
 
-            model = load_model(city)
-            features = load_features(city)
-            df_clean = load_clean_data(city)
+            with stage("load", city) as record:
+                model_payload = load_model_payload(city)
+                df_clean = load_clean_data(city)
+                record["rows"] = len(df_clean)
 
-            model_payload = {"model": model, "features": features}
-            forecast_df = forecast_future(
-                model_payload, df_clean, days_ahead=DEFAULT_FORECAST_DAYS
-            )
-            save_forecast(city, forecast_df)
-            plot_forecast(forecast_df, city, history=df_clean)
+            with stage("forecast", city, rows=DEFAULT_FORECAST_DAYS):
+                forecast_df = forecast_future(
+                    model_payload, df_clean, days_ahead=DEFAULT_FORECAST_DAYS
+                )
+            with stage("persist", city, rows=len(forecast_df)):
+                save_forecast(city, forecast_df)
+            if plots:
+                with stage("plots", city):
+                    get_renderer().submit(
+                        "forecast", city, forecast_df, history=df_clean
+                    )
 
         except Exception as e:
             logger.exception("error pronosticando %s: %s", city, e)
             continue
 
+    if plots:
+        with stage("plots_wait"):
+            flush_renders()
+
+
+def cmd_serve(host: str, port: int, socket_path: str | None, cache_mb: int):
+    from src.serving.server import serve
+
+    serve(host=host, port=port, socket_path=socket_path, cache_mb=cache_mb)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Pipeline clima Chile")
     parser.add_argument(
         "mode",
-        choices=["train", "predict"],
-        help="train: ETL + entrena modelo + guarda metricas | predict: forecast con modelo guardado",
+        choices=["train", "predict", "serve", "tune"],
+        help=(
+            "train: ETL + entrena modelo + guarda metricas | predict: forecast con modelo "
+            "guardado | serve: servidor HTTP de pronosticos con modelos en memoria | "
+            "tune: busqueda de hiperparametros (los usa el siguiente train)"
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="train: descarga solo los dias nuevos desde la ultima ingesta de cada ciudad",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=(
+            "train: numero de procesos para entrenar ciudades en paralelo (default 1) | "
+            "tune: numero de trials en paralelo (default todos los nucleos)"
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        nargs="?",
+        type=int,
+        const=STREAM_HISTORY_YEARS,
+        metavar="YEARS",
+        help=(
+            "train: ETL por años con memoria acotada para historiales largos "
+            f"(default {STREAM_HISTORY_YEARS} años)"
+        ),
+    )
+    parser.add_argument(
+        "--hourly",
+        action="store_true",
+        help=(
+            "train: descarga datos horarios, los guarda y los agrega a dias "
+            "(agrega features intra-diarias al modelo)"
+        ),
+    )
+    parser.add_argument(
+        "--global",
+        dest="global_model",
+        action="store_true",
+        help=(
+            "train: un solo modelo para todas las ciudades (con descriptores de "
+            "ubicacion) en vez de uno por ciudad | predict: usar ese modelo"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="train: recalcular EDA y modelo aunque los datos no cambien",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "train/predict: profiler por muestreo; guarda stacks (.folded) junto al "
+            "reporte del run en data/runs/"
+        ),
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["recursive", "direct"],
+        default=FORECAST_STRATEGY,
+        help="train: forecast recursivo (un modelo) o directo (un modelo por horizonte)",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        help="tune: candidatos del primer escalon de successive halving",
+    )
+    parser.add_argument(
+        "--no-plots",
+        action="store_true",
+        help="predict: no generar graficos (evita importar matplotlib)",
+    )
+    parser.add_argument("--host", default=SERVE_HOST, help="serve: host TCP")
+    parser.add_argument("--port", type=int, default=SERVE_PORT, help="serve: puerto TCP")
+    parser.add_argument("--socket", help="serve: escuchar en un socket Unix en vez de TCP")
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=SERVE_CACHE_MB,
+        help="serve: presupuesto de memoria de la cache de modelos",
     )
     args = parser.parse_args()
+    if args.hourly and args.stream:
+        parser.error("--hourly no se puede combinar con --stream")
+    if args.global_model and args.strategy == "direct":
+        parser.error("--global solo soporta --strategy recursive")
 
     if args.mode == "train":
-        cmd_train()
+        cmd_train(
+            incremental=args.incremental,
+            workers=args.workers or 1,
+            strategy=args.strategy,
+            stream_years=args.stream,
+            use_cache=not args.no_cache,
+            profile=args.profile,
+            hourly=args.hourly,
+            global_model=args.global_model,
+        )
+    elif args.mode == "tune":
+        cmd_tune(workers=args.workers, n_candidates=args.candidates)
+    elif args.mode == "serve":
+        cmd_serve(
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket,
+            cache_mb=args.cache_mb,
+        )
     else:
-        cmd_predict()
+        cmd_predict(
+            plots=not args.no_plots,
+            profile=args.profile,
+            global_model=args.global_model,
+        )
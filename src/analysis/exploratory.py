@@ -1,9 +1,13 @@
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 
+from src.config.settings import EDA_WINDOW_DAYS
+from src.utils.aggregates import FrameStats, RunningCovariance
+from src.utils.cache import frame_fingerprint
 from src.utils.paths import city_slug, get_city_path
 from src.utils.serializer import NumpyEncoder
 
@@ -94,24 +98,22 @@ def residual_analysis(y_true: pd.Series, y_pred: pd.Series) -> dict:
     }
 
 
-def correlation_analysis(df: pd.DataFrame) -> dict:
-    numeric_cols = [
-        "temp_avg",
-        "temp_max",
-        "temp_min",
-        "temp_range",
-        "precipitation",
-        "humidity_avg",
-        "dew_point_avg",
-        "windspeed_10m_max",
-        "shortwave_radiation_sum",
-        "cloud_cover_mean",
-    ]
-    available = [c for c in numeric_cols if c in df.columns]
-    if len(available) < 2:
-        return {"error": "no hay suficientes columnas numericas"}
+CORRELATION_COLUMNS = [
+    "temp_avg",
+    "temp_max",
+    "temp_min",
+    "temp_range",
+    "precipitation",
+    "humidity_avg",
+    "dew_point_avg",
+    "windspeed_10m_max",
+    "shortwave_radiation_sum",
+    "cloud_cover_mean",
+]
 
-    corr = df[available].corr().round(3)
+
+def _summarize_correlations(corr: pd.DataFrame) -> dict:
+    corr = corr.round(3)
 
     # extraer correlaciones con temp_avg
     target_corr = {}
@@ -124,28 +126,205 @@ def correlation_analysis(df: pd.DataFrame) -> dict:
     }
 
 
-def run_full_eda(df: pd.DataFrame, city_name: str) -> dict:
-    eda_result = {"city": city_name}
+def correlation_analysis(df: pd.DataFrame) -> dict:
+    available = [c for c in CORRELATION_COLUMNS if c in df.columns]
+    if len(available) < 2:
+        return {"error": "no hay suficientes columnas numericas"}
+    return _summarize_correlations(df[available].corr())
+
+
+# --- estado entre corridas: agregados incrementales y cache de ADF/STL ---
+
+_MAX_CACHED_WINDOWS = 8
+
+
+def _state_path(city_name: str):
+    return get_city_path(city_name, "results") / f"{city_slug(city_name)}_eda_state.pkl"
+
+
+def _load_state(city_name: str) -> dict:
+    import joblib
+
+    path = _state_path(city_name)
+    if path.exists():
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            logger.warning("estado EDA ilegible (%s), se recalcula: %s", path, e)
+    return {"stationarity": {}, "seasonality": {}, "aggregates": None}
+
 
-    # estadísticas descriptivas extendidas
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    desc = df[numeric_cols].describe().round(2)
-    eda_result["descriptive_stats"] = desc.to_dict()
+def _save_state(city_name: str, state: dict) -> None:
+    import joblib
 
-    # estacionariedad
+    for name in ("stationarity", "seasonality"):
+        cached = state[name]
+        while len(cached) > _MAX_CACHED_WINDOWS:
+            cached.pop(next(iter(cached)))
+    joblib.dump(state, _state_path(city_name))
+
+
+def _cached(cache: dict, key: str, fn, *args):
+    """resultado de fn(*args) memoizado por la ventana de datos (key)."""
+    if key not in cache:
+        cache[key] = fn(*args)
+    return cache[key]
+
+
+def _recent_window(df: pd.DataFrame, days: int) -> pd.DataFrame:
+    """ultimos `days` dias: ADF y STL no crecen con el historial."""
+    if "date" not in df.columns or df.empty:
+        return df
+    cutoff = df["date"].max() - pd.Timedelta(days=days - 1)
+    return df[df["date"] >= cutoff]
+
+
+def _aggregates_from(df: pd.DataFrame, numeric_cols: list[str]) -> dict:
+    corr_cols = [c for c in CORRELATION_COLUMNS if c in numeric_cols]
+    return {
+        "columns": numeric_cols,
+        "stats": FrameStats(numeric_cols).update(df),
+        "cov": RunningCovariance(corr_cols).update(df),
+        "rows": 0,
+        "last_date": None,
+        "fingerprint": None,
+    }
+
+
+def _describe_from_aggregates(df: pd.DataFrame, aggregates: dict) -> dict:
+    """mismo formato que describe(); los cuantiles se calculan directo (O(n))."""
+    desc = {}
+    for col, stats in aggregates["stats"].stats.items():
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        q25, q50, q75 = (
+            np.nanquantile(values, [0.25, 0.5, 0.75]) if stats.count else [np.nan] * 3
+        )
+        # describe usa desviacion muestral (ddof=1)
+        std = np.nan
+        if stats.count > 1:
+            std = np.sqrt(stats.var * stats.count / (stats.count - 1))
+        desc[col] = {
+            name: round(float(v), 2)
+            for name, v in [
+                ("count", stats.count),
+                ("mean", stats.result()),
+                ("std", std),
+                ("min", stats.min if stats.count else np.nan),
+                ("25%", q25),
+                ("50%", q50),
+                ("75%", q75),
+                ("max", stats.max if stats.count else np.nan),
+            ]
+        }
+    return desc
+
+
+def _descriptive_and_correlations(df: pd.DataFrame, state: dict, incremental: bool):
+    """
+    describe + correlaciones. en modo incremental, si el historial previo no
+    cambio, solo las filas nuevas actualizan los agregados guardados
+    """
+    numeric_cols = list(df.select_dtypes(include=[np.number]).columns)
+    key_cols = ["date"] + numeric_cols
+    previous = state.get("aggregates")
+
+    appended = None
+    if incremental and previous is not None and previous["columns"] == numeric_cols:
+        prefix = df[df["date"] <= previous["last_date"]]
+        if (
+            len(prefix) == previous["rows"]
+            and frame_fingerprint(prefix[key_cols]) == previous["fingerprint"]
+        ):
+            appended = df[df["date"] > previous["last_date"]]
+
+    if appended is not None:
+        aggregates = previous
+        aggregates["stats"].update(appended)
+        aggregates["cov"].update(appended)
+        descriptive = _describe_from_aggregates(df, aggregates)
+        corr_cols = aggregates["cov"].columns
+        correlations = (
+            _summarize_correlations(aggregates["cov"].corr())
+            if len(corr_cols) >= 2
+            else {"error": "no hay suficientes columnas numericas"}
+        )
+        mode = "incremental"
+        logger.info("EDA incremental: %d filas nuevas", len(appended))
+    else:
+        aggregates = _aggregates_from(df, numeric_cols)
+        descriptive = df[numeric_cols].describe().round(2).to_dict()
+        correlations = correlation_analysis(df)
+        mode = "full"
+
+    aggregates["rows"] = len(df)
+    aggregates["last_date"] = df["date"].max() if len(df) else None
+    aggregates["fingerprint"] = frame_fingerprint(df[key_cols])
+    state["aggregates"] = aggregates
+    return descriptive, correlations, mode
+
+
+def run_full_eda(
+    df: pd.DataFrame,
+    city_name: str,
+    incremental: bool = False,
+    n_jobs: int | None = None,
+) -> dict:
+    """
+    sub-analisis independientes en paralelo. ADF y STL usan los ultimos
+    EDA_WINDOW_DAYS dias y se cachean por ventana; con incremental=True
+    describe y correlaciones se actualizan desde agregados guardados
+    """
+    eda_result = {"city": city_name}
+    df = df.copy()
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df = df.sort_values("date").reset_index(drop=True)
+
+    state = _load_state(city_name)
+    window = _recent_window(df, EDA_WINDOW_DAYS)
+    window_key = ""
     if "temp_avg" in df.columns:
-        eda_result["stationarity"] = stationarity_test(df["temp_avg"])
+        window_key = frame_fingerprint(window[["date", "temp_avg"]])
+
+    with ThreadPoolExecutor(max_workers=n_jobs or 3) as pool:
+        # estacionariedad
+        stationarity = None
+        if "temp_avg" in df.columns:
+            stationarity = pool.submit(
+                _cached,
+                state["stationarity"],
+                window_key,
+                stationarity_test,
+                window["temp_avg"],
+            )
+
+        # estacionalidad
+        seasonality = pool.submit(
+            _cached, state["seasonality"], window_key, seasonality_decomposition, window
+        )
 
-    # estacionalidad
-    eda_result["seasonality"] = seasonality_decomposition(df)
+        # estadísticas descriptivas extendidas y correlaciones
+        stats = pool.submit(_descriptive_and_correlations, df, state, incremental)
 
-    # correlaciones
-    eda_result["correlations"] = correlation_analysis(df)
+        descriptive, correlations, mode = stats.result()
+        eda_result["descriptive_stats"] = descriptive
+        if stationarity is not None:
+            eda_result["stationarity"] = stationarity.result()
+        eda_result["seasonality"] = seasonality.result()
+        eda_result["correlations"] = correlations
 
     # valores faltantes
     missing = df.isna().sum()
     eda_result["missing_values"] = missing[missing > 0].to_dict()
+    eda_result["mode"] = mode
+    if len(window):
+        eda_result["window"] = {
+            "start": str(window["date"].min().date()),
+            "end": str(window["date"].max().date()),
+            "days": EDA_WINDOW_DAYS,
+        }
 
+    _save_state(city_name, state)
     return eda_result
 
 
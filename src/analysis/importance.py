@@ -1,9 +1,17 @@
 import json
 import logging
+import re
+import time
 
 import numpy as np
 import pandas as pd
 
+from src.config.settings import (
+    IMPORTANCE_MAX_ROWS,
+    IMPORTANCE_MODE,
+    IMPORTANCE_REPEATS,
+    IMPORTANCE_TIME_BUDGET_S,
+)
 from src.utils.paths import city_slug, get_city_path
 from src.utils.serializer import NumpyEncoder
 
@@ -42,7 +50,7 @@ def compute_shap_importance(model, X: pd.DataFrame, n_samples: int = 50) -> dict
 
 
 def compute_permutation_importance(
-    model, X: pd.DataFrame, y: pd.Series, n_repeats: int = 5
+    model, X: pd.DataFrame, y: pd.Series, n_repeats: int = 5, n_jobs: int = -1
 ) -> dict:
     from sklearn.inspection import permutation_importance
     from sklearn.metrics import mean_absolute_error
@@ -54,7 +62,7 @@ def compute_permutation_importance(
         n_repeats=n_repeats,
         scoring="neg_mean_absolute_error",
         random_state=42,
-        n_jobs=-1,
+        n_jobs=n_jobs,
     )
 
     importance = {}
@@ -70,11 +78,182 @@ def compute_permutation_importance(
     return {"method": "permutation", "n_repeats": n_repeats, "importance": importance}
 
 
-def run_feature_importance(model, X: pd.DataFrame, y: pd.Series) -> dict:
-    logger.info("computando feature importance (SHAP + permutation)...")
+def compute_native_contributions(
+    model,
+    X: pd.DataFrame,
+    time_budget: float | None = None,
+    n_chunks: int = 4,
+    random_state: int = 42,
+) -> dict:
+    """
+    contribuciones exactas (TreeSHAP) con pred_contribs del booster de XGBoost.
+    sin time_budget es un solo predict sobre todo X; con time_budget (segundos)
+    las filas se recorren en orden aleatorio en n_chunks bloques grandes y se
+    corta al agotarlo, quedando una muestra. para otros modelos usa SHAP sobre
+    una muestra
+    """
+    if not hasattr(model, "get_booster"):
+        return compute_shap_importance(model, X)
+
+    import xgboost as xgb
+
+    booster = model.get_booster()
+    order = np.arange(len(X))
+    chunk_rows = max(len(X), 1)
+    if time_budget is not None:
+        order = np.random.default_rng(random_state).permutation(len(X))
+        chunk_rows = max(1, -(-len(X) // n_chunks))
+
+    start = time.perf_counter()
+    total = np.zeros(X.shape[1])
+    covered = 0
+    for i in range(0, len(X), chunk_rows):
+        if covered and time_budget is not None:
+            if time.perf_counter() - start > time_budget:
+                break
+        rows = order[i : i + chunk_rows]
+        X_chunk = X if len(rows) == len(X) else X.iloc[rows]
+        contribs = booster.predict(xgb.DMatrix(X_chunk), pred_contribs=True)
+        # la ultima columna es el bias (valor esperado), no una feature
+        total += np.abs(contribs[:, :-1]).sum(axis=0)
+        covered += len(rows)
+
+    mean_abs = total / max(covered, 1)
+    importance = {col: round(float(v), 4) for col, v in zip(X.columns, mean_abs)}
+    importance = dict(sorted(importance.items(), key=lambda x: x[1], reverse=True))
+    return {
+        "method": "xgboost pred_contribs",
+        "n_samples": covered,
+        "truncated": covered < len(X),
+        "importance": importance,
+    }
+
+
+_DERIVED_FEATURE = re.compile(r"^(?P<source>.+)_(lag|rolling)_\d+$")
+
+
+def feature_groups(columns: list[str]) -> dict[str, list[str]]:
+    """agrupa lags y medias moviles con su columna origen (features correlacionadas)."""
+    groups: dict[str, list[str]] = {}
+    for col in columns:
+        match = _DERIVED_FEATURE.match(col)
+        name = match.group("source") if match else col
+        groups.setdefault(name, []).append(col)
+    return groups
+
+
+def compute_grouped_permutation_importance(
+    model,
+    X: pd.DataFrame,
+    y: pd.Series,
+    n_repeats: int = IMPORTANCE_REPEATS,
+    max_rows: int | None = IMPORTANCE_MAX_ROWS,
+    time_budget: float | None = IMPORTANCE_TIME_BUDGET_S,
+    groups: dict[str, list[str]] | None = None,
+    random_state: int = 42,
+) -> dict:
+    """
+    permutation importance sobre una submuestra de filas, permutando juntas las
+    columnas de cada grupo. las repeticiones recorren todos los grupos por turno
+    y time_budget (segundos) solo se revisa entre rondas: la primera ronda
+    siempre se completa y al cortar cada grupo tiene las mismas pasadas
+    """
+    rng = np.random.default_rng(random_state)
+    if max_rows and len(X) > max_rows:
+        rows = np.sort(rng.choice(len(X), max_rows, replace=False))
+        X, y = X.iloc[rows], y.iloc[rows]
+
+    groups = groups or feature_groups(list(X.columns))
+    y_true = y.to_numpy(dtype="float64")
+    start = time.perf_counter()
+    baseline = float(np.mean(np.abs(y_true - model.predict(X))))
+
+    scores: dict[str, list[float]] = {name: [] for name in groups}
+    X_perm = X.copy()
+    truncated = False
+
+    for repeat in range(n_repeats):
+        if (
+            repeat
+            and time_budget is not None
+            and time.perf_counter() - start > time_budget
+        ):
+            truncated = True
+            break
+        for name, cols in groups.items():
+            # misma permutacion de filas para todo el grupo
+            order = rng.permutation(len(X))
+            for col in cols:
+                X_perm[col] = X[col].to_numpy()[order]
+            mae = float(np.mean(np.abs(y_true - model.predict(X_perm))))
+            scores[name].append(mae - baseline)
+            for col in cols:
+                X_perm[col] = X[col].to_numpy()
+
+    if truncated:
+        logger.warning(
+            "permutation importance cortado por presupuesto de %.1fs", time_budget
+        )
+
+    importance = {
+        name: {
+            "mean": round(float(np.mean(values)), 4),
+            "std": round(float(np.std(values)), 4),
+            "n_repeats": len(values),
+            "features": groups[name],
+        }
+        for name, values in scores.items()
+    }
+    importance = dict(
+        sorted(importance.items(), key=lambda x: x[1]["mean"], reverse=True)
+    )
+    return {
+        "method": "permutation agrupada",
+        "n_repeats": n_repeats,
+        "n_rows": len(X),
+        "baseline_MAE": round(baseline, 4),
+        "truncated": truncated,
+        "elapsed_s": round(time.perf_counter() - start, 2),
+        "importance": importance,
+    }
+
+
+def run_feature_importance(
+    model,
+    X: pd.DataFrame,
+    y: pd.Series,
+    n_jobs: int = -1,
+    mode: str = IMPORTANCE_MODE,
+    time_budget: float | None = IMPORTANCE_TIME_BUDGET_S,
+) -> dict:
+    """
+    mode="fast": contribuciones nativas + permutation agrupada con presupuesto,
+    en este proceso (n_jobs se ignora; cada predict usa los hilos del modelo).
+    mode="full": SHAP sobre 50 filas + permutation de sklearn sobre todo X
+    con n_jobs procesos. time_budget (segundos, None = sin limite) solo aplica
+    al modo fast
+    """
+    if mode == "full":
+        logger.info("computando feature importance (SHAP + permutation)...")
+        return {
+            "shap": compute_shap_importance(model, X),
+            "permutation": compute_permutation_importance(model, X, y, n_jobs=n_jobs),
+        }
+
+    logger.info("computando feature importance (contribuciones + permutation agrupada)...")
+    # presupuesto por ciudad: hasta la mitad para contribuciones, el resto permutation
+    start = time.perf_counter()
+    contributions = compute_native_contributions(
+        model, X, time_budget=time_budget / 2 if time_budget is not None else None
+    )
+    remaining = None
+    if time_budget is not None:
+        remaining = max(0.0, time_budget - (time.perf_counter() - start))
     return {
-        "shap": compute_shap_importance(model, X),
-        "permutation": compute_permutation_importance(model, X, y),
+        "shap": contributions,
+        "permutation": compute_grouped_permutation_importance(
+            model, X, y, time_budget=remaining
+        ),
     }
 
 
@@ -1,13 +1,17 @@
 import os
 from pathlib import Path
 
+from src.utils.locations import LocationCatalog, load_catalog
+
 # rutas base
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 
-# APIs Open-Meteo
-API_URL = "https://api.open-meteo.com/v1/forecast"
-ARCHIVE_API_URL = "https://archive-api.open-meteo.com/v1/archive"
+# APIs Open-Meteo (sobrescribibles por entorno, p.ej. para el stand-in local)
+API_URL = os.environ.get("OPEN_METEO_API_URL", "https://api.open-meteo.com/v1/forecast")
+ARCHIVE_API_URL = os.environ.get(
+    "OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive"
+)
 DAILY_VARS = [
     "temperature_2m_max",
     "temperature_2m_min",
@@ -24,17 +28,108 @@ DAILY_VARS = [
     "cloud_cover_mean",
 ]
 
-# ciudades objetivo (nombre → lat, lon)
-CITIES: dict[str, tuple[float, float]] = {
-    "Santiago": (-33.45, -70.66),
-    "Concepcion": (-36.82, -73.05),
-    "Puerto Montt": (-41.47, -72.94),
-    "Antofagasta": (-23.65, -70.40),
-}
+# ingesta horaria (`train --hourly`): variables pedidas y horas minimas para
+# aceptar un dia al agregarlas a resolucion diaria
+HOURLY_VARS = [
+    "temperature_2m",
+    "relative_humidity_2m",
+    "dew_point_2m",
+    "precipitation",
+    "cloud_cover",
+    "wind_speed_10m",
+    "shortwave_radiation",
+    "sunshine_duration",
+    "et0_fao_evapotranspiration",
+    "surface_pressure",
+    "weather_code",
+]
+HOURLY_MIN_HOURS = 20
+
+# ubicaciones objetivo: catalogo CSV (name, latitude, longitude); WEATHER_LOCATIONS
+# apunta a otro catalogo (comunas, grilla de src.utils.locations). CITIES se
+# usa como Mapping nombre → (lat, lon) y resuelve coordenadas con CITIES.nearest()
+LOCATIONS_CATALOG = Path(
+    os.environ.get("WEATHER_LOCATIONS", BASE_DIR / "src" / "config" / "locations.csv")
+)
+CITIES: LocationCatalog = load_catalog(LOCATIONS_CATALOG)
 
 # parámetros de ejecucion
 DEFAULT_DAYS_BACK = 365
 DEFAULT_FORECAST_DAYS = 3
+# "recursive": un modelo encadenado paso a paso | "direct": un modelo por horizonte
+FORECAST_STRATEGY = "recursive"
+
+# años de historial para `train --stream` (ETL por años con memoria acotada)
+STREAM_HISTORY_YEARS = 30
+
+# ubicaciones por request multi-ubicacion al archive API
+ARCHIVE_BATCH_SIZE = 50
+
+# filas por sentencia de upsert en la base de datos
+DB_CHUNKSIZE = 500
+
+# cache de etapas de train (EDA, modelo): presupuesto en disco
+STAGE_CACHE_MB = 1024
+
+# graficos: procesos del pool de render en segundo plano (0 = dibujar en linea).
+# solo nucleos libres: con un nucleo el pool compite con el entrenamiento
+PLOT_WORKERS = min(2, (os.cpu_count() or 1) - 1)
+
+# cliente HTTP (src/etl/client.py): limites del plan gratuito de Open-Meteo
+# (ventana en segundos → llamadas ponderadas), concurrencia y reintentos
+API_RATE_LIMITS = {60: 600, 3600: 5000, 86400: 10000}
+API_MAX_CONCURRENCY = 8
+API_MAX_RETRIES = 5
+API_BACKOFF_BASE_S = 0.5
+API_BACKOFF_MAX_S = 30.0
+
+# cache en disco de respuestas HTTP (data/.cache/http); WEATHER_HTTP_CACHE=0 la apaga
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_TTL_ARCHIVE_S = 7 * 24 * 3600
+HTTP_CACHE_TTL_FORECAST_S = 3600
+# el archive API revisa los ultimos dias (ERA5T → ERA5); lo anterior no cambia y no caduca
+HTTP_CACHE_ARCHIVE_FINAL_DAYS = 10
+
+# stand-in local de Open-Meteo (python -m src.etl.standin)
+STANDIN_HOST = "127.0.0.1"
+STANDIN_PORT = 8099
+
+# instrumentacion: intervalo del profiler por muestreo (train/predict --profile)
+PROFILE_INTERVAL_S = 0.005
+
+# servidor de pronosticos (main.py serve)
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+SERVE_CACHE_MB = 512
+
+# busqueda de hiperparametros (main.py tune): successive halving sobre n_estimators
+TUNING_SPACE_XGB = {
+    "max_depth": [3, 4, 6, 8],
+    "learning_rate": [0.02, 0.05, 0.1],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "min_child_weight": [1, 3, 5],
+}
+TUNING_SPACE_RF = {
+    "max_depth": [6, 8, 12, 16, None],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+TUNING_N_CANDIDATES = 27
+TUNING_MIN_ESTIMATORS = 50
+TUNING_MAX_ESTIMATORS = 600
+TUNING_HALVING_FACTOR = 3
+TUNING_SEED = 42
+
+# EDA: ADF y STL se calculan sobre los ultimos N dias (costo acotado) y se cachean
+EDA_WINDOW_DAYS = 730
+
+# feature importance: "fast" (contribuciones nativas + permutation agrupada con
+# presupuesto) o "full" (SHAP sobre 50 filas + permutation de sklearn)
+IMPORTANCE_MODE = "fast"
+IMPORTANCE_MAX_ROWS = 2000
+IMPORTANCE_REPEATS = 5
+IMPORTANCE_TIME_BUDGET_S = 10.0
 
 # configuracion de modelos
 MODEL_PARAMS_XGB = {
@@ -0,0 +1,321 @@
+"""
+CLIENTE HTTP DE OPEN-METEO
+cliente asyncio compartido por el proceso: un pool de conexiones keep-alive,
+concurrencia acotada (semaforo), un token bucket por ventana de limite de la
+API (minuto/hora/dia, con el peso que Open-Meteo asigna a cada llamada) y
+reintentos con backoff exponencial con jitter ante 429/5xx/errores de red,
+respetando Retry-After. el event loop vive en un hilo de fondo, asi el codigo
+sincrono de extract puede usarlo; con aiohttp instalado se usa como transporte,
+si no, una requests.Session en un pool de hilos. los errores se reportan como
+excepciones de requests (mismo contrato que antes para los llamadores)
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config.settings import (
+    API_BACKOFF_BASE_S,
+    API_BACKOFF_MAX_S,
+    API_MAX_CONCURRENCY,
+    API_MAX_RETRIES,
+    API_RATE_LIMITS,
+)
+
+try:
+    import aiohttp
+
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# el stand-in local (standin.py) no tiene limites
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+# esperas por limite de tasa mas largas que esto se avisan en el log
+RATE_LIMIT_WARN_S = 5.0
+
+
+def request_weight(params: dict) -> float:
+    """
+    llamadas que Open-Meteo cuenta para un request: mas de 10 variables o mas
+    de 2 semanas de datos cuentan como varias, y cada ubicacion por separado
+    """
+    n_locations = len(str(params.get("latitude", "")).split(","))
+    variables = params.get("daily") or params.get("hourly")
+    n_vars = len(str(variables).split(",")) if variables else 1
+
+    days = 14
+    if params.get("start_date") and params.get("end_date"):
+        start = date.fromisoformat(str(params["start_date"]))
+        end = date.fromisoformat(str(params["end_date"]))
+        days = (end - start).days + 1
+    elif "past_days" in params or "forecast_days" in params:
+        days = int(params.get("past_days", 0)) + int(params.get("forecast_days", 7))
+
+    return n_locations * max(1.0, n_vars / 10) * max(1.0, days / 14)
+
+
+def max_batch_locations(params: dict, limits: dict[int, int] = API_RATE_LIMITS) -> int:
+    """
+    ubicaciones por request (con los demas parametros iguales) para que su peso
+    no supere el limite mas chico; al menos 1 aunque una sola ya lo supere
+    """
+    if not limits:
+        return 2**31
+    per_location = request_weight({**params, "latitude": "0", "longitude": "0"})
+    return max(1, int(min(limits.values()) // per_location))
+
+
+class TokenBucket:
+    """capacidad `limit` llamadas, se rellena a `limit / window_s` por segundo."""
+
+    def __init__(self, limit: float, window_s: float, clock=time.monotonic):
+        self.capacity = float(limit)
+        self.rate = limit / window_s
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, weight: float) -> float:
+        """segundos hasta poder consumir `weight` (0 = ya)."""
+        self._refill()
+        # un request mas pesado que el bucket espera a tenerlo lleno
+        weight = min(weight, self.capacity)
+        return max(0.0, (weight - self.tokens) / self.rate)
+
+    def consume(self, weight: float) -> None:
+        # se cobra el peso completo: el saldo queda negativo (deuda) y los
+        # siguientes requests esperan lo que la API realmente va a exigir
+        self._refill()
+        self.tokens -= weight
+
+
+class RateLimiter:
+    """todos los buckets deben tener saldo para que salga un request."""
+
+    def __init__(self, limits: dict[int, int], clock=time.monotonic):
+        self.buckets = [TokenBucket(limit, window, clock) for window, limit in limits.items()]
+        self._lock: asyncio.Lock | None = None
+
+    async def acquire(self, weight: float) -> float:
+        """espera saldo en todos los buckets y lo consume; devuelve los segundos esperados."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        # el lock ordena los requests: el primero en llegar sale primero
+        async with self._lock:
+            while True:
+                delay = max((b.wait_time(weight) for b in self.buckets), default=0.0)
+                if delay <= 0:
+                    for bucket in self.buckets:
+                        bucket.consume(weight)
+                    return waited
+                if waited == 0 and delay > RATE_LIMIT_WARN_S:
+                    logger.warning(
+                        "limite de tasa de la API: esperando %.0fs (request de peso %.0f)",
+                        delay,
+                        weight,
+                    )
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """full jitter: uniforme en [0, min(max, base * 2^attempt)], al menos Retry-After."""
+    delay = random.uniform(0, min(API_BACKOFF_MAX_S, API_BACKOFF_BASE_S * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, API_BACKOFF_MAX_S))
+    return delay
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _RequestsTransport:
+    """requests.Session (pool keep-alive) en un pool de hilos propio."""
+
+    def __init__(self, max_connections: int):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="open-meteo"
+        )
+
+    async def get(self, url: str, params: dict, timeout: float):
+        loop = asyncio.get_running_loop()
+        resp = await loop.run_in_executor(
+            self.executor,
+            lambda: self.session.get(url, params=params, timeout=timeout),
+        )
+        return resp.status_code, resp.headers, resp.content
+
+    async def close(self) -> None:
+        self.session.close()
+        self.executor.shutdown(wait=False)
+
+
+class _AiohttpTransport:
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.session = None
+
+    async def get(self, url: str, params: dict, timeout: float):
+        if self.session is None:
+            # la sesion se crea dentro del loop que la va a usar
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector)
+        try:
+            async with self.session.get(
+                url,
+                params={k: str(v) for k, v in params.items()},
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as resp:
+                return resp.status, resp.headers, await resp.read()
+        except asyncio.TimeoutError as e:
+            raise requests.Timeout(f"timeout en {url}") from e
+        except aiohttp.ClientError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+
+class OpenMeteoClient:
+    def __init__(
+        self,
+        max_concurrency: int = API_MAX_CONCURRENCY,
+        max_retries: int = API_MAX_RETRIES,
+        rate_limits: dict[int, int] | None = None,
+        transport=None,
+    ):
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(API_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.transport = transport or (
+            _AiohttpTransport(max_concurrency)
+            if HAS_AIOHTTP
+            else _RequestsTransport(max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.pid = os.getpid()
+        self.stats = {"requests": 0, "retries": 0, "throttled_s": 0.0}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="open-meteo-loop", daemon=True
+        )
+        self._thread.start()
+
+    async def fetch(self, url: str, params: dict, timeout: float):
+        """GET con limite de tasa, concurrencia acotada y reintentos; devuelve el JSON."""
+        local = urlparse(url).hostname in LOCAL_HOSTS
+        for attempt in range(self.max_retries + 1):
+            if not local:
+                self.stats["throttled_s"] += await self.limiter.acquire(
+                    request_weight(params)
+                )
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    status, headers, content = await self.transport.get(url, params, timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if status < 400:
+                    return json.loads(content)
+                error = requests.HTTPError(
+                    f"{status} en {urlparse(url).path}: {content[:200]!r}"
+                )
+                if status not in RETRY_STATUS:
+                    raise error
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+
+            if attempt == self.max_retries:
+                raise error
+            delay = backoff_delay(attempt, retry_after)
+            self.stats["retries"] += 1
+            logger.warning(
+                "reintento %d/%d en %.1fs tras: %s", attempt + 1, self.max_retries, delay, error
+            )
+            await asyncio.sleep(delay)
+
+    async def _gather(self, url: str, params_list: list[dict], timeout: float):
+        return await asyncio.gather(
+            *(self.fetch(url, params, timeout) for params in params_list),
+            return_exceptions=True,
+        )
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def get_json(self, url: str, params: dict, timeout: float):
+        return self._run(self.fetch(url, params, timeout))
+
+    def get_many(self, url: str, params_list: list[dict], timeout: float) -> list:
+        """requests concurrentes; cada elemento es el JSON o la excepcion de ese request."""
+        return self._run(self._gather(url, params_list, timeout))
+
+    def close(self) -> None:
+        if not self._loop.is_running():
+            return
+        self._run(self.transport.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_client: OpenMeteoClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenMeteoClient:
+    """cliente del proceso; un proceso hijo (fork) crea el suyo (el hilo del loop no se hereda)."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.pid != os.getpid():
+            _client = OpenMeteoClient()
+        return _client
+
+
+@atexit.register
+def _close_client() -> None:
+    if _client is not None and _client.pid == os.getpid():
+        try:
+            _client.close()
+        except Exception:
+            pass
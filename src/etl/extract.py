@@ -4,8 +4,17 @@ from datetime import date, timedelta
 import pandas as pd
 import requests
 
-from src.config.settings import API_URL, ARCHIVE_API_URL, DAILY_VARS
-from src.utils.paths import city_slug, get_city_path
+from src.config.settings import (
+    API_RATE_LIMITS,
+    API_URL,
+    ARCHIVE_API_URL,
+    ARCHIVE_BATCH_SIZE,
+    DAILY_VARS,
+)
+from src.etl.client import max_batch_locations, request_weight
+from src.etl.http_cache import get_json, get_json_many
+from src.etl.schema import compact_frame
+from src.etl.storage import save_dataset
 
 logger = logging.getLogger(__name__)
 
@@ -45,14 +54,26 @@ def _build_df_from_api_response(
     df["latitude"] = latitude
     df["longitude"] = longitude
 
-    return df
+    # tipos compactos desde la entrada; la ubicacion la separa la pipeline
+    return compact_frame(df, drop_location=False)
+
+
+def archive_window(days: int) -> tuple[date, date]:
+    """ventana (inicio, fin) del archive API terminando ayer."""
+    end_date = date.today() - timedelta(days=1)
+    return end_date - timedelta(days=days), end_date
 
 
 def fetch_historical_data(
-    latitude: float, longitude: float, days: int = 365
+    latitude: float,
+    longitude: float,
+    days: int = 365,
+    start_date: date | None = None,
+    end_date: date | None = None,
 ) -> pd.DataFrame:
-    end_date = date.today() - timedelta(days=1)
-    start_date = end_date - timedelta(days=days)
+    window_start, window_end = archive_window(days)
+    start_date = start_date or window_start
+    end_date = end_date or window_end
 
     params = {
         "latitude": latitude,
@@ -71,9 +92,7 @@ def fetch_historical_data(
             latitude,
             longitude,
         )
-        resp = requests.get(ARCHIVE_API_URL, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_json(ARCHIVE_API_URL, params, timeout=30)
     except requests.RequestException as e:
         logger.error("error al conectar con archive API: %s", e)
         raise
@@ -81,6 +100,93 @@ def fetch_historical_data(
     return _build_df_from_api_response(data, latitude, longitude)
 
 
+def _chunked(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def fetch_historical_batch(
+    locations: dict[str, tuple[float, float]],
+    days: int = 365,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> dict[str, pd.DataFrame]:
+    """
+    descarga varias ubicaciones con un request por lote (lat/lon separados por coma)
+    y separa la respuesta en un DataFrame por ciudad. un lote fallido se omite
+    del resultado para que el llamador pueda reintentar esas ciudades por separado
+    """
+    window_start, window_end = archive_window(days)
+    start_date = start_date or window_start
+    end_date = end_date or window_end
+
+    common = {
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "daily": ",".join(DAILY_VARS),
+        "timezone": "auto",
+    }
+    # lotes que caben en el limite de tasa mas chico (el peso crece con
+    # ubicaciones x dias x variables); si no, la API los rechaza con 429
+    fitting = max_batch_locations(common)
+    if fitting < batch_size:
+        logger.info(
+            "lotes de %d ubicaciones por el limite de tasa (pedido %d)", fitting, batch_size
+        )
+        batch_size = fitting
+    if fitting == 1:
+        weight = request_weight({**common, "latitude": "0"})
+        if weight > min(API_RATE_LIMITS.values(), default=weight):
+            logger.warning(
+                "un request de una ubicacion pesa %.0f llamadas, mas que el limite mas "
+                "chico de la API; acortar la ventana (p.ej. train --stream)",
+                weight,
+            )
+
+    batches = list(_chunked(list(locations.items()), batch_size))
+    params_list = [
+        {
+            "latitude": ",".join(str(lat) for _, (lat, _lon) in batch),
+            "longitude": ",".join(str(lon) for _, (_lat, lon) in batch),
+            **common,
+        }
+        for batch in batches
+    ]
+
+    logger.info(
+        "descargando %d ubicaciones en %d lotes concurrentes (%s a %s)...",
+        len(locations),
+        len(batches),
+        start_date,
+        end_date,
+    )
+    # los lotes salen en paralelo por el cliente compartido (limite de tasa y reintentos)
+    responses = get_json_many(ARCHIVE_API_URL, params_list, timeout=60)
+
+    frames = {}
+    for batch, data in zip(batches, responses):
+        if isinstance(data, requests.RequestException):
+            logger.error("error al descargar lote %s: %s", [c for c, _ in batch], data)
+            continue
+        if isinstance(data, Exception):
+            raise data
+
+        # una sola ubicacion devuelve un objeto, varias devuelven una lista ordenada
+        if isinstance(data, dict):
+            data = [data]
+        if len(data) != len(batch):
+            logger.error(
+                "respuesta con %d ubicaciones, se esperaban %d", len(data), len(batch)
+            )
+            continue
+
+        for (city, (lat, lon)), item in zip(batch, data):
+            frames[city] = _build_df_from_api_response(item, lat, lon)
+
+    return frames
+
+
 def fetch_recent_data(latitude: float, longitude: float, days: int = 7) -> pd.DataFrame:
     params = {
         "latitude": latitude,
@@ -98,9 +204,7 @@ def fetch_recent_data(latitude: float, longitude: float, days: int = 7) -> pd.Da
             latitude,
             longitude,
         )
-        resp = requests.get(API_URL, params=params, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+        data = get_json(API_URL, params, timeout=15)
     except requests.RequestException as e:
         logger.error("error al conectar con forecast API: %s", e)
         raise
@@ -109,8 +213,6 @@ def fetch_recent_data(latitude: float, longitude: float, days: int = 7) -> pd.Da
 
 
 def save_raw_data(df: pd.DataFrame, city_name: str) -> str:
-    folder = get_city_path(city_name, "raw")
-    file_path = folder / f"{city_slug(city_name)}_weather_raw.csv"
-    df.to_csv(file_path, index=False)
+    file_path = save_dataset(df, city_name, "raw")
     logger.info("datos crudos guardados en: %s", file_path)
-    return str(file_path)
+    return file_path
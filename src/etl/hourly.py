@@ -0,0 +1,299 @@
+"""
+INGESTA HORARIA
+pide al archive API las variables horarias (tiempo en unixtime, hora local de la
+ubicacion segun su zona horaria) y las guarda compactas (float32, timestamp en
+segundos) en el dataset `hourly`, con el instante UTC (`unixtime`) como clave:
+al terminar el horario de verano la hora local se repite. de ahi se derivan las columnas diarias que usa
+la pipeline (temp_max, precipitation, humedad/rocio min/max...) mas features
+intra-diarias, con reducciones numpy por dia (reduceat) sobre la serie ordenada:
+sin groupby por fila ni copias por dia
+"""
+
+import logging
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.config.settings import ARCHIVE_API_URL, HOURLY_MIN_HOURS, HOURLY_VARS
+from src.etl.extract import archive_window
+from src.etl.http_cache import get_json
+from src.etl.incremental import (
+    load_raw_history,
+    merge_history,
+    plan_fetch_range,
+    resolve_watermark,
+)
+from src.etl.schema import compact_frame
+from src.etl.storage import load_dataset, save_dataset
+
+logger = logging.getLogger(__name__)
+
+HOURLY_COLUMN_MAP = {
+    "temperature_2m": "temp",
+    "relative_humidity_2m": "humidity",
+    "dew_point_2m": "dew_point",
+    "precipitation": "precipitation",
+    "cloud_cover": "cloud_cover",
+    "wind_speed_10m": "windspeed_10m",
+    "shortwave_radiation": "shortwave_radiation",
+    "sunshine_duration": "sunshine_duration",
+    "et0_fao_evapotranspiration": "et0_fao_evapotranspiration",
+    "surface_pressure": "surface_pressure",
+    "weather_code": "weather_code",
+}
+
+# features intra-diarias que se agregan al frame diario (ver prepare_training_data)
+INTRADAY_FEATURES = [
+    "precip_hours",
+    "temp_max_hour",
+    "temp_change_max",
+    "pressure_tendency",
+]
+
+# umbral de hora con lluvia (mm), como precipitation_hours de Open-Meteo
+RAIN_HOUR_MM = 0.1
+
+# radiacion media horaria (W/m²) → energia de esa hora (MJ/m²)
+W_HOUR_TO_MJ = 3600 / 1e6
+
+
+def _local_times(data: dict) -> np.ndarray:
+    """unixtime (UTC) → hora local sin zona (datetime64[s]) de la ubicacion."""
+    utc = pd.to_datetime(np.asarray(data["hourly"]["time"], dtype="int64"), unit="s", utc=True)
+    try:
+        local = utc.tz_convert(data.get("timezone") or "UTC")
+    except (KeyError, ValueError):
+        # zona desconocida: offset fijo de la respuesta
+        local = utc + pd.Timedelta(seconds=data.get("utc_offset_seconds", 0))
+    return local.tz_localize(None).to_numpy(dtype="datetime64[s]")
+
+
+def build_hourly_frame(data: dict) -> pd.DataFrame:
+    """frame horario compacto desde una respuesta con timeformat=unixtime."""
+    hourly = data.get("hourly", {})
+    if not hourly.get("time"):
+        logger.warning("no se encontraron datos 'hourly' en la respuesta")
+        return pd.DataFrame()
+
+    n = len(hourly["time"])
+    columns = {
+        "time": _local_times(data),
+        "unixtime": np.asarray(hourly["time"], dtype="int64"),
+    }
+    for api_key, local_key in HOURLY_COLUMN_MAP.items():
+        values = hourly.get(api_key)
+        columns[local_key] = (
+            np.full(n, np.nan, dtype="float32")
+            if values is None
+            else np.asarray(values, dtype="float64").astype("float32")
+        )
+    # los null del JSON llegan como None → NaN via float64
+    return compact_frame(pd.DataFrame(columns), drop_location=False)
+
+
+def fetch_hourly_data(
+    latitude: float,
+    longitude: float,
+    days: int = 365,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> pd.DataFrame:
+    window_start, window_end = archive_window(days)
+    start_date = start_date or window_start
+    end_date = end_date or window_end
+
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "hourly": ",".join(HOURLY_VARS),
+        "timeformat": "unixtime",
+        "timezone": "auto",
+    }
+
+    try:
+        logger.info(
+            "descargando datos horarios (%s a %s) para coords (%.2f, %.2f)...",
+            start_date,
+            end_date,
+            latitude,
+            longitude,
+        )
+        data = get_json(ARCHIVE_API_URL, params, timeout=60)
+    except requests.RequestException as e:
+        logger.error("error al conectar con archive API: %s", e)
+        raise
+
+    return build_hourly_frame(data)
+
+
+def _column(hourly: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in hourly.columns:
+        return np.full(len(hourly), np.nan)
+    return hourly[name].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _group_sum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """suma por dia ignorando NaN; NaN si el dia no tiene ningun dato."""
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    sums[~np.logical_or.reduceat(valid, starts)] = np.nan
+    return sums
+
+
+def _group_mean(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid.astype("int32"), starts)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def aggregate_daily(hourly: pd.DataFrame, min_hours: int = HOURLY_MIN_HOURS) -> pd.DataFrame:
+    """
+    columnas diarias (mismas que extract) + INTRADAY_FEATURES desde el frame
+    horario. los dias se cortan en hora local; los dias con menos de `min_hours`
+    horas (bordes de la ventana) se descartan
+    """
+    if hourly.empty:
+        return pd.DataFrame()
+
+    times = hourly["time"].to_numpy(dtype="datetime64[s]")
+    # orden real de las horas: el instante UTC si esta (la hora local repetida
+    # al terminar el horario de verano queda en su lugar)
+    key = hourly["unixtime"].to_numpy() if "unixtime" in hourly.columns else times
+    order = None
+    if not (key[1:] >= key[:-1]).all():
+        order = np.argsort(key, kind="stable")
+        times = times[order]
+
+    def col(name):
+        values = _column(hourly, name)
+        return values if order is None else values[order]
+
+    days = times.astype("datetime64[D]")
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    ends = np.r_[starts[1:], len(days)]
+    counts = ends - starts
+
+    temp = col("temp")
+    humidity = col("humidity")
+    dew_point = col("dew_point")
+    precipitation = col("precipitation")
+    pressure = col("surface_pressure")
+
+    # hora del maximo: la primera hora del dia cuyo valor iguala el maximo diario
+    temp_max = np.fmax.reduceat(temp, starts)
+    hours = (times - days).astype("int64") / 3600
+    at_max = temp == np.repeat(temp_max, counts)
+    temp_max_hour = np.fmin.reduceat(np.where(at_max, hours, np.nan), starts)
+
+    # mayor cambio entre horas consecutivas sin cruzar la medianoche
+    change = np.abs(np.diff(temp, prepend=np.nan))
+    change[starts] = np.nan
+
+    daily = pd.DataFrame(
+        {
+            "date": days[starts].astype("datetime64[ns]"),
+            "temp_max": temp_max,
+            "temp_min": np.fmin.reduceat(temp, starts),
+            "precipitation": _group_sum(precipitation, starts),
+            "sunshine_duration": _group_sum(col("sunshine_duration"), starts),
+            "windspeed_10m_max": np.fmax.reduceat(col("windspeed_10m"), starts),
+            "shortwave_radiation_sum": _group_sum(col("shortwave_radiation"), starts)
+            * W_HOUR_TO_MJ,
+            "et0_fao_evapotranspiration": _group_sum(col("et0_fao_evapotranspiration"), starts),
+            "relative_humidity_max": np.fmax.reduceat(humidity, starts),
+            "relative_humidity_min": np.fmin.reduceat(humidity, starts),
+            "dew_point_min": np.fmin.reduceat(dew_point, starts),
+            "dew_point_max": np.fmax.reduceat(dew_point, starts),
+            "cloud_cover_mean": _group_mean(col("cloud_cover"), starts),
+            # el codigo diario de Open-Meteo es el mas severo del dia
+            "weather_code": np.fmax.reduceat(col("weather_code"), starts),
+            "precip_hours": np.add.reduceat(
+                (precipitation >= RAIN_HOUR_MM).astype("float32"), starts
+            ),
+            "temp_max_hour": temp_max_hour,
+            "temp_change_max": np.fmax.reduceat(change, starts),
+            "pressure_tendency": pressure[ends - 1] - pressure[starts],
+        }
+    )
+    # un dia sin ninguna hora con precipitacion medida no tiene conteo de lluvia
+    daily.loc[np.isnan(daily["precipitation"]), "precip_hours"] = np.nan
+
+    complete = counts >= min_hours
+    if not complete.all():
+        logger.info("%d dias incompletos descartados (< %d horas)", (~complete).sum(), min_hours)
+    return compact_frame(daily[complete].reset_index(drop=True))
+
+
+def save_hourly_data(hourly: pd.DataFrame, city_name: str, replace: bool = True) -> str:
+    """
+    guarda el dataset horario. replace=False fusiona con las horas ya guardadas
+    de los años presentes (ante horas repetidas gana el dato nuevo). las horas
+    se identifican por su instante UTC: la hora local repetida al terminar el
+    horario de verano son dos observaciones distintas
+    """
+    if not replace:
+        first_year = pd.Timestamp(hourly["time"].min()).year
+        try:
+            existing = load_dataset(city_name, "hourly", start=date(first_year, 1, 1))
+        except FileNotFoundError:
+            existing = pd.DataFrame()
+        if not existing.empty:
+            key = "unixtime" if "unixtime" in hourly.columns else "time"
+            if key in existing.columns and existing[key].notna().all():
+                merged = pd.concat([existing, hourly], ignore_index=True)
+                merged = merged.drop_duplicates(subset=key, keep="last")
+            else:
+                # horas guardadas sin unixtime (datasets antiguos): por hora local
+                key = "time"
+                stale = existing["time"].isin(hourly["time"])
+                merged = pd.concat([existing[~stale], hourly], ignore_index=True)
+            hourly = merged.sort_values(key, kind="stable").reset_index(drop=True)
+    file_path = save_dataset(hourly, city_name, "hourly", replace=replace)
+    logger.info("datos horarios guardados en: %s", file_path)
+    return file_path
+
+
+def fetch_daily_from_hourly(
+    city_name: str,
+    latitude: float,
+    longitude: float,
+    days_back: int = 365,
+    incremental: bool = False,
+) -> pd.DataFrame:
+    """
+    descarga la ventana (o solo los dias posteriores al watermark) en resolucion
+    horaria, guarda las horas y devuelve el historial raw diario agregado
+    """
+    existing = load_raw_history(city_name) if incremental else pd.DataFrame()
+    if incremental:
+        fetch_range = plan_fetch_range(resolve_watermark(city_name, existing), days_back)
+        if fetch_range is None:
+            logger.info("historial de %s al dia; no hay dias nuevos", city_name)
+            return existing
+    else:
+        fetch_range = archive_window(days_back)
+
+    start_date, end_date = fetch_range
+    hourly = fetch_hourly_data(latitude, longitude, start_date=start_date, end_date=end_date)
+    if hourly.empty:
+        return existing
+
+    save_hourly_data(hourly, city_name, replace=not incremental)
+    daily = aggregate_daily(hourly)
+    daily["latitude"] = latitude
+    daily["longitude"] = longitude
+    logger.info(
+        "%s: %d horas → %d dias (%s a %s)",
+        city_name,
+        len(hourly),
+        len(daily),
+        start_date,
+        end_date,
+    )
+    return merge_history(existing, daily) if incremental else daily
@@ -0,0 +1,193 @@
+"""
+CACHE DE RESPUESTAS HTTP
+guarda en disco (gzip) las respuestas JSON de Open-Meteo bajo una clave =
+hash(endpoint, parametros normalizados). el TTL depende del endpoint: el
+pronostico cambia cada hora, el archive casi no cambia y los rangos que
+terminan antes de HTTP_CACHE_ARCHIVE_FINAL_DAYS dias atras no caducan nunca.
+las mismas entradas sirven de grabaciones para el stand-in local (standin.py)
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import urlparse
+
+from src.config.settings import (
+    HTTP_CACHE_ARCHIVE_FINAL_DAYS,
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_TTL_ARCHIVE_S,
+    HTTP_CACHE_TTL_FORECAST_S,
+)
+from src.etl.client import get_client
+from src.utils import paths
+
+logger = logging.getLogger(__name__)
+
+# parametros con coordenadas (una o varias separadas por coma)
+COORD_PARAMS = ("latitude", "longitude")
+# parametros con listas cuyo orden no cambia la respuesta
+LIST_PARAMS = ("daily", "hourly")
+
+
+def endpoint_kind(url: str) -> str:
+    """'archive' o 'forecast' segun el path (igual para la API real y el stand-in)."""
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1] or "root"
+
+
+def normalize_params(params: dict) -> dict[str, str]:
+    """
+    forma canonica de los parametros: claves ordenadas, coordenadas con 4
+    decimales (-33.45 == "-33.4500") y listas de variables ordenadas
+    """
+    normalized = {}
+    for key in sorted(params):
+        value = params[key]
+        if key in COORD_PARAMS:
+            value = ",".join(f"{float(v):.4f}" for v in str(value).split(","))
+        elif key in LIST_PARAMS:
+            value = ",".join(sorted(str(value).split(",")))
+        normalized[key] = str(value)
+    return normalized
+
+
+def request_key(url: str, params: dict) -> str:
+    raw = json.dumps(
+        {"endpoint": endpoint_kind(url), "params": normalize_params(params)}, sort_keys=True
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def ttl_for(url: str, params: dict) -> float | None:
+    """segundos de vida de la respuesta; None = no caduca."""
+    if endpoint_kind(url) != "archive":
+        return HTTP_CACHE_TTL_FORECAST_S
+    end = params.get("end_date")
+    try:
+        if end and date.fromisoformat(str(end)) < date.today() - timedelta(
+            days=HTTP_CACHE_ARCHIVE_FINAL_DAYS
+        ):
+            return None
+    except ValueError:
+        pass
+    return HTTP_CACHE_TTL_ARCHIVE_S
+
+
+def cache_enabled() -> bool:
+    return HTTP_CACHE_ENABLED and os.environ.get("WEATHER_HTTP_CACHE", "1") != "0"
+
+
+class ResponseCache:
+    def __init__(self, root: str | Path | None = None):
+        # DATA_DIR se lee al crear la cache (los tests lo redirigen)
+        self.root = Path(root) if root else paths.DATA_DIR / ".cache" / "http"
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def load_entry(self, key: str) -> dict | None:
+        """entrada completa (metadata + body) sin mirar el TTL; None si no existe."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError):
+            logger.warning("respuesta en cache corrupta: %s", path.name)
+            return None
+
+    def get(self, url: str, params: dict):
+        """body guardado si existe y no caduco; None en otro caso."""
+        entry = self.load_entry(request_key(url, params))
+        if entry is None:
+            return None
+        ttl = entry.get("ttl_s")
+        if ttl is not None and time.time() - entry["fetched_at"] > ttl:
+            return None
+        return entry["body"]
+
+    def put(self, url: str, params: dict, body) -> Path:
+        key = request_key(url, params)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "endpoint": endpoint_kind(url),
+            "params": normalize_params(params),
+            "fetched_at": time.time(),
+            "ttl_s": ttl_for(url, params),
+            "body": body,
+        }
+        # escritura atomica: varios procesos de train pueden pedir lo mismo
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+
+def _default_cache(cache: ResponseCache | None) -> ResponseCache | None:
+    if cache is None and cache_enabled():
+        return ResponseCache()
+    return cache
+
+
+def _store(cache: ResponseCache | None, url: str, params: dict, body) -> None:
+    if cache is None:
+        return
+    try:
+        cache.put(url, params, body)
+    except OSError as e:
+        logger.warning("no se pudo guardar la respuesta en cache: %s", e)
+
+
+def get_json(
+    url: str, params: dict, timeout: float, cache: ResponseCache | None = None
+):
+    """
+    GET con cache en disco; devuelve el JSON decodificado. los errores de red
+    se propagan (requests.RequestException) igual que sin cache
+    """
+    cache = _default_cache(cache)
+    if cache is not None:
+        body = cache.get(url, params)
+        if body is not None:
+            logger.info("respuesta de %s desde cache en disco", endpoint_kind(url))
+            return body
+
+    body = get_client().get_json(url, params, timeout)
+    _store(cache, url, params, body)
+    return body
+
+
+def get_json_many(
+    url: str, params_list: list[dict], timeout: float, cache: ResponseCache | None = None
+) -> list:
+    """
+    varios GET al mismo endpoint: los que no estan en cache salen concurrentes
+    por el cliente compartido. cada elemento es el JSON o la excepcion del request
+    """
+    cache = _default_cache(cache)
+    results = [cache.get(url, p) if cache is not None else None for p in params_list]
+    missing = [i for i, body in enumerate(results) if body is None]
+    if len(missing) < len(params_list):
+        logger.info(
+            "%d/%d respuestas de %s desde cache en disco",
+            len(params_list) - len(missing),
+            len(params_list),
+            endpoint_kind(url),
+        )
+
+    fetched = []
+    if missing:
+        fetched = get_client().get_many(url, [params_list[i] for i in missing], timeout)
+    for i, body in zip(missing, fetched):
+        results[i] = body
+        if not isinstance(body, Exception):
+            _store(cache, url, params_list[i], body)
+    return results
@@ -0,0 +1,145 @@
+"""
+INGESTA INCREMENTAL
+recuerda la ultima fecha ingerida por ciudad (watermark) y solo pide al
+archive API el rango faltante, fusionandolo con el historial crudo guardado
+"""
+
+import json
+import logging
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.config.settings import ARCHIVE_BATCH_SIZE
+from src.etl.extract import archive_window, fetch_historical_batch, fetch_historical_data
+from src.etl.transform import load_raw_data
+from src.utils.paths import city_slug, get_city_path
+
+logger = logging.getLogger(__name__)
+
+
+def _watermark_path(city_name: str):
+    folder = get_city_path(city_name, "raw")
+    return folder / f"{city_slug(city_name)}_watermark.json"
+
+
+def load_watermark(city_name: str) -> date | None:
+    path = _watermark_path(city_name)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return date.fromisoformat(json.load(f)["last_date"])
+
+
+def save_watermark(city_name: str, last_date: date) -> str:
+    path = _watermark_path(city_name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"city": city_name, "last_date": str(last_date)}, f, indent=4)
+    logger.info("watermark de %s actualizado a %s", city_name, last_date)
+    return str(path)
+
+
+def compute_watermark(df: pd.DataFrame) -> date | None:
+    """ultima fecha con temperatura valida (los dias aun no publicados se reintentan)."""
+    if df.empty:
+        return None
+    valid = df.dropna(subset=["temp_max", "temp_min"])
+    if valid.empty:
+        return None
+    return pd.to_datetime(valid["date"]).max().date()
+
+
+def merge_history(existing: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """une historial y datos nuevos; ante fechas repetidas gana el dato nuevo."""
+    if existing.empty:
+        return new.reset_index(drop=True)
+    if new.empty:
+        return existing.reset_index(drop=True)
+
+    merged = pd.concat([existing, new], ignore_index=True)
+    merged["_key"] = pd.to_datetime(merged["date"], errors="coerce")
+    merged = (
+        merged.drop_duplicates(subset="_key", keep="last")
+        .sort_values("_key")
+        .drop(columns="_key")
+        .reset_index(drop=True)
+    )
+    return merged
+
+
+def plan_fetch_range(
+    watermark: date | None, days_back: int
+) -> tuple[date, date] | None:
+    """rango a descargar dado el watermark, o None si el historial ya esta al dia."""
+    window_start, window_end = archive_window(days_back)
+    if watermark is None:
+        return window_start, window_end
+
+    start_date = max(watermark + timedelta(days=1), window_start)
+    if start_date > window_end:
+        return None
+    return start_date, window_end
+
+
+def load_raw_history(city_name: str) -> pd.DataFrame:
+    try:
+        return load_raw_data(city_name)
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+
+def resolve_watermark(city_name: str, existing: pd.DataFrame) -> date | None:
+    """watermark guardado, o derivado del historial crudo si aun no existe."""
+    if existing.empty:
+        return None
+    return load_watermark(city_name) or compute_watermark(existing)
+
+
+def fetch_incremental_data(
+    city_name: str, latitude: float, longitude: float, days_back: int = 365
+) -> pd.DataFrame:
+    """descarga solo los dias posteriores al watermark y devuelve el historial completo."""
+    existing = load_raw_history(city_name)
+    fetch_range = plan_fetch_range(resolve_watermark(city_name, existing), days_back)
+
+    if fetch_range is None:
+        logger.info("historial de %s al dia; no hay dias nuevos", city_name)
+        return existing
+
+    start_date, end_date = fetch_range
+    new = fetch_historical_data(
+        latitude, longitude, start_date=start_date, end_date=end_date
+    )
+    logger.info(
+        "%d dias nuevos para %s (%s a %s)", len(new), city_name, start_date, end_date
+    )
+    return merge_history(existing, new)
+
+
+def fetch_incremental_batch(
+    locations: dict[str, tuple[float, float]],
+    days_back: int = 365,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> dict[str, pd.DataFrame]:
+    """version por lotes: agrupa las ciudades con el mismo rango faltante en un request."""
+    histories, results = {}, {}
+    groups: dict[tuple[date, date], dict[str, tuple[float, float]]] = {}
+
+    for city, coords in locations.items():
+        existing = load_raw_history(city)
+        fetch_range = plan_fetch_range(resolve_watermark(city, existing), days_back)
+        if fetch_range is None:
+            logger.info("historial de %s al dia; no hay dias nuevos", city)
+            results[city] = existing
+            continue
+        histories[city] = existing
+        groups.setdefault(fetch_range, {})[city] = coords
+
+    for (start_date, end_date), group in groups.items():
+        new_frames = fetch_historical_batch(
+            group, start_date=start_date, end_date=end_date, batch_size=batch_size
+        )
+        for city, new in new_frames.items():
+            results[city] = merge_history(histories[city], new)
+
+    return results
@@ -1,27 +1,144 @@
 import logging
 
 import pandas as pd
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import (
+    Engine,
+    MetaData,
+    Table,
+    and_,
+    create_engine,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 
-from src.config.settings import get_db_url
+from src.config.settings import DB_CHUNKSIZE, get_db_url
 
 logger = logging.getLogger(__name__)
 
+# clave natural de cada fila: una observacion diaria por ubicacion
+KEY_COLUMNS = ["location", "date"]
+
 
 def init_db_connection() -> Engine:
     db_url = get_db_url()
     logger.info("iniciando conexion a DB: %s", db_url)
+    if db_url.startswith("sqlite"):
+        # varios procesos de entrenamiento pueden escribir a la vez
+        return create_engine(db_url, connect_args={"timeout": 30})
     return create_engine(db_url)
 
 
-def save_to_database(df: pd.DataFrame, table_name: str, engine: Engine):
+def _upsert_rows(table, conn, keys, data_iter):
+    """metodo para DataFrame.to_sql: inserta o actualiza por (location, date)."""
+    rows = [dict(zip(keys, row)) for row in data_iter]
+    sa_table = table.table
+    dialect = conn.dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(sa_table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={c: stmt.excluded[c] for c in keys if c not in KEY_COLUMNS},
+        )
+        conn.execute(stmt)
+        return len(rows)
+
+    # otros motores: borrar las claves del lote y reinsertar (misma transaccion)
+    for row in rows:
+        conn.execute(
+            sa_table.delete().where(
+                and_(*(sa_table.c[k] == row[k] for k in KEY_COLUMNS))
+            )
+        )
+    conn.execute(sa_table.insert(), rows)
+    return len(rows)
+
+
+def _create_indexes(table_name: str, engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{table_name}_location_date" '
+                f'ON "{table_name}" (location, date)'
+            )
+        )
+        conn.execute(
+            text(
+                f'CREATE INDEX IF NOT EXISTS "ix_{table_name}_date" '
+                f'ON "{table_name}" (date)'
+            )
+        )
+
+
+def _ensure_table(df: pd.DataFrame, table_name: str, engine: Engine) -> None:
+    """crea la tabla con sus indices, o la adapta si cambio el esquema."""
+    inspector = inspect(engine)
+
+    if inspector.has_table(table_name):
+        existing = {c["name"] for c in inspector.get_columns(table_name)}
+        if not set(KEY_COLUMNS) <= existing:
+            # tabla antigua cargada con append (con duplicados); se reconstruye
+            # porque cada corrida escribe el historial limpio completo
+            logger.warning("tabla '%s' sin clave (location, date); se recrea", table_name)
+            df.head(0).to_sql(table_name, con=engine, if_exists="replace", index=False)
+        else:
+            new_cols = [c for c in df.columns if c not in existing]
+            with engine.begin() as conn:
+                for col in new_cols:
+                    col_type = "FLOAT" if pd.api.types.is_numeric_dtype(df[col]) else "TEXT"
+                    conn.execute(
+                        text(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" {col_type}')
+                    )
+    else:
+        df.head(0).to_sql(table_name, con=engine, index=False)
+
+    _create_indexes(table_name, engine)
+
+
+def save_to_database(
+    df: pd.DataFrame, table_name: str, engine: Engine, location: str
+):
+    """upsert idempotente por (location, date) en lotes de DB_CHUNKSIZE filas."""
     try:
-        df.to_sql(table_name, con=engine, if_exists="append", index=False)
-        logger.info("datos cargados exitosamente en tabla '%s'", table_name)
+        df = df.copy()
+        df["location"] = location
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df = df.dropna(subset=["date"]).drop_duplicates(subset=KEY_COLUMNS, keep="last")
+
+        _ensure_table(df, table_name, engine)
+        df.to_sql(
+            table_name,
+            con=engine,
+            if_exists="append",
+            index=False,
+            chunksize=DB_CHUNKSIZE,
+            method=_upsert_rows,
+        )
+        logger.info("%d filas cargadas (upsert) en tabla '%s'", len(df), table_name)
     except Exception as e:
         logger.error("error cargando a base de datos: %s", e)
 
 
-def read_from_database(table_name: str, engine: Engine) -> pd.DataFrame:
-    query = f"SELECT * FROM {table_name}"
-    return pd.read_sql(query, con=engine)
+def read_from_database(
+    table_name: str,
+    engine: Engine,
+    columns: list[str] | None = None,
+    start=None,
+    end=None,
+) -> pd.DataFrame:
+    """lee la tabla filtrando por fecha (inclusive) y columnas directamente en SQL."""
+    table = Table(table_name, MetaData(), autoload_with=engine)
+
+    selected = [table.c[c] for c in columns] if columns else [table]
+    query = select(*selected)
+    if start is not None:
+        query = query.where(table.c.date >= pd.Timestamp(start).to_pydatetime())
+    if end is not None:
+        query = query.where(table.c.date <= pd.Timestamp(end).to_pydatetime())
+    query = query.order_by(table.c.date)
+
+    parse_dates = ["date"] if not columns or "date" in columns else None
+    return pd.read_sql(query, con=engine, parse_dates=parse_dates)
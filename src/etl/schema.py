@@ -0,0 +1,110 @@
+"""
+ESQUEMA COMPACTO
+tipos de las columnas de clima en memoria y en disco: float32 para mediciones,
+Int16 nulable para codigos y enteros chicos para campos de calendario. la
+ubicacion (lat/lon) no se repite en cada fila: se guarda como metadata por ciudad
+"""
+
+import json
+import logging
+
+import pandas as pd
+
+from src.utils.paths import city_slug, get_city_path
+
+logger = logging.getLogger(__name__)
+
+MEASUREMENT_COLUMNS = [
+    "temp_max",
+    "temp_min",
+    "temp_avg",
+    "temp_range",
+    "precipitation",
+    "sunshine_duration",
+    "windspeed_10m_max",
+    "shortwave_radiation_sum",
+    "et0_fao_evapotranspiration",
+    "relative_humidity_max",
+    "relative_humidity_min",
+    "humidity_avg",
+    "dew_point_min",
+    "dew_point_max",
+    "dew_point_avg",
+    "cloud_cover_mean",
+    # features intra-diarias (solo con ingesta horaria, ver src.etl.hourly)
+    "precip_hours",
+    "temp_max_hour",
+    "temp_change_max",
+    "pressure_tendency",
+]
+
+# codigos WMO (0-99), nulables
+CODE_COLUMNS = ["weather_code"]
+
+CALENDAR_DTYPES = {"day_of_year": "int16", "month": "int8"}
+
+LOCATION_COLUMNS = ["latitude", "longitude"]
+
+
+def ensure_datetime(df: pd.DataFrame, column: str = "date") -> pd.DataFrame:
+    """parsea la fecha solo si aun no es datetime (evita re-parsear en cada etapa)."""
+    if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+        df[column] = pd.to_datetime(df[column], errors="coerce")
+    return df
+
+
+def compact_frame(df: pd.DataFrame, drop_location: bool = True) -> pd.DataFrame:
+    """copia del frame con el esquema compacto; columnas desconocidas no se tocan."""
+    df = df.drop(columns=LOCATION_COLUMNS, errors="ignore") if drop_location else df.copy()
+    ensure_datetime(df)
+
+    for col in MEASUREMENT_COLUMNS:
+        if col in df.columns and df[col].dtype != "float32":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+
+    for col in CODE_COLUMNS:
+        if col in df.columns and df[col].dtype != "Int16":
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int16")
+
+    for col, dtype in CALENDAR_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+
+    return df
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def log_frame_memory(df: pd.DataFrame, stage: str, city_name: str = "") -> float:
+    mb = frame_memory_mb(df)
+    logger.info(
+        "memoria %s%s: %.3f MB (%d filas x %d columnas)",
+        f"{city_name} " if city_name else "",
+        stage,
+        mb,
+        len(df),
+        df.shape[1],
+    )
+    return mb
+
+
+def _location_path(city_name: str):
+    return get_city_path(city_name) / f"{city_slug(city_name)}_location.json"
+
+
+def save_location_metadata(city_name: str, latitude: float, longitude: float) -> str:
+    path = _location_path(city_name)
+    meta = {"city": city_name, "latitude": latitude, "longitude": longitude}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4, ensure_ascii=False)
+    return str(path)
+
+
+def load_location_metadata(city_name: str) -> dict | None:
+    path = _location_path(city_name)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
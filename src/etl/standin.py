@@ -0,0 +1,325 @@
+"""
+STAND-IN LOCAL DE OPEN-METEO
+servidor HTTP compatible con /v1/archive y /v1/forecast (respuesta "daily" u
+"hourly", una o varias ubicaciones) para desarrollo, tests de throughput y benchmarks
+sin red. responde primero con grabaciones (las entradas de la cache HTTP,
+ver http_cache.py) y si no hay, con datos sinteticos reproducibles por
+ubicacion (src.utils.synthetic). --latency-ms simula la latencia de red
+
+uso:
+    python -m src.etl.standin --port 8099
+    export OPEN_METEO_ARCHIVE_URL=http://127.0.0.1:8099/v1/archive
+    export OPEN_METEO_API_URL=http://127.0.0.1:8099/v1/forecast
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.config.settings import DAILY_VARS, STANDIN_HOST, STANDIN_PORT
+from src.etl.extract import COLUMN_MAP
+from src.etl.hourly import HOURLY_COLUMN_MAP
+from src.etl.http_cache import ResponseCache, endpoint_kind, request_key
+from src.utils.synthetic import hourly_from_daily, synthetic_weather
+
+logger = logging.getLogger(__name__)
+
+# el archive API empieza en 1940; la serie sintetica de cada ubicacion arranca
+# ahi para que dos requests con rangos distintos vean los mismos valores
+SYNTHETIC_EPOCH = date(1940, 1, 1)
+MAX_FORECAST_DAYS = 16
+
+DAILY_UNITS = {
+    "time": "iso8601",
+    "temperature_2m_max": "°C",
+    "temperature_2m_min": "°C",
+    "precipitation_sum": "mm",
+    "sunshine_duration": "s",
+    "windspeed_10m_max": "km/h",
+    "shortwave_radiation_sum": "MJ/m²",
+    "et0_fao_evapotranspiration": "mm",
+    "weathercode": "wmo code",
+    "relative_humidity_2m_max": "%",
+    "relative_humidity_2m_min": "%",
+    "dew_point_2m_min": "°C",
+    "dew_point_2m_max": "°C",
+    "cloud_cover_mean": "%",
+}
+
+
+class StandInRequestError(ValueError):
+    pass
+
+
+# series sinteticas por ubicacion (LRU); un stand-in de larga vida las extiende
+SERIES_CACHE_SIZE = 64
+_series_cache: OrderedDict[tuple[float, float], pd.DataFrame] = OrderedDict()
+_series_lock = threading.Lock()
+
+
+def _synthetic_block(
+    latitude: float, longitude: float, start: date, end: date
+) -> pd.DataFrame:
+    # semilla = hash de las coordenadas (y del inicio para los bloques de extension)
+    label = f"{latitude:.4f},{longitude:.4f}"
+    if start != SYNTHETIC_EPOCH:
+        label += f",{start}"
+    df = synthetic_weather(
+        latitude,
+        longitude,
+        start=start,
+        days=(end - start).days + 1,
+        seed=zlib.crc32(label.encode()),
+    )
+    return df.set_index("date")
+
+
+def _location_series(latitude: float, longitude: float) -> pd.DataFrame:
+    """
+    serie sintetica de la ubicacion hasta hoy + MAX_FORECAST_DAYS. si el
+    proceso sigue vivo cuando cambia el dia, se agrega un bloque nuevo al final
+    sin cambiar los dias ya servidos
+    """
+    horizon = date.today() + timedelta(days=MAX_FORECAST_DAYS)
+    key = (latitude, longitude)
+    with _series_lock:
+        series = _series_cache.get(key)
+        if series is None:
+            series = _synthetic_block(latitude, longitude, SYNTHETIC_EPOCH, horizon)
+        elif series.index[-1].date() < horizon:
+            start = series.index[-1].date() + timedelta(days=1)
+            series = pd.concat(
+                [series, _synthetic_block(latitude, longitude, start, horizon)]
+            )
+        _series_cache[key] = series
+        _series_cache.move_to_end(key)
+        while len(_series_cache) > SERIES_CACHE_SIZE:
+            _series_cache.popitem(last=False)
+    return series
+
+
+def _parse_coords(params: dict) -> list[tuple[float, float]]:
+    try:
+        lats = [float(v) for v in params["latitude"].split(",")]
+        lons = [float(v) for v in params["longitude"].split(",")]
+    except KeyError as e:
+        raise StandInRequestError(f"falta el parametro {e.args[0]}") from None
+    except ValueError:
+        raise StandInRequestError("latitude/longitude invalidos") from None
+    if len(lats) != len(lons):
+        raise StandInRequestError("latitude y longitude deben tener el mismo largo")
+    return list(zip(lats, lons))
+
+
+def _parse_window(kind: str, params: dict) -> tuple[date, date]:
+    try:
+        if kind == "archive":
+            return date.fromisoformat(params["start_date"]), date.fromisoformat(
+                params["end_date"]
+            )
+        past = int(params.get("past_days", 0))
+        forecast = int(params.get("forecast_days", 7))
+    except KeyError as e:
+        raise StandInRequestError(f"falta el parametro {e.args[0]}") from None
+    except ValueError as e:
+        raise StandInRequestError(str(e)) from None
+    if not 0 <= forecast <= MAX_FORECAST_DAYS:
+        raise StandInRequestError(f"forecast_days debe estar entre 0 y {MAX_FORECAST_DAYS}")
+    today = date.today()
+    return today - timedelta(days=past), today + timedelta(days=forecast - 1)
+
+
+def _clean(value) -> float | int | None:
+    if value is None or pd.isna(value):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() and abs(value) < 1e9 else round(value, 2)
+
+
+def synthetic_response(
+    latitude: float, longitude: float, start: date, end: date, variables: list[str]
+) -> dict:
+    """respuesta "daily" con el formato de Open-Meteo para una ubicacion."""
+    if start < SYNTHETIC_EPOCH or end < start:
+        raise StandInRequestError(f"rango invalido: {start} a {end}")
+    window = _location_series(latitude, longitude).loc[str(start) : str(end)]
+
+    daily = {"time": [d.strftime("%Y-%m-%d") for d in window.index]}
+    for var in variables:
+        column = COLUMN_MAP.get(var)
+        if column is None or column not in window.columns:
+            daily[var] = [None] * len(window)
+        else:
+            daily[var] = [_clean(v) for v in window[column].tolist()]
+
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": "GMT",
+        "daily_units": {v: DAILY_UNITS.get(v, "") for v in ["time", *variables]},
+        "daily": daily,
+    }
+
+
+def synthetic_hourly_response(
+    latitude: float,
+    longitude: float,
+    start: date,
+    end: date,
+    variables: list[str],
+    unixtime: bool = False,
+) -> dict:
+    """respuesta "hourly" (hora GMT) derivada de la misma serie diaria sintetica."""
+    if start < SYNTHETIC_EPOCH or end < start:
+        raise StandInRequestError(f"rango invalido: {start} a {end}")
+    hourly = hourly_from_daily(
+        _location_series(latitude, longitude).loc[str(start) : str(end)].reset_index()
+    )
+
+    times = hourly["time"].to_numpy(dtype="datetime64[s]")
+    if unixtime:
+        data = {"time": times.astype("int64").tolist()}
+    else:
+        data = {"time": [str(t)[:16] for t in times]}
+    for var in variables:
+        column = HOURLY_COLUMN_MAP.get(var)
+        if column is None:
+            data[var] = [None] * len(hourly)
+        else:
+            data[var] = [_clean(v) for v in hourly[column].tolist()]
+
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": "GMT",
+        "utc_offset_seconds": 0,
+        "hourly": data,
+    }
+
+
+def respond(path: str, params: dict, recordings: ResponseCache | None = None):
+    """cuerpo JSON para GET path?params (grabacion si existe, si no sintetico)."""
+    kind = endpoint_kind(path)
+    if kind not in ("archive", "forecast"):
+        raise FileNotFoundError(f"ruta desconocida: {path}")
+
+    if recordings is not None:
+        entry = recordings.load_entry(request_key(path, params))
+        if entry is not None:
+            return entry["body"]
+
+    coords = _parse_coords(params)
+    start, end = _parse_window(kind, params)
+    if "hourly" in params:
+        unixtime = params.get("timeformat") == "unixtime"
+        variables = params["hourly"].split(",")
+        items = [
+            synthetic_hourly_response(lat, lon, start, end, variables, unixtime)
+            for lat, lon in coords
+        ]
+    else:
+        variables = params.get("daily", ",".join(DAILY_VARS)).split(",")
+        items = [synthetic_response(lat, lon, start, end, variables) for lat, lon in coords]
+    # como la API real: una ubicacion → objeto, varias → lista en el mismo orden
+    return items[0] if len(items) == 1 else items
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    recordings: ResponseCache | None = None
+    latency_s: float = 0.0
+
+    def _send_json(self, status: int, body) -> None:
+        data = json.dumps(body, ensure_ascii=False, allow_nan=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+        try:
+            self._send_json(200, respond(url.path, params, self.recordings))
+        except StandInRequestError as e:
+            # mismo formato de error que Open-Meteo
+            self._send_json(400, {"error": True, "reason": str(e)})
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": True, "reason": str(e)})
+        except Exception as e:
+            logger.exception("error en el stand-in: %s", e)
+            self._send_json(500, {"error": True, "reason": str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.client_address[0], format % args)
+
+
+def make_server(
+    host: str = STANDIN_HOST,
+    port: int = STANDIN_PORT,
+    recordings_dir: str | Path | None = None,
+    latency_ms: float = 0.0,
+    use_recordings: bool = True,
+) -> ThreadingHTTPServer:
+    recordings = ResponseCache(recordings_dir) if use_recordings else None
+    handler = type(
+        "BoundStandInHandler",
+        (StandInHandler,),
+        {"recordings": recordings, "latency_s": latency_ms / 1000},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main() -> None:
+    from src.config.logger import setup_logging
+
+    parser = argparse.ArgumentParser(description="stand-in local de Open-Meteo")
+    parser.add_argument("--host", default=STANDIN_HOST)
+    parser.add_argument("--port", type=int, default=STANDIN_PORT)
+    parser.add_argument(
+        "--recordings",
+        help="directorio de respuestas grabadas (default: la cache HTTP en data/.cache/http)",
+    )
+    parser.add_argument(
+        "--synthetic-only", action="store_true", help="ignorar grabaciones"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="latencia simulada por request"
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    server = make_server(
+        args.host,
+        args.port,
+        recordings_dir=args.recordings,
+        latency_ms=args.latency_ms,
+        use_recordings=not args.synthetic_only,
+    )
+    host, port = server.server_address[:2]
+    logger.info("stand-in de Open-Meteo en http://%s:%d", host, port)
+    logger.info("export OPEN_METEO_ARCHIVE_URL=http://%s:%d/v1/archive", host, port)
+    logger.info("export OPEN_METEO_API_URL=http://%s:%d/v1/forecast", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("stand-in detenido")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+ALMACENAMIENTO COLUMNAR
+datasets raw/processed en Parquet con esquema tipado, particionados por ciudad
+(carpeta) y año (particion hive), con proyeccion de columnas y filtro por rango
+de fechas en la lectura. si pyarrow no esta instalado se usa CSV
+"""
+
+import logging
+import shutil
+import time
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+from src.etl.schema import LOCATION_COLUMNS, MEASUREMENT_COLUMNS, ensure_datetime
+from src.utils.paths import city_slug, get_city_path
+
+logger = logging.getLogger(__name__)
+
+# intento de importar pyarrow, fallback a CSV
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    USE_PARQUET = True
+except ImportError:
+    USE_PARQUET = False
+
+# etapa → (subcarpeta, sufijo del archivo)
+STAGES = {
+    "raw": ("raw", "weather_raw"),
+    "processed": ("processed", "weather_clean"),
+    "hourly": ("raw", "weather_hourly"),
+}
+
+# columna temporal de la etapa (particion por año y filtro start/end); "date" por defecto
+TIME_COLUMNS = {"hourly": "time"}
+
+if USE_PARQUET:
+    SCHEMA = {
+        "date": pa.date32(),
+        "time": pa.timestamp("s"),
+        "unixtime": pa.int64(),
+        "weather_code": pa.int16(),
+        **{col: pa.float32() for col in MEASUREMENT_COLUMNS},
+        # solo en datasets antiguos: hoy la ubicacion va en <ciudad>_location.json
+        **{col: pa.float64() for col in LOCATION_COLUMNS},
+    }
+    PARTITIONING = ds.partitioning(pa.schema([("year", pa.int16())]), flavor="hive")
+    # enteros nulables para no degradar weather_code a float al leer
+    TYPES_MAPPER = {pa.int16(): pd.Int16Dtype()}.get
+
+
+def dataset_path(city_name: str, stage: str) -> Path:
+    subfolder, suffix = STAGES[stage]
+    folder = get_city_path(city_name, subfolder)
+    name = f"{city_slug(city_name)}_{suffix}"
+    return folder / name if USE_PARQUET else folder / f"{name}.csv"
+
+
+# marca que se reescribe en cada save_dataset: reescribir un year=YYYY/ no
+# cambia el mtime de la carpeta del dataset (pyarrow ignora archivos con "_")
+VERSION_FILE = "_version"
+
+
+def dataset_version_path(city_name: str, stage: str) -> Path:
+    """archivo cuyo mtime cambia con cada guardado del dataset (para caches)."""
+    path = dataset_path(city_name, stage)
+    marker = path / VERSION_FILE
+    # datasets guardados antes de la marca: la carpeta (o el CSV)
+    return marker if USE_PARQUET and marker.exists() else path
+
+
+def _touch_version(path: Path) -> None:
+    (path / VERSION_FILE).write_text(str(time.time_ns()), encoding="utf-8")
+
+
+def _legacy_csv_path(city_name: str, stage: str) -> Path:
+    subfolder, suffix = STAGES[stage]
+    return get_city_path(city_name, subfolder) / f"{city_slug(city_name)}_{suffix}.csv"
+
+
+def _time_column(stage: str) -> str:
+    return TIME_COLUMNS.get(stage, "date")
+
+
+def _to_arrow_table(df: pd.DataFrame, time_col: str = "date") -> "pa.Table":
+    df = ensure_datetime(df.copy(), time_col)
+
+    missing_date = df[time_col].isna()
+    if missing_date.any():
+        logger.warning("%d filas sin fecha descartadas al guardar", missing_date.sum())
+        df = df[~missing_date]
+
+    df["year"] = df[time_col].dt.year.astype("int16")
+
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    schema = pa.schema(
+        [pa.field(name, SCHEMA.get(name, inferred.field(name).type)) for name in df.columns]
+    )
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _write_parquet(table: "pa.Table", path: Path, replace: bool) -> None:
+    if not replace:
+        # reescribe solo los años presentes en la tabla
+        ds.write_dataset(
+            table,
+            path,
+            format="parquet",
+            partitioning=PARTITIONING,
+            existing_data_behavior="delete_matching",
+            basename_template="part-{i}.parquet",
+        )
+        return
+
+    # se escribe a un directorio temporal y se intercambia para no dejar
+    # el dataset a medio escribir si algo falla
+    tmp_path = path.with_name(path.name + ".tmp")
+    old_path = path.with_name(path.name + ".old")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        table,
+        tmp_path,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template="part-{i}.parquet",
+    )
+    if path.exists():
+        path.rename(old_path)
+    tmp_path.rename(path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def save_dataset(
+    df: pd.DataFrame, city_name: str, stage: str, replace: bool = True
+) -> str:
+    """
+    guarda el DataFrame de la etapa. replace=True reemplaza todo el historial;
+    replace=False solo reescribe los años que vienen en df
+    """
+    path = dataset_path(city_name, stage)
+    time_col = _time_column(stage)
+    if USE_PARQUET:
+        _write_parquet(_to_arrow_table(df, time_col), path, replace)
+        _touch_version(path)
+    elif replace or not path.exists():
+        df.to_csv(path, index=False)
+    else:
+        _merge_csv_years(df, path, time_col)
+    return str(path)
+
+
+def _merge_csv_years(df: pd.DataFrame, path: Path, time_col: str = "date") -> None:
+    """equivalente CSV de delete_matching: reemplaza los años presentes en df."""
+    existing = pd.read_csv(path)
+    years = set(pd.to_datetime(df[time_col], errors="coerce").dt.year.dropna())
+    keep = ~pd.to_datetime(existing[time_col], errors="coerce").dt.year.isin(years)
+    merged = pd.concat([existing[keep], df], ignore_index=True)
+    merged["_key"] = pd.to_datetime(merged[time_col], errors="coerce")
+    merged.sort_values("_key").drop(columns="_key").to_csv(path, index=False)
+
+
+def _date_scalar(value) -> "pa.Scalar":
+    return pa.scalar(pd.Timestamp(value).date(), pa.date32())
+
+
+def _end_bound(end) -> pd.Timestamp:
+    """fin exclusivo: el dia siguiente a `end` (un dia incluye todas sus horas)."""
+    return pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+
+
+def _build_filter(start, end, time_col: str = "date"):
+    field = ds.field(time_col)
+    hourly = time_col != "date"
+    expr = None
+    if start is not None:
+        if hourly:
+            bound = pa.scalar(pd.Timestamp(start), pa.timestamp("s"))
+        else:
+            bound = _date_scalar(start)
+        expr = (ds.field("year") >= pd.Timestamp(start).year) & (field >= bound)
+    if end is not None:
+        year_expr = ds.field("year") <= pd.Timestamp(end).year
+        if hourly:
+            end_expr = year_expr & (field < pa.scalar(_end_bound(end), pa.timestamp("s")))
+        else:
+            end_expr = year_expr & (field <= _date_scalar(end))
+        expr = end_expr if expr is None else expr & end_expr
+    return expr
+
+
+def _read_csv(
+    path: Path,
+    columns: list[str] | None,
+    start: str | date | None,
+    end: str | date | None,
+    time_col: str = "date",
+) -> pd.DataFrame:
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(columns + ([time_col] if start or end else [])))
+    df = pd.read_csv(path, usecols=usecols)
+
+    if start is not None or end is not None:
+        dates = pd.to_datetime(df[time_col], errors="coerce")
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= dates >= pd.Timestamp(start)
+        if end is not None:
+            mask &= dates < _end_bound(end)
+        df = df[mask].reset_index(drop=True)
+
+    return df[columns] if columns is not None else df
+
+
+def load_dataset(
+    city_name: str,
+    stage: str,
+    columns: list[str] | None = None,
+    start: str | date | None = None,
+    end: str | date | None = None,
+) -> pd.DataFrame:
+    """
+    lee el dataset de la etapa. columns limita las columnas leidas del disco
+    y start/end (inclusive) se empujan como filtro sobre particiones y row groups
+    """
+    path = dataset_path(city_name, stage)
+    time_col = _time_column(stage)
+
+    if not path.exists():
+        # datos guardados en CSV antes de migrar a Parquet
+        legacy = _legacy_csv_path(city_name, stage)
+        if legacy.exists():
+            return _read_csv(legacy, columns, start, end, time_col)
+        raise FileNotFoundError(f"no existe dataset {stage} en {path}")
+
+    if not USE_PARQUET:
+        return _read_csv(path, columns, start, end, time_col)
+
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+    read_columns = columns
+    if read_columns is None:
+        read_columns = [name for name in dataset.schema.names if name != "year"]
+
+    table = dataset.to_table(
+        columns=read_columns, filter=_build_filter(start, end, time_col)
+    )
+    df = table.to_pandas(date_as_object=False, types_mapper=TYPES_MAPPER)
+
+    if time_col in df.columns:
+        df = df.sort_values(time_col, kind="stable").reset_index(drop=True)
+    return df
@@ -0,0 +1,107 @@
+"""
+ETL EN STREAMING
+para historiales de varias decadas: descarga por años, limpia cada chunk y lo
+escribe en su particion, con memoria acotada por el tamaño de un año. las medias
+de imputacion se acumulan con agregados combinables (FrameStats) durante la
+primera pasada y se aplican en una segunda pasada particion por particion
+"""
+
+import logging
+from collections.abc import Callable
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.etl.extract import fetch_historical_data
+from src.etl.incremental import compute_watermark, save_watermark
+from src.etl.schema import compact_frame
+from src.etl.storage import load_dataset, save_dataset
+from src.etl.transform import FILL_COLUMNS, clean_frame, impute_and_round
+from src.utils.aggregates import FrameStats
+
+logger = logging.getLogger(__name__)
+
+
+def history_window(years: int) -> tuple[date, date]:
+    """(inicio, fin) de `years` años terminando ayer (limite del archive API)."""
+    end = date.today() - timedelta(days=1)
+    return date(end.year - years, end.month, 1), end
+
+
+def year_chunks(start: date, end: date) -> list[tuple[date, date]]:
+    """rangos por año calendario, alineados con las particiones year=."""
+    chunks = []
+    for year in range(start.year, end.year + 1):
+        chunk_start = max(start, date(year, 1, 1))
+        chunk_end = min(end, date(year, 12, 31))
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def stream_city_history(
+    city_name: str,
+    latitude: float,
+    longitude: float,
+    start: date,
+    end: date,
+    fetch: Callable[..., pd.DataFrame] | None = None,
+    on_chunk: Callable[[pd.DataFrame], None] | None = None,
+) -> dict:
+    """
+    ETL raw → processed de [start, end] un año a la vez. on_chunk recibe cada
+    particion ya imputada (p.ej. para cargarla en la base de datos)
+    """
+    fetch = fetch or fetch_historical_data
+    chunks = year_chunks(start, end)
+    stats = FrameStats(FILL_COLUMNS)
+    watermark = None
+    written = []
+
+    # pasada 1: descarga, limpieza fila a fila y agregados de imputacion
+    for chunk_start, chunk_end in chunks:
+        raw = fetch(latitude, longitude, start_date=chunk_start, end_date=chunk_end)
+        if raw.empty:
+            logger.warning(
+                "%s: sin datos entre %s y %s", city_name, chunk_start, chunk_end
+            )
+            continue
+
+        raw = compact_frame(raw)
+        save_dataset(raw, city_name, "raw", replace=False)
+        chunk_watermark = compute_watermark(raw)
+        if chunk_watermark is not None:
+            watermark = max(watermark or chunk_watermark, chunk_watermark)
+
+        clean = compact_frame(clean_frame(raw))
+        stats.update(clean)
+        save_dataset(clean, city_name, "processed", replace=False)
+        written.append((chunk_start, chunk_end))
+        logger.info(
+            "%s: chunk %s a %s (%d filas)", city_name, chunk_start, chunk_end, len(clean)
+        )
+
+    # media global cuando hay datos, cero si no (igual que clean_and_transform)
+    fill_values = stats.means(default=0)
+
+    # pasada 2: imputacion con los valores globales, una particion a la vez
+    rows = 0
+    for chunk_start, chunk_end in written:
+        part = load_dataset(city_name, "processed", start=chunk_start, end=chunk_end)
+        part = impute_and_round(part, fill_values)
+        save_dataset(part, city_name, "processed", replace=False)
+        rows += len(part)
+        if on_chunk is not None:
+            on_chunk(part)
+
+    if watermark is not None:
+        save_watermark(city_name, watermark)
+
+    logger.info(
+        "%s: %d filas procesadas en %d chunks", city_name, rows, len(written)
+    )
+    return {
+        "rows": rows,
+        "chunks": len(written),
+        "watermark": watermark,
+        "fill_values": fill_values,
+    }
@@ -3,24 +3,58 @@ import logging
 import numpy as np
 import pandas as pd
 
-from src.utils.paths import city_slug, get_city_path
+from src.etl.schema import ensure_datetime
+from src.etl.storage import load_dataset, save_dataset
 
 logger = logging.getLogger(__name__)
 
 
-def load_raw_data(city_name: str) -> pd.DataFrame:
-    folder = get_city_path(city_name, "raw")
-    file_path = folder / f"{city_slug(city_name)}_weather_raw.csv"
-
-    if not file_path.exists():
-        raise FileNotFoundError(f"no existe archivo raw en {file_path}")
-
-    return pd.read_csv(file_path)
-
-
-def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+def load_raw_data(
+    city_name: str,
+    columns: list[str] | None = None,
+    start=None,
+    end=None,
+) -> pd.DataFrame:
+    return load_dataset(city_name, "raw", columns=columns, start=start, end=end)
+
+
+def load_clean_data(
+    city_name: str,
+    columns: list[str] | None = None,
+    start=None,
+    end=None,
+) -> pd.DataFrame:
+    try:
+        return load_dataset(
+            city_name, "processed", columns=columns, start=start, end=end
+        )
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"ejecuta 'train' primero — no hay datos procesados para {city_name}"
+        ) from None
+
+
+# columnas imputadas con la media (cero si la columna no tiene datos)
+FILL_COLUMNS = [
+    "precipitation",
+    "sunshine_duration",
+    "windspeed_10m_max",
+    "shortwave_radiation_sum",
+    "et0_fao_evapotranspiration",
+    "humidity_avg",
+    "dew_point_avg",
+    "cloud_cover_mean",
+    "temp_range",
+    "precip_hours",
+    "temp_max_hour",
+    "temp_change_max",
+    "pressure_tendency",
+]
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """tipos, filtros de calidad y columnas derivadas; sin imputar (fila a fila)."""
+    df = ensure_datetime(df.copy())
 
     numeric_cols = [
         "temp_max",
@@ -62,25 +96,21 @@ def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
     else:
         df["dew_point_avg"] = np.nan
 
-    # imputacion de nulos (media cuando hay datos, cero si no)
-    cols_to_fill = [
-        "precipitation",
-        "sunshine_duration",
-        "windspeed_10m_max",
-        "shortwave_radiation_sum",
-        "et0_fao_evapotranspiration",
-        "humidity_avg",
-        "dew_point_avg",
-        "cloud_cover_mean",
-        "temp_range",
-    ]
+    return df
+
 
+def compute_fill_values(df: pd.DataFrame) -> dict:
     fill_values = {}
-    for col in cols_to_fill:
+    for col in FILL_COLUMNS:
         if col in df.columns:
             # si la columna tiene valores no nulos, se llena con la media, sino con cero
             fill_values[col] = df[col].mean() if df[col].notna().any() else 0
+    return fill_values
 
+
+def impute_and_round(df: pd.DataFrame, fill_values: dict) -> pd.DataFrame:
+    """imputacion con valores globales (de compute_fill_values o agregados por chunks)."""
+    fill_values = {col: v for col, v in fill_values.items() if col in df.columns}
     df = df.fillna(fill_values)
 
     # redondeo final para limpieza visual
@@ -92,9 +122,13 @@ def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def clean_and_transform(df: pd.DataFrame) -> pd.DataFrame:
+    df = clean_frame(df)
+    # imputacion de nulos (media cuando hay datos, cero si no)
+    return impute_and_round(df, compute_fill_values(df))
+
+
 def save_processed_data(df: pd.DataFrame, city_name: str) -> str:
-    folder = get_city_path(city_name, "processed")
-    file_path = folder / f"{city_slug(city_name)}_weather_clean.csv"
-    df.to_csv(file_path, index=False)
+    file_path = save_dataset(df, city_name, "processed")
     logger.info("datos procesados guardados en: %s", file_path)
-    return str(file_path)
+    return file_path
@@ -0,0 +1,168 @@
+"""
+MOTOR DE ENTRENAMIENTO
+entrena el modelo final y evalua los folds de TimeSeriesSplit en paralelo sobre
+datos compartidos. con XGBoost el sketch de cuantiles se calcula una sola vez
+sobre la matriz completa (QuantileDMatrix) y cada fold solo re-discretiza sus
+filas con esos mismos cortes (ref=). el entrenamiento final corre en paralelo
+con la evaluacion, repartiendo un presupuesto fijo de hilos entre las tareas
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.model_selection import TimeSeriesSplit
+
+from src.modeling.train import (
+    USE_XGB,
+    default_model_params,
+    evaluate_model,
+    train_temperature_model,
+)
+from src.utils.instrumentation import annotate
+
+logger = logging.getLogger(__name__)
+
+
+def _thread_budget(n_jobs: int | None) -> int:
+    return n_jobs if n_jobs and n_jobs > 0 else os.cpu_count() or 1
+
+
+def _fold_metrics(folds: list[tuple[np.ndarray, np.ndarray]], n_splits: int):
+    """mismas metricas y formato que evaluate_model."""
+    mae_scores = [mean_absolute_error(t, p) for t, p in folds]
+    rmse_scores = [mean_squared_error(t, p) ** 0.5 for t, p in folds]
+
+    metrics = {
+        "MAE": round(np.mean(mae_scores), 2),
+        "MAE_std": round(np.std(mae_scores), 2),
+        "RMSE": round(np.mean(rmse_scores), 2),
+        "RMSE_std": round(np.std(rmse_scores), 2),
+    }
+    logger.info("metricas del modelo (%d-fold TSS): %s", n_splits, metrics)
+
+    y_true = np.concatenate([t for t, _ in folds])
+    y_pred = np.concatenate([p for _, p in folds])
+    return metrics, y_true, y_pred
+
+
+def _annotate_spans(spans: dict[str, list[tuple[float, float]]]) -> None:
+    """tiempo de pared de cada parte (corren solapadas) en la etapa "train" abierta."""
+    annotate(
+        **{
+            f"{name}_s": round(max(e for _, e in parts) - min(b for b, _ in parts), 4)
+            for name, parts in spans.items()
+            if parts
+        }
+    )
+
+
+def _native_params(params: dict, nthread: int) -> tuple[dict, int]:
+    """traduce parametros estilo sklearn (MODEL_PARAMS_XGB) a xgb.train."""
+    from xgboost import XGBRegressor
+
+    reg = XGBRegressor(**params)
+    native = {
+        k: v
+        for k, v in reg.get_xgb_params().items()
+        if v is not None and k != "n_jobs"
+    }
+    native["nthread"] = nthread
+    return native, reg.get_num_boosting_rounds()
+
+
+def _as_regressor(booster, params: dict):
+    """envuelve el Booster en un XGBRegressor (para SHAP, permutation y predict)."""
+    from xgboost import XGBRegressor
+
+    model = XGBRegressor(**params)
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+
+def _train_and_evaluate_xgb(X, y, params, splits, budget, fit_final):
+    import xgboost as xgb
+
+    n_tasks = len(splits) + int(fit_final)
+    workers = max(1, min(n_tasks, budget))
+    native, rounds = _native_params(params, nthread=max(1, budget // workers))
+
+    # sketch de cuantiles una sola vez sobre todas las filas
+    full = xgb.QuantileDMatrix(X, y, nthread=budget)
+
+    spans = {"cv": [], "fit": []}
+
+    def run_fold(train_idx, test_idx):
+        start = time.perf_counter()
+        dtrain = xgb.QuantileDMatrix(X.iloc[train_idx], y.iloc[train_idx], ref=full)
+        booster = xgb.train(native, dtrain, num_boost_round=rounds)
+        preds = booster.inplace_predict(X.iloc[test_idx])
+        spans["cv"].append((start, time.perf_counter()))
+        return y.iloc[test_idx].to_numpy(), preds
+
+    def run_final():
+        start = time.perf_counter()
+        booster = xgb.train(native, full, num_boost_round=rounds)
+        spans["fit"].append((start, time.perf_counter()))
+        return booster
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        final = pool.submit(run_final) if fit_final else None
+        fold_futures = [pool.submit(run_fold, tr, te) for tr, te in splits]
+        folds = [f.result() for f in fold_futures]
+        model = _as_regressor(final.result(), params) if final is not None else None
+
+    _annotate_spans(spans)
+    metrics, y_true, y_pred = _fold_metrics(folds, len(splits))
+    return model, metrics, y_true, y_pred
+
+
+def train_and_evaluate(
+    X: pd.DataFrame,
+    y: pd.Series,
+    params: dict | None = None,
+    n_splits: int = 3,
+    n_jobs: int | None = None,
+    fit_final: bool = True,
+    splits: list | None = None,
+):
+    """
+    devuelve (model, metrics, y_true, y_pred) con las mismas metricas que
+    evaluate_model. model es None si fit_final=False. params (estilo
+    MODEL_PARAMS_XGB/MODEL_PARAMS_RF) reemplaza los de settings. splits son
+    folds (train_idx, test_idx) propios en vez del TimeSeriesSplit por fila;
+    y_true/y_pred quedan en el orden de sus test_idx
+    """
+    budget = _thread_budget(n_jobs)
+    params = params or default_model_params()
+    if splits is None:
+        splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+
+    if USE_XGB:
+        return _train_and_evaluate_xgb(X, y, params, splits, budget, fit_final)
+
+    # fallback Random Forest: modelo final y evaluacion en paralelo
+    half = max(1, budget // 2)
+    spans = {"cv": [], "fit": []}
+
+    def run_final():
+        start = time.perf_counter()
+        model = train_temperature_model(X, y, half, params)
+        spans["fit"].append((start, time.perf_counter()))
+        return model
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        final = pool.submit(run_final) if fit_final else None
+        start = time.perf_counter()
+        metrics, y_true, y_pred = evaluate_model(
+            X, y, n_jobs=half, params=params, splits=splits
+        )
+        spans["cv"].append((start, time.perf_counter()))
+        model = final.result() if final is not None else None
+
+    _annotate_spans(spans)
+    return model, metrics, y_true, y_pred
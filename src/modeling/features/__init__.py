@@ -1,3 +1,6 @@
-from src.modeling.features.temporal_features import add_temporal_features
+from src.modeling.features.temporal_features import (
+    add_temporal_features,
+    add_temporal_features_long,
+)
 
-__all__ = ["add_temporal_features"]
+__all__ = ["add_temporal_features", "add_temporal_features_long"]
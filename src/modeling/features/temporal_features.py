@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 FEATURE_LAGS = {
@@ -35,12 +36,118 @@ def add_temporal_features(df: pd.DataFrame) -> tuple[pd.DataFrame, list]:
 
         for window in ROLLING_WINDOWS:
             feature_name = f"{col}_rolling_{window}"
-            df[feature_name] = df[col].rolling(window).mean()
+            rolled = df[col].rolling(window).mean()
+            # rolling siempre devuelve float64; se conserva el esquema compacto
+            if df[col].dtype == "float32":
+                rolled = rolled.astype("float32")
+            df[feature_name] = rolled
             created_features.append(feature_name)
 
-    df["day_of_year"] = df["date"].dt.dayofyear
-    df["month"] = df["date"].dt.month
+    df["day_of_year"] = df["date"].dt.dayofyear.astype("int16")
+    df["month"] = df["date"].dt.month.astype("int8")
 
     created_features.extend(["day_of_year", "month"])
 
     return df, created_features
+
+
+def _group_positions(codes: np.ndarray) -> np.ndarray:
+    """posicion de cada fila dentro de su grupo (codes ordenados por grupo)."""
+    n = len(codes)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    return np.arange(n) - np.repeat(starts, sizes)
+
+
+def _lag(values: np.ndarray, lag: int, position: np.ndarray) -> np.ndarray:
+    out = np.empty_like(values)
+    out[:lag] = np.nan
+    out[lag:] = values[:-lag]
+    # el lag no cruza de una ubicacion a la anterior
+    out[position < lag] = np.nan
+    return out
+
+
+def _rolling_mean(
+    cumsum: np.ndarray, nan_count: np.ndarray, window: int, position: np.ndarray
+) -> np.ndarray:
+    """
+    media movil como rolling(window).mean(): NaN si falta algun valor de la
+    ventana o si la ubicacion aun no tiene `window` filas
+    """
+    total = cumsum[window:] - cumsum[:-window]
+    missing = nan_count[window:] - nan_count[:-window]
+    out = total / window
+    out[(missing > 0) | (position < window - 1)] = np.nan
+    return out
+
+
+def add_temporal_features_long(
+    df: pd.DataFrame, key: str = "location"
+) -> tuple[pd.DataFrame, list]:
+    """
+    add_temporal_features para un frame largo con muchas ubicaciones (key, date):
+    un solo orden por (key, date) y cada lag/ventana es una operacion numpy sobre
+    el array completo (sin groupby ni una copia del frame por feature). los
+    lags y medias moviles no cruzan el borde entre ubicaciones. devuelve el
+    frame ordenado por (key, date) y la misma lista de features
+    """
+    if "date" not in df.columns:
+        raise ValueError("columna 'date' no encontrada en el DataFrame")
+    if key not in df.columns:
+        raise ValueError(f"columna '{key}' no encontrada en el DataFrame")
+
+    codes, _ = pd.factorize(df[key], sort=True)
+    dates = df["date"].to_numpy(dtype="datetime64[ns]")
+    order = np.lexsort((dates, codes))
+    if not (order == np.arange(len(order))).all():
+        df = df.take(order)
+        codes, dates = codes[order], dates[order]
+    df = df.reset_index(drop=True)
+    position = _group_positions(codes)
+
+    new_columns = {}
+    created_features = []
+
+    def column_values(col):
+        # float32 del esquema compacto se conserva (como shift/rolling + astype)
+        dtype = "float32" if df[col].dtype == "float32" else "float64"
+        return df[col].to_numpy(dtype=dtype, na_value=np.nan)
+
+    for col, lags in FEATURE_LAGS.items():
+        if col not in df.columns:
+            continue
+        values = column_values(col)
+        for lag in lags:
+            feature_name = f"{col}_lag_{lag}"
+            new_columns[feature_name] = _lag(values, lag, position)
+            created_features.append(feature_name)
+
+    for col in ROLLING_COLS:
+        if col not in df.columns:
+            continue
+        values = column_values(col)
+        nan_mask = np.isnan(values)
+        # sumas acumuladas (float64) con un cero inicial:
+        # suma de la ventana que termina en i = c[i + 1] - c[i + 1 - w]
+        cumsum = np.r_[0.0, np.cumsum(np.where(nan_mask, 0.0, values), dtype="float64")]
+        nan_count = np.r_[0, np.cumsum(nan_mask)]
+        for window in ROLLING_WINDOWS:
+            feature_name = f"{col}_rolling_{window}"
+            rolled = np.full(len(df), np.nan)
+            rolled[window - 1 :] = _rolling_mean(
+                cumsum, nan_count, window, position[window - 1 :]
+            )
+            new_columns[feature_name] = rolled.astype(values.dtype, copy=False)
+            created_features.append(feature_name)
+
+    calendar = pd.DatetimeIndex(dates)
+    new_columns["day_of_year"] = calendar.dayofyear.to_numpy().astype("int16")
+    new_columns["month"] = calendar.month.to_numpy().astype("int8")
+    created_features.extend(["day_of_year", "month"])
+
+    # todas las columnas nuevas en un solo concat (sin insertar una por una);
+    # las que ya existian se reemplazan, igual que en add_temporal_features
+    df = df.drop(columns=[c for c in new_columns if c in df.columns])
+    df = pd.concat([df, pd.DataFrame(new_columns, index=df.index)], axis=1)
+    return df, created_features
@@ -0,0 +1,223 @@
+"""
+MODELO GLOBAL
+un solo modelo para todas las ubicaciones en vez de uno por ciudad: los datos de
+cada ubicacion se apilan en un frame largo, las features de prepare_training_data
+se calculan en una sola pasada (add_temporal_features_long) y se agregan
+descriptores de la ubicacion (lat/lon, elevacion y climatologia) como features
+constantes. un fit y un artefacto para cientos de
+ubicaciones; el forecast hace un predict por paso para todas juntas
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import TimeSeriesSplit
+
+from src.modeling.engine import train_and_evaluate
+from src.modeling.features import add_temporal_features_long
+from src.modeling.predict import (
+    TARGET,
+    forecast_future_batch,
+    load_model_payload,
+)
+from src.modeling.train import (
+    BASE_FEATURES,
+    save_feature_metadata,
+    save_metrics_json,
+    save_model,
+)
+from src.utils.instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# nombre del "lugar" bajo el que se guardan modelo y metricas (data/_global/)
+GLOBAL_MODEL_NAME = "_global"
+
+DESCRIPTOR_FEATURES = [
+    "latitude",
+    "longitude",
+    "elevation",
+    "clim_temp_mean",
+    "clim_temp_amplitude",
+    "clim_precip_annual",
+]
+
+
+def location_descriptors(
+    df: pd.DataFrame, latitude: float, longitude: float, elevation: float = np.nan
+) -> dict[str, float]:
+    """
+    descriptores de una ubicacion; la climatologia sale de su historial:
+    temperatura media, amplitud estacional (max - min de las medias mensuales)
+    y precipitacion anual media. elevacion NaN (sin dato) queda en 0
+    """
+    dates = pd.to_datetime(df["date"])
+    monthly = df[TARGET].groupby(dates.dt.month).mean()
+    precip = df["precipitation"].mean() if "precipitation" in df.columns else np.nan
+
+    values = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "elevation": elevation,
+        "clim_temp_mean": df[TARGET].mean(),
+        "clim_temp_amplitude": monthly.max() - monthly.min(),
+        "clim_precip_annual": precip * 365.25,
+    }
+    return {k: round(float(np.nan_to_num(v)), 4) for k, v in values.items()}
+
+
+def add_descriptors(df: pd.DataFrame, descriptors: dict[str, float]) -> pd.DataFrame:
+    """columnas constantes float32 con los descriptores de la ubicacion."""
+    return df.assign(
+        **{c: np.float32(descriptors[c]) for c in DESCRIPTOR_FEATURES}
+    )
+
+
+def build_global_frame(histories: dict[str, pd.DataFrame], catalog):
+    """
+    frame largo de entrenamiento: X, y, la ubicacion y la fecha de cada fila, las
+    features y los descriptores por ubicacion. las filas quedan ordenadas por
+    fecha (estable) para que los folds de date_splits sean temporales
+    """
+    if not histories:
+        raise ValueError("no hay ubicaciones con datos para el modelo global")
+
+    # solo las features base que existen en todas las ubicaciones
+    base = [
+        c for c in BASE_FEATURES if all(c in df.columns for df in histories.values())
+    ]
+    if not base:
+        raise ValueError("no hay features base disponibles para entrenar el modelo")
+    columns = list(dict.fromkeys(["date", TARGET, *base]))
+
+    # un frame largo y todas las features temporales en una pasada vectorizada
+    long = pd.concat(
+        [df[columns].assign(location=name) for name, df in histories.items()],
+        ignore_index=True,
+    )
+    long["date"] = pd.to_datetime(long["date"], errors="coerce")
+    long, temporal_features = add_temporal_features_long(long, key="location")
+    features = base + temporal_features
+    long = long.dropna(subset=[TARGET, *features])
+
+    present = set(long["location"].unique())
+    descriptors = {}
+    for name in histories:
+        if name not in present:
+            logger.warning("sin filas completas para %s, se omite del modelo global", name)
+            continue
+        lat, lon = catalog[name]
+        descriptors[name] = location_descriptors(
+            histories[name], lat, lon, catalog.elevation(name)
+        )
+    if not descriptors:
+        raise ValueError("ninguna ubicacion tiene filas completas para entrenar")
+
+    for col in DESCRIPTOR_FEATURES:
+        values = {name: d[col] for name, d in descriptors.items()}
+        long[col] = long["location"].map(values).astype("float32")
+    features = features + DESCRIPTOR_FEATURES
+
+    order = np.argsort(long["date"].to_numpy(), kind="stable")
+    long = long.iloc[order].reset_index(drop=True)
+
+    X = long[features].fillna(0)
+    return X, long[TARGET], long["location"], long["date"], features, descriptors
+
+
+def date_splits(dates: pd.Series, n_splits: int = 3) -> list:
+    """
+    folds de TimeSeriesSplit sobre las fechas unicas, mapeados a filas: un
+    corte nunca separa ubicaciones del mismo dia (dates ordenadas)
+    """
+    unique, codes = np.unique(dates.to_numpy(), return_inverse=True)
+    splits = []
+    for train_days, test_days in TimeSeriesSplit(n_splits=n_splits).split(unique):
+        train_idx = np.flatnonzero(codes <= train_days[-1])
+        test_idx = np.flatnonzero((codes >= test_days[0]) & (codes <= test_days[-1]))
+        splits.append((train_idx, test_idx))
+    return splits
+
+
+def mae_by_location(locations: pd.Series, splits: list, y_true, y_pred) -> dict:
+    """MAE de cada ubicacion en cada fold de test, promediado entre folds."""
+    errors = np.abs(np.asarray(y_true) - np.asarray(y_pred))
+    per_fold = []
+    offset = 0
+    for _, test_idx in splits:
+        fold = pd.Series(
+            errors[offset : offset + len(test_idx)],
+            index=locations.iloc[test_idx].to_numpy(),
+        )
+        per_fold.append(fold.groupby(level=0).mean())
+        offset += len(test_idx)
+    by_location = pd.concat(per_fold).groupby(level=0).mean()
+    return by_location.round(2).to_dict()
+
+
+def train_global_model(
+    histories: dict[str, pd.DataFrame],
+    catalog,
+    n_jobs: int | None = None,
+    params: dict | None = None,
+):
+    """entrena y guarda el modelo global; devuelve (metrics, files)."""
+    with stage("features", GLOBAL_MODEL_NAME, locations=len(histories)) as record:
+        X, y, locations, dates, features, descriptors = build_global_frame(
+            histories, catalog
+        )
+        record["rows"] = len(X)
+
+    # folds cortados en cambios de fecha: sin filas del mismo dia a ambos lados
+    splits = date_splits(dates)
+    with stage("train", GLOBAL_MODEL_NAME, rows=len(X)):
+        model, metrics, y_true, y_pred = train_and_evaluate(
+            X, y, params=params, n_jobs=n_jobs, splits=splits
+        )
+
+    metrics["MAE_by_location"] = mae_by_location(locations, splits, y_true, y_pred)
+    metrics["locations"] = len(descriptors)
+
+    files = [
+        save_model(
+            GLOBAL_MODEL_NAME,
+            model,
+            features,
+            metadata={"global": True, "descriptors": descriptors},
+        ),
+        save_feature_metadata(GLOBAL_MODEL_NAME, features),
+        save_metrics_json(GLOBAL_MODEL_NAME, metrics),
+    ]
+    logger.info(
+        "modelo global: %d ubicaciones, %d filas, MAE %.2f",
+        len(descriptors),
+        len(X),
+        metrics["MAE"],
+    )
+    return metrics, files
+
+
+def load_global_payload() -> dict:
+    return load_model_payload(GLOBAL_MODEL_NAME)
+
+
+def forecast_global(
+    model_payload: dict,
+    histories: dict[str, pd.DataFrame],
+    catalog,
+    days_ahead: int = 3,
+) -> dict[str, pd.DataFrame]:
+    """
+    forecast de todas las ubicaciones con el modelo global; las que no estaban
+    en el entrenamiento usan descriptores calculados de su historial
+    """
+    known = model_payload.get("descriptors", {})
+    prepared = {}
+    for name, df in histories.items():
+        descriptors = known.get(name)
+        if descriptors is None:
+            lat, lon = catalog[name]
+            descriptors = location_descriptors(df, lat, lon, catalog.elevation(name))
+        prepared[name] = add_descriptors(df, descriptors)
+    return forecast_future_batch(model_payload, prepared, days_ahead=days_ahead)
@@ -1,7 +1,7 @@
 import json
 import logging
+from pathlib import Path
 
-import joblib
 import numpy as np
 import pandas as pd
 
@@ -18,19 +18,33 @@ logger = logging.getLogger(__name__)
 TARGET = "temp_avg"
 
 
-def load_model(city_name: str):
+def model_path(city_name: str) -> Path:
     folder = get_city_path(city_name, "models")
-    path = folder / f"{city_slug(city_name)}_temp_model.pkl"
+    return folder / f"{city_slug(city_name)}_temp_model.pkl"
+
+
+def load_model_payload(city_name: str) -> dict:
+    """payload completo del modelo: model, features, strategy y horizons."""
+    path = model_path(city_name)
 
     if not path.exists():
         raise FileNotFoundError(f"no se encontro modelo para {city_name} en {path}")
 
+    import joblib
+
     payload = joblib.load(path)
-    if isinstance(payload, dict) and "model" in payload:
-        return payload["model"]
+    if not (isinstance(payload, dict) and "model" in payload):
+        payload = {"model": payload}
+    if "features" not in payload:
+        payload["features"] = load_features(city_name)
+    payload.setdefault("strategy", "recursive")
     return payload
 
 
+def load_model(city_name: str):
+    return load_model_payload(city_name)["model"]
+
+
 def load_features(city_name: str) -> list[str]:
     folder = get_city_path(city_name, "results")
     path = folder / f"{city_slug(city_name)}_features.json"
@@ -42,60 +56,179 @@ def load_features(city_name: str) -> list[str]:
         return json.load(f)["features"]
 
 
+# tipos de feature dentro del plan compilado
+_BASE, _LAG, _ROLLING, _DAY_OF_YEAR, _MONTH = range(5)
+
+
+class FeaturePlan:
+    """
+    plan compilado de la lista de features: para cada una guarda su tipo,
+    la columna del historial de la que depende y el lag/ventana. se compila
+    una vez por modelo en vez de comparar nombres en cada paso del forecast
+    """
+
+    def __init__(self, feature_names: list[str]):
+        lag_specs = {
+            f"{col}_lag_{lag}": (col, lag)
+            for col, lags in FEATURE_LAGS.items()
+            for lag in lags
+        }
+        rolling_specs = {
+            f"{col}_rolling_{w}": (col, w)
+            for col in ROLLING_COLS
+            for w in ROLLING_WINDOWS
+        }
+
+        self.features = list(feature_names)
+        self.kinds = []
+        self.sources = []
+        self.params = []
+
+        for feat in self.features:
+            if feat == "day_of_year":
+                kind, source, param = _DAY_OF_YEAR, None, 0
+            elif feat == "month":
+                kind, source, param = _MONTH, None, 0
+            elif feat in lag_specs:
+                kind, (source, param) = _LAG, lag_specs[feat]
+            elif feat in rolling_specs:
+                kind, (source, param) = _ROLLING, rolling_specs[feat]
+            else:
+                kind, source, param = _BASE, feat, 0
+            self.kinds.append(kind)
+            self.sources.append(source)
+            self.params.append(param)
+
+        # features base: se arrastra su ultimo valor conocido en cada paso
+        self.base_features = [
+            f for f, k in zip(self.features, self.kinds) if k == _BASE
+        ]
+        # columnas del historial que el forecast necesita mantener
+        self.columns = list(
+            dict.fromkeys([TARGET] + [s for s in self.sources if s is not None])
+        )
+        # filas de historial necesarias: el mayor lag o ventana
+        self.depth = max(
+            [1] + [p for k, p in zip(self.kinds, self.params) if k in (_LAG, _ROLLING)]
+        )
+
+
+def compile_feature_plan(feature_names: list[str]) -> FeaturePlan:
+    return FeaturePlan(feature_names)
+
+
+def _nanmean(values: np.ndarray) -> float:
+    valid = values[~np.isnan(values)]
+    return float(valid.mean()) if len(valid) else np.nan
+
+
+class _HistoryBuffer:
+    """ring buffer numpy con las ultimas `size` filas del historial."""
+
+    def __init__(self, values: np.ndarray, size: int):
+        self.size = size
+        self.data = np.full((size, values.shape[1]), np.nan)
+        self.data[: len(values)] = values
+        self.count = len(values)
+        self.pos = len(values) % size
+
+    def append(self, row: np.ndarray) -> None:
+        self.data[self.pos] = row
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+
+    def recent(self, col: int, n: int) -> np.ndarray:
+        """ultimos n valores de la columna (n <= size)."""
+        idx = (self.pos - np.arange(1, n + 1)) % self.size
+        return self.data[idx, col]
+
+    def column_mean(self, col: int) -> float:
+        # solo se usa con count < size, cuando todo el historial cabe en el buffer
+        return _nanmean(self.data[: self.count, col])
+
+
 def _build_feature_vector(
-    history: pd.DataFrame,
-    feature_names: list[str],
+    plan: FeaturePlan,
+    buffer: _HistoryBuffer,
+    col_index: dict[str, int],
     date: pd.Timestamp,
-) -> pd.Series:
-    vector = {}
+) -> np.ndarray:
+    vector = np.zeros(len(plan.features))
+
+    for i, (kind, source, param) in enumerate(
+        zip(plan.kinds, plan.sources, plan.params)
+    ):
+        if kind == _DAY_OF_YEAR:
+            vector[i] = date.dayofyear
+        elif kind == _MONTH:
+            vector[i] = date.month
+        elif source not in col_index:
+            # feature base ausente del historial
+            vector[i] = 0.0
+        elif kind == _BASE:
+            vector[i] = buffer.recent(col_index[source], 1)[0]
+        elif buffer.count < param:
+            # historial mas corto que el lag/ventana: media de la columna
+            vector[i] = buffer.column_mean(col_index[source])
+        elif kind == _LAG:
+            vector[i] = buffer.recent(col_index[source], param)[-1]
+        else:
+            vector[i] = _nanmean(buffer.recent(col_index[source], param))
 
-    for feat in feature_names:
-        if feat == "day_of_year":
-            vector[feat] = date.dayofyear
-            continue
-        if feat == "month":
-            vector[feat] = date.month
-            continue
+    return vector
 
-        # lags
-        is_lag = False
-        for col, lags in FEATURE_LAGS.items():
-            for lag in lags:
-                if feat == f"{col}_lag_{lag}":
-                    if len(history) >= lag:
-                        vector[feat] = history[col].iloc[-lag]
-                    else:
-                        vector[feat] = history[col].mean()
-                    is_lag = True
-                    break
-            if is_lag:
-                break
-        if is_lag:
-            continue
 
-        # rolling
-        is_rolling = False
-        for col in ROLLING_COLS:
-            for window in ROLLING_WINDOWS:
-                if feat == f"{col}_rolling_{window}":
-                    if len(history) >= window:
-                        vector[feat] = history[col].tail(window).mean()
-                    else:
-                        vector[feat] = history[col].mean()
-                    is_rolling = True
-                    break
-            if is_rolling:
-                break
-        if is_rolling:
-            continue
+def _init_history(plan: FeaturePlan, recent_data: pd.DataFrame):
+    """carga en el ring buffer las ultimas filas del historial ordenado por fecha."""
+    dates = recent_data["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    last_date = dates.max()
 
-        # features base: usar ultimo valor conocido
-        if feat in history.columns:
-            vector[feat] = history[feat].iloc[-1]
-        else:
-            vector[feat] = 0.0
+    history = recent_data
+    if not dates.is_monotonic_increasing:
+        history = recent_data.iloc[np.argsort(dates.to_numpy(), kind="stable")]
 
-    return pd.Series(vector)
+    # columnas mantenidas en el buffer: las del plan mas temp_max/temp_min
+    columns = [
+        c
+        for c in dict.fromkeys(plan.columns + ["temp_max", "temp_min"])
+        if c in recent_data.columns
+    ]
+    col_index = {c: i for i, c in enumerate(columns)}
+    buffer = _HistoryBuffer(
+        history[columns].tail(plan.depth).to_numpy(dtype=float), size=plan.depth
+    )
+    return buffer, columns, col_index, last_date
+
+
+def _forecast_direct(
+    model_payload: dict,
+    plan: FeaturePlan,
+    buffer: _HistoryBuffer,
+    col_index: dict[str, int],
+    last_date: pd.Timestamp,
+    days_ahead: int,
+) -> pd.DataFrame:
+    """un modelo por horizonte: todas las predicciones salen de un solo predict."""
+    horizons = model_payload["horizons"]
+    if days_ahead > horizons:
+        raise ValueError(
+            f"el modelo directo cubre {horizons} dias; se pidieron {days_ahead}"
+        )
+
+    x_vec = _build_feature_vector(
+        plan, buffer, col_index, last_date + pd.Timedelta(days=1)
+    )
+    x_frame = pd.DataFrame([x_vec], columns=plan.features)
+    preds = np.atleast_1d(model_payload["model"].predict(x_frame)[0])
+
+    return pd.DataFrame(
+        {
+            "date": [last_date + pd.Timedelta(days=h) for h in range(1, days_ahead + 1)],
+            "predicted_temp_avg": [round(float(p), 2) for p in preds[:days_ahead]],
+        }
+    )
 
 
 def forecast_future(
@@ -111,59 +244,124 @@ def forecast_future(
     3. Agrega la prediccion al historial
     4. Reconstruye lags/rolling para t+2
     5. Repite
+
+    el historial vive en un ring buffer con las ultimas max(lag, ventana)
+    filas, asi el costo por paso no depende del largo del historial.
+    con strategy="direct" en el payload se usa un modelo por horizonte
     """
     model = model_payload["model"]
     features = model_payload["features"]
+    plan = model_payload.get("plan") or compile_feature_plan(features)
 
-    required_base = [
-        c
-        for c in features
-        if c
-        not in (
-            [f"{col}_lag_{lag}" for col, lags in FEATURE_LAGS.items() for lag in lags]
-            + [f"{col}_rolling_{w}" for col in ROLLING_COLS for w in ROLLING_WINDOWS]
-            + ["day_of_year", "month"]
-        )
-    ]
-
-    missing = [c for c in required_base if c not in recent_data.columns]
+    missing = [c for c in plan.base_features if c not in recent_data.columns]
     if missing:
         raise ValueError(f"features base faltantes en recent_data: {missing}")
 
-    df = recent_data.copy()
-    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
-        df["date"] = pd.to_datetime(df["date"])
+    buffer, columns, col_index, last_date = _init_history(plan, recent_data)
+
+    if model_payload.get("strategy") == "direct":
+        return _forecast_direct(
+            model_payload, plan, buffer, col_index, last_date, days_ahead
+        )
 
-    last_date = df["date"].max()
+    # en cada paso se arrastran las features base y temp_max/temp_min
+    carried = [
+        col_index[c]
+        for c in dict.fromkeys(plan.base_features + ["temp_max", "temp_min"])
+        if c in col_index
+    ]
+    target_idx = col_index.get(TARGET)
+    x_frame = pd.DataFrame(np.zeros((1, len(features))), columns=features)
 
     predictions = []
 
     for step in range(1, days_ahead + 1):
         future_date = last_date + pd.Timedelta(days=step)
 
-        x_vec = _build_feature_vector(df, features, future_date)
-        pred = model.predict(pd.DataFrame([x_vec]))[0]
+        x_frame.iloc[0] = _build_feature_vector(plan, buffer, col_index, future_date)
+        pred = model.predict(x_frame)[0]
 
         predictions.append(
             {"date": future_date, "predicted_temp_avg": round(float(pred), 2)}
         )
 
-        new_row = {
-            "date": future_date,
-            TARGET: pred,
-        }
-        for col in required_base:
-            new_row[col] = df[col].iloc[-1]
-        if "temp_max" in df.columns:
-            new_row["temp_max"] = df["temp_max"].iloc[-1]
-        if "temp_min" in df.columns:
-            new_row["temp_min"] = df["temp_min"].iloc[-1]
-
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+        new_row = np.full(len(columns), np.nan)
+        last_row = buffer.data[(buffer.pos - 1) % buffer.size]
+        new_row[carried] = last_row[carried]
+        if target_idx is not None:
+            new_row[target_idx] = pred
+        buffer.append(new_row)
 
     return pd.DataFrame(predictions)
 
 
+def forecast_future_batch(
+    model_payload: dict,
+    histories: dict[str, pd.DataFrame],
+    days_ahead: int = 3,
+) -> dict[str, pd.DataFrame]:
+    """
+    forecast recursivo de varias ubicaciones con un mismo modelo (p.ej. el
+    modelo global): en cada paso se arma una fila por ubicacion y se hace un
+    solo predict para todas, en vez de uno por ubicacion y paso. las
+    ubicaciones a las que les faltan features base se registran y se omiten;
+    el resultado trae solo las demas
+    """
+    if model_payload.get("strategy") == "direct":
+        raise ValueError("forecast_future_batch solo soporta strategy='recursive'")
+    if not histories:
+        return {}
+
+    model = model_payload["model"]
+    features = model_payload["features"]
+    plan = model_payload.get("plan") or compile_feature_plan(features)
+
+    states = {}
+    for name, recent_data in histories.items():
+        missing = [c for c in plan.base_features if c not in recent_data.columns]
+        if missing:
+            logger.error("features base faltantes para %s, se omite: %s", name, missing)
+            continue
+        buffer, columns, col_index, last_date = _init_history(plan, recent_data)
+        carried = [
+            col_index[c]
+            for c in dict.fromkeys(plan.base_features + ["temp_max", "temp_min"])
+            if c in col_index
+        ]
+        states[name] = (buffer, columns, col_index, last_date, carried)
+    if not states:
+        return {}
+
+    names = list(states)
+    predictions = {name: [] for name in names}
+    x_matrix = np.zeros((len(names), len(features)))
+
+    for step in range(1, days_ahead + 1):
+        for row, name in enumerate(names):
+            buffer, _, col_index, last_date, _ = states[name]
+            x_matrix[row] = _build_feature_vector(
+                plan, buffer, col_index, last_date + pd.Timedelta(days=step)
+            )
+        preds = model.predict(pd.DataFrame(x_matrix, columns=features))
+
+        for name, pred in zip(names, preds):
+            buffer, columns, col_index, last_date, carried = states[name]
+            predictions[name].append(
+                {
+                    "date": last_date + pd.Timedelta(days=step),
+                    "predicted_temp_avg": round(float(pred), 2),
+                }
+            )
+            new_row = np.full(len(columns), np.nan)
+            last_row = buffer.data[(buffer.pos - 1) % buffer.size]
+            new_row[carried] = last_row[carried]
+            if TARGET in col_index:
+                new_row[col_index[TARGET]] = pred
+            buffer.append(new_row)
+
+    return {name: pd.DataFrame(rows) for name, rows in predictions.items()}
+
+
 def save_forecast(city_name: str, forecast_df: pd.DataFrame, metrics: dict | None = None) -> str:
     folder = get_city_path(city_name, "results")
 
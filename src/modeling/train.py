@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 
 import joblib
 import numpy as np
@@ -7,6 +8,7 @@ import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 from sklearn.model_selection import TimeSeriesSplit
+from sklearn.multioutput import MultiOutputRegressor
 
 from src.config.settings import MODEL_PARAMS_RF, MODEL_PARAMS_XGB
 from src.modeling.features import add_temporal_features
@@ -24,8 +26,25 @@ except ImportError:
     USE_XGB = False
 
 
-def prepare_training_data(df: pd.DataFrame):
-    """prepara features (X) y target (y) para el entrenamiento."""
+BASE_FEATURES = [
+    "precipitation",
+    "windspeed_10m_max",
+    "shortwave_radiation_sum",
+    "et0_fao_evapotranspiration",
+    "humidity_avg",
+    "dew_point_avg",
+    "cloud_cover_mean",
+    "temp_range",
+    # intra-diarias: solo existen si los datos vienen de la ingesta horaria
+    "precip_hours",
+    "temp_max_hour",
+    "temp_change_max",
+    "pressure_tendency",
+]
+
+
+def training_frame(df: pd.DataFrame) -> tuple[pd.DataFrame, list]:
+    """filas completas (ordenadas por fecha, con features temporales) y columnas de X."""
     if df.empty:
         raise ValueError("el DF para entrenamiento esta vacio")
 
@@ -35,18 +54,7 @@ def prepare_training_data(df: pd.DataFrame):
 
     df = df.sort_values("date")
 
-    base_features = [
-        "precipitation",
-        "windspeed_10m_max",
-        "shortwave_radiation_sum",
-        "et0_fao_evapotranspiration",
-        "humidity_avg",
-        "dew_point_avg",
-        "cloud_cover_mean",
-        "temp_range",
-    ]
-
-    available_base_features = [c for c in base_features if c in df.columns]
+    available_base_features = [c for c in BASE_FEATURES if c in df.columns]
 
     if not available_base_features:
         raise ValueError("no hay features base disponibles para entrenar el modelo")
@@ -55,7 +63,12 @@ def prepare_training_data(df: pd.DataFrame):
 
     df = df.dropna().reset_index(drop=True)
 
-    feature_columns = available_base_features + temporal_features
+    return df, available_base_features + temporal_features
+
+
+def prepare_training_data(df: pd.DataFrame):
+    """prepara features (X) y target (y) para el entrenamiento."""
+    df, feature_columns = training_frame(df)
 
     x = df[feature_columns].fillna(0)
     y = df["temp_avg"]
@@ -63,23 +76,74 @@ def prepare_training_data(df: pd.DataFrame):
     return x, y, feature_columns
 
 
-def _make_model():
-    if USE_XGB:
-        return XGBRegressor(**MODEL_PARAMS_XGB)
-    return RandomForestRegressor(**MODEL_PARAMS_RF)
-
+def prepare_direct_training_data(df: pd.DataFrame, horizons: int):
+    """
+    X igual que prepare_training_data y un target por horizonte: la fila del dia d
+    (lags hasta d-1) apunta a temp_avg de d+h-1, igual que el paso h del forecast.
+    los targets se buscan por fecha (dropna deja huecos en las filas); las filas
+    sin alguno de sus dias futuros se descartan
+    """
+    df, feature_columns = training_frame(df)
+    x = df[feature_columns].fillna(0)
 
-def evaluate_model(X, y):
-    tscv = TimeSeriesSplit(n_splits=3)
+    dates = pd.DatetimeIndex(df["date"])
+    by_date = pd.Series(df["temp_avg"].to_numpy(), index=dates)
+    by_date = by_date[~by_date.index.duplicated(keep="last")]
+    targets = pd.DataFrame(
+        {
+            f"temp_avg_h{h}": by_date.reindex(
+                dates + pd.Timedelta(days=h - 1)
+            ).to_numpy()
+            for h in range(1, horizons + 1)
+        }
+    )
+    valid = targets.notna().all(axis=1)
+    if not valid.any():
+        raise ValueError(f"no hay suficientes filas para {horizons} horizontes")
+
+    return (
+        x[valid].reset_index(drop=True),
+        targets[valid].reset_index(drop=True),
+        feature_columns,
+    )
+
+
+def default_model_params() -> dict:
+    return MODEL_PARAMS_XGB if USE_XGB else MODEL_PARAMS_RF
+
+
+def _make_model(n_jobs: int | None = None, params: dict | None = None):
+    """
+    n_jobs limita los hilos del modelo (None = valor por defecto de la libreria).
+    params reemplaza MODEL_PARAMS_XGB/MODEL_PARAMS_RF (p.ej. los del tuning)
+    """
+    params = params or default_model_params()
+    if USE_XGB:
+        return XGBRegressor(**params, n_jobs=n_jobs)
+    return RandomForestRegressor(**params, n_jobs=n_jobs)
+
+
+def evaluate_model(
+    X,
+    y,
+    n_jobs: int | None = None,
+    n_splits: int = 3,
+    params: dict | None = None,
+    splits: list | None = None,
+):
+    """splits: folds (train_idx, test_idx) propios; None = TimeSeriesSplit por fila."""
+    if splits is None:
+        splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    n_splits = len(splits)
 
     mae_scores, rmse_scores = [], []
     all_y_true, all_y_pred = [], []
 
-    for train_idx, test_idx in tscv.split(X):
+    for train_idx, test_idx in splits:
         X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
         y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
 
-        fold_model = _make_model()
+        fold_model = _make_model(n_jobs, params)
         fold_model.fit(X_train, y_train)
         preds = fold_model.predict(X_test)
 
@@ -94,19 +158,82 @@ def evaluate_model(X, y):
         "RMSE": round(np.mean(rmse_scores), 2),
         "RMSE_std": round(np.std(rmse_scores), 2),
     }
-    logger.info("metricas del modelo (3-fold TSS): %s", metrics)
+    logger.info("metricas del modelo (%d-fold TSS): %s", n_splits, metrics)
 
     return metrics, np.array(all_y_true), np.array(all_y_pred)
 
 
-def train_temperature_model(X, y):
-    model = _make_model()
+def train_temperature_model(
+    X, y, n_jobs: int | None = None, params: dict | None = None
+):
+    model = _make_model(n_jobs, params)
     model.fit(X, y)
     return model
 
 
-def save_model(city_name: str, model, features: list) -> str:
-    """guardar el modelo entrenado y los nombres de las features."""
+def _make_direct_model(
+    horizons: int, n_jobs: int | None = None, params: dict | None = None
+):
+    """un estimador por horizonte, entrenados en paralelo por MultiOutputRegressor."""
+    total = n_jobs or os.cpu_count() or 1
+    outer = max(1, min(horizons, total))
+    return MultiOutputRegressor(
+        _make_model(max(1, total // outer), params), n_jobs=outer
+    )
+
+
+def train_direct_model(X, Y, n_jobs: int | None = None, params: dict | None = None):
+    model = _make_direct_model(Y.shape[1], n_jobs, params)
+    model.fit(X, Y)
+    return model
+
+
+def evaluate_direct_model(
+    X, Y, n_jobs: int | None = None, params: dict | None = None
+):
+    """
+    mismo TimeSeriesSplit de 3 folds que evaluate_model: MAE/RMSE sobre todos
+    los horizontes y MAE_by_horizon. devuelve (metrics, Y_true, Y_pred) con una
+    columna por horizonte
+    """
+    tscv = TimeSeriesSplit(n_splits=3)
+    errors, mae_scores, rmse_scores = [], [], []
+    all_y_true, all_y_pred = [], []
+
+    for train_idx, test_idx in tscv.split(X):
+        fold_model = _make_direct_model(Y.shape[1], n_jobs, params)
+        fold_model.fit(X.iloc[train_idx], Y.iloc[train_idx])
+        preds = fold_model.predict(X.iloc[test_idx])
+        residuals = Y.iloc[test_idx].to_numpy() - preds
+        errors.append(np.abs(residuals).mean(axis=0))
+        mae_scores.append(np.abs(residuals).mean())
+        rmse_scores.append(np.sqrt((residuals**2).mean()))
+        all_y_true.append(Y.iloc[test_idx].to_numpy())
+        all_y_pred.append(preds)
+
+    mae = np.mean(errors, axis=0)
+    metrics = {
+        "MAE": round(float(np.mean(mae_scores)), 2),
+        "MAE_std": round(float(np.std(mae_scores)), 2),
+        "RMSE": round(float(np.mean(rmse_scores)), 2),
+        "RMSE_std": round(float(np.std(rmse_scores)), 2),
+        "MAE_by_horizon": {
+            f"h{h}": round(float(v), 2) for h, v in enumerate(mae, start=1)
+        },
+    }
+    logger.info("metricas del modelo directo (3-fold TSS): %s", metrics)
+    return metrics, np.vstack(all_y_true), np.vstack(all_y_pred)
+
+
+def save_model(
+    city_name: str,
+    model,
+    features: list,
+    strategy: str = "recursive",
+    horizons: int | None = None,
+    metadata: dict | None = None,
+) -> str:
+    """guardar el modelo entrenado y los nombres de las features (metadata extra al payload)."""
     folder = get_city_path(city_name, "models")
     path = folder / f"{city_slug(city_name)}_temp_model.pkl"
 
@@ -114,6 +241,9 @@ def save_model(city_name: str, model, features: list) -> str:
         "model": model,
         "features": features,
         "model_type": "xgboost" if USE_XGB else "random_forest",
+        "strategy": strategy,
+        "horizons": horizons,
+        **(metadata or {}),
     }
 
     joblib.dump(payload, path)
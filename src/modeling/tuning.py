@@ -0,0 +1,224 @@
+"""
+BUSQUEDA DE HIPERPARAMETROS
+successive halving con n_estimators como recurso: todos los candidatos se
+evaluan con pocos arboles y solo el mejor 1/factor sube al siguiente escalon.
+cada trial usa el mismo protocolo TimeSeriesSplit que evaluate_model y corre
+en paralelo con un hilo por trial. los trials terminados se guardan por ciudad
+con una clave (datos, parametros, modelo, folds), asi una busqueda repetida
+sobre datos sin cambios no reentrena nada
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import (
+    TUNING_HALVING_FACTOR,
+    TUNING_MAX_ESTIMATORS,
+    TUNING_MIN_ESTIMATORS,
+    TUNING_N_CANDIDATES,
+    TUNING_SEED,
+    TUNING_SPACE_RF,
+    TUNING_SPACE_XGB,
+)
+from src.modeling.engine import train_and_evaluate
+from src.modeling.train import USE_XGB, default_model_params
+from src.utils.paths import city_slug, get_city_path
+from src.utils.serializer import NumpyEncoder
+
+logger = logging.getLogger(__name__)
+
+MODEL_TYPE = "xgboost" if USE_XGB else "random_forest"
+
+
+def _trials_path(city_name: str):
+    return get_city_path(city_name, "results") / f"{city_slug(city_name)}_tuning_trials.json"
+
+
+def _best_params_path(city_name: str):
+    return get_city_path(city_name, "results") / f"{city_slug(city_name)}_best_params.json"
+
+
+def data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    h = hashlib.sha256()
+    h.update(",".join(map(str, X.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def trial_key(data_hash: str, params: dict, n_splits: int) -> str:
+    raw = json.dumps(
+        {"data": data_hash, "params": params, "model": MODEL_TYPE, "n_splits": n_splits},
+        sort_keys=True,
+        cls=NumpyEncoder,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_trials(city_name: str) -> dict:
+    path = _trials_path(city_name)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("cache de trials ilegible (%s), se ignora: %s", path, e)
+        return {}
+
+
+def save_trials(city_name: str, trials: dict) -> None:
+    path = _trials_path(city_name)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(trials, f, indent=2, cls=NumpyEncoder)
+    os.replace(tmp, path)
+
+
+def sample_candidates(
+    space: dict, base: dict, n_candidates: int, seed: int = TUNING_SEED
+) -> list[dict]:
+    """muestra sin repeticion de la grilla; el primer candidato es siempre base."""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    rng = random.Random(seed)
+    picked = rng.sample(grid, min(len(grid), max(0, n_candidates - 1)))
+
+    candidates = [dict(base)]
+    for combo in picked:
+        params = {**base, **combo}
+        if params not in candidates:
+            candidates.append(params)
+    return candidates
+
+
+def halving_rungs(min_resource: int, max_resource: int, factor: int) -> list[int]:
+    """recursos por escalon: min, min*factor, ... y el ultimo siempre max."""
+    rungs = []
+    resource = min_resource
+    while resource < max_resource:
+        rungs.append(resource)
+        resource *= factor
+    rungs.append(max_resource)
+    return rungs
+
+
+def _score(X, y, params: dict, n_splits: int) -> float:
+    """MAE sin redondear de los folds concatenados (folds de igual tamaño)."""
+    _, _, y_true, y_pred = train_and_evaluate(
+        X, y, params=params, n_splits=n_splits, n_jobs=1, fit_final=False
+    )
+    return float(np.mean(np.abs(y_true - y_pred)))
+
+
+def tune_hyperparameters(
+    city_name: str,
+    X: pd.DataFrame,
+    y: pd.Series,
+    n_candidates: int = TUNING_N_CANDIDATES,
+    n_jobs: int | None = None,
+    n_splits: int = 3,
+    min_resource: int = TUNING_MIN_ESTIMATORS,
+    max_resource: int = TUNING_MAX_ESTIMATORS,
+    factor: int = TUNING_HALVING_FACTOR,
+    seed: int = TUNING_SEED,
+) -> dict:
+    """devuelve y guarda {params, MAE, default_MAE, ...} del mejor candidato."""
+    base = default_model_params()
+    space = TUNING_SPACE_XGB if USE_XGB else TUNING_SPACE_RF
+    data_hash = data_fingerprint(X, y)
+    workers = n_jobs if n_jobs and n_jobs > 0 else os.cpu_count() or 1
+
+    trials = load_trials(city_name)
+    stats = {"evaluated": 0, "cached": 0}
+
+    def evaluate_all(param_list: list[dict]) -> list[float]:
+        keys = [trial_key(data_hash, p, n_splits) for p in param_list]
+        pending = [(k, p) for k, p in zip(keys, param_list) if k not in trials]
+        stats["cached"] += len(param_list) - len(pending)
+        stats["evaluated"] += len(pending)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                scores = pool.map(lambda kp: _score(X, y, kp[1], n_splits), pending)
+                for (key, params), score in zip(pending, scores):
+                    trials[key] = {"params": params, "MAE": score}
+            # se persiste por escalon: una busqueda interrumpida no pierde trabajo
+            save_trials(city_name, trials)
+        return [trials[k]["MAE"] for k in keys]
+
+    candidates = sample_candidates(space, base, n_candidates, seed)
+    rungs = halving_rungs(min_resource, max_resource, factor)
+
+    for i, resource in enumerate(rungs):
+        params_list = [{**c, "n_estimators": resource} for c in candidates]
+        scores = evaluate_all(params_list)
+        order = np.argsort(scores, kind="stable")
+        logger.info(
+            "%s escalon %d/%d: %d candidatos x %d arboles, mejor MAE %.3f",
+            city_name,
+            i + 1,
+            len(rungs),
+            len(candidates),
+            resource,
+            scores[order[0]],
+        )
+        if i < len(rungs) - 1:
+            keep = max(1, len(candidates) // factor)
+            candidates = [candidates[j] for j in order[:keep]]
+
+    best_params = params_list[order[0]]
+    best_mae = scores[order[0]]
+    default_mae = evaluate_all([base])[0]
+
+    # si ninguno supera a settings se conservan los parametros por defecto
+    if default_mae <= best_mae:
+        best_params, best_mae = dict(base), default_mae
+
+    result = {
+        "model_type": MODEL_TYPE,
+        "params": best_params,
+        "MAE": round(best_mae, 4),
+        "default_MAE": round(default_mae, 4),
+        "n_splits": n_splits,
+        "data_hash": data_hash,
+        "trials_evaluated": stats["evaluated"],
+        "trials_cached": stats["cached"],
+    }
+
+    with open(_best_params_path(city_name), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=4, cls=NumpyEncoder)
+    logger.info(
+        "%s: MAE %.3f (settings %.3f), %d trials nuevos, %d desde cache",
+        city_name,
+        best_mae,
+        default_mae,
+        stats["evaluated"],
+        stats["cached"],
+    )
+    return result
+
+
+def load_best_params(city_name: str) -> dict | None:
+    """parametros de `tune` para la ciudad, si existen y son del backend actual."""
+    path = _best_params_path(city_name)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        result = json.load(f)
+    if result.get("model_type") != MODEL_TYPE:
+        logger.warning(
+            "parametros de tuning de %s son para %s, se usan los de settings",
+            city_name,
+            result.get("model_type"),
+        )
+        return None
+    return result["params"]
@@ -1,99 +1,293 @@
 """
 ORQUESTADOR DE LA PIPELINE
 clase principal que coordina el flujo de datos: ETL -> analisis -> modelado -> visualizacion
+(los graficos se encolan en src.visualization.renderer)
 """
 
 import logging
-from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from sklearn.metrics import mean_absolute_error
 
 from src.analysis.exploratory import residual_analysis, run_full_eda, save_eda_report
 from src.analysis.importance import run_feature_importance, save_importance_report
 from src.analysis.metrics import compute_weather_metrics, save_metrics
+from src.config.settings import (
+    DEFAULT_FORECAST_DAYS,
+    EDA_WINDOW_DAYS,
+    FORECAST_STRATEGY,
+    IMPORTANCE_MAX_ROWS,
+    IMPORTANCE_MODE,
+    IMPORTANCE_REPEATS,
+    IMPORTANCE_TIME_BUDGET_S,
+)
 from src.etl.extract import fetch_historical_data, save_raw_data
+from src.etl.hourly import fetch_daily_from_hourly
+from src.etl.incremental import compute_watermark, fetch_incremental_data, save_watermark
 from src.etl.load import init_db_connection, save_to_database
-from src.etl.transform import clean_and_transform, load_raw_data, save_processed_data
+from src.etl.schema import compact_frame, log_frame_memory, save_location_metadata
+from src.etl.streaming import history_window, stream_city_history
+from src.etl.transform import clean_and_transform, load_clean_data, save_processed_data
+from src.modeling.engine import train_and_evaluate
+from src.modeling.tuning import load_best_params
 from src.modeling.train import (
-    evaluate_model,
+    USE_XGB,
+    default_model_params,
+    evaluate_direct_model,
+    prepare_direct_training_data,
     prepare_training_data,
     save_feature_metadata,
     save_metrics_json,
     save_model,
-    train_temperature_model,
-)
-from src.utils.paths import city_slug, get_city_path
-from src.visualization.plots import (
-    plot_precipitation,
-    plot_temperature_trends,
+    train_direct_model,
 )
+from src.utils.cache import StageCache, code_version, frame_fingerprint
+from src.utils.instrumentation import stage
+from src.utils.paths import city_slug
+from src.visualization.renderer import get_renderer
 
 logger = logging.getLogger(__name__)
 
 
-def load_clean_data(city_name: str) -> pd.DataFrame:
-    folder = get_city_path(city_name, "processed")
-    path: Path = folder / f"{city_slug(city_name)}_weather_clean.csv"
-    if not path.exists():
-        raise FileNotFoundError(
-            "ejecuta 'train' primero — no hay datos procesados para %s", city_name
-        )
-    return pd.read_csv(path)
-
-
 class WeatherPipeline:
-    def __init__(self, city_name: str, latitude: float, longitude: float):
+    def __init__(
+        self,
+        city_name: str,
+        latitude: float,
+        longitude: float,
+        n_jobs: int | None = None,
+        cache: StageCache | None = None,
+        hourly: bool = False,
+    ):
         self.city = city_name
         self.latitude = latitude
         self.longitude = longitude
+        # hilos disponibles para modelado (None = todos los nucleos)
+        self.n_jobs = n_jobs
+        # cache de etapas (None = siempre recalcular)
+        self.cache = cache
+        # ingesta horaria: se guardan las horas y se agregan a dias (+ intra-diarias)
+        self.hourly = hourly
         self.db_engine = init_db_connection()
 
-    def run_etl(self, days_back=365):
-        df_raw = fetch_historical_data(self.latitude, self.longitude, days=days_back)
+    def _cached_stage(self, stage, fn, df, config, modules):
+        """fn() -> (resultado, archivos); se omite si datos, config y codigo no cambiaron."""
+        if self.cache is None:
+            return fn()[0]
+        return self.cache.run(
+            stage,
+            fn,
+            data=frame_fingerprint(df),
+            config={"city": self.city, **config},
+            code=code_version(*modules),
+        )
+
+    def _fetch_raw(self, days_back, incremental):
+        if self.hourly:
+            return fetch_daily_from_hourly(
+                self.city,
+                self.latitude,
+                self.longitude,
+                days_back=days_back,
+                incremental=incremental,
+            )
+        if incremental:
+            return fetch_incremental_data(
+                self.city, self.latitude, self.longitude, days_back=days_back
+            )
+        return fetch_historical_data(self.latitude, self.longitude, days=days_back)
+
+    def run_etl(self, days_back=365, incremental=False, df_raw=None):
+        # df_raw permite pasar datos ya descargados por lote desde cmd_train
+        if df_raw is None:
+            with stage("fetch", self.city) as record:
+                df_raw = self._fetch_raw(days_back, incremental)
+                record["rows"] = len(df_raw)
         if df_raw.empty:
             return None
 
-        save_raw_data(df_raw, self.city)
-        df_raw_loaded = load_raw_data(self.city)
-        df_clean = clean_and_transform(df_raw_loaded)
-        save_processed_data(df_clean, self.city)
+        with stage("clean", self.city) as record:
+            # esquema compacto; lat/lon se guardan una vez como metadata de la ciudad
+            df_raw = compact_frame(df_raw)
+            log_frame_memory(df_raw, "raw", self.city)
+            df_clean = compact_frame(clean_and_transform(df_raw))
+            log_frame_memory(df_clean, "processed", self.city)
+            record["rows"] = len(df_clean)
+
+        with stage("persist", self.city) as record:
+            save_location_metadata(self.city, self.latitude, self.longitude)
+            save_raw_data(df_raw, self.city)
+            watermark = compute_watermark(df_raw)
+            if watermark is not None:
+                save_watermark(self.city, watermark)
+            save_processed_data(df_clean, self.city)
+
+            table_name = f"{city_slug(self.city)}_weather"
+            save_to_database(
+                df_clean, table_name, self.db_engine, location=city_slug(self.city)
+            )
+            record["rows"] = len(df_raw) + len(df_clean)
+        return df_clean
 
+    def run_etl_streaming(self, years: int):
+        """ETL por años con memoria acotada; devuelve el historial procesado completo."""
         table_name = f"{city_slug(self.city)}_weather"
-        save_to_database(df_clean, table_name, self.db_engine)
+
+        def load_chunk(part):
+            save_to_database(
+                part, table_name, self.db_engine, location=city_slug(self.city)
+            )
+
+        save_location_metadata(self.city, self.latitude, self.longitude)
+        start, end = history_window(years)
+        # fetch, limpieza y escritura van intercaladas por año: una sola etapa
+        with stage("etl_stream", self.city) as record:
+            summary = stream_city_history(
+                self.city, self.latitude, self.longitude, start, end, on_chunk=load_chunk
+            )
+            record.update(rows=summary["rows"], chunks=summary["chunks"])
+        if summary["rows"] == 0:
+            return None
+        # el modelado necesita el historial procesado completo: se relee desde disco
+        with stage("load", self.city) as record:
+            df_clean = load_clean_data(self.city)
+            record["rows"] = len(df_clean)
         return df_clean
 
-    def run_analysis(self, df_clean):
+    def run_analysis(self, df_clean, incremental=False):
+        with stage("analysis", self.city, rows=len(df_clean)):
+            result = self._cached_stage(
+                "analysis",
+                lambda: self._run_analysis(df_clean, incremental),
+                df_clean,
+                config={"incremental": incremental, "eda_window_days": EDA_WINDOW_DAYS},
+                modules=["src.analysis.metrics", "src.analysis.exploratory"],
+            )
+
+        # los graficos se dibujan en segundo plano (fuera del camino critico);
+        # el renderer omite los que no cambiaron
+        with stage("plots", self.city, rows=len(df_clean)):
+            renderer = get_renderer()
+            renderer.submit("temperature_trend", self.city, df_clean)
+            renderer.submit("precipitation", self.city, df_clean)
+        return result
+
+    def _run_analysis(self, df_clean, incremental=False):
         metrics = compute_weather_metrics(df_clean)
-        save_metrics(self.city, metrics)
+        files = [save_metrics(self.city, metrics)]
 
-        eda = run_full_eda(df_clean, self.city)
-        save_eda_report(eda, self.city)
+        # con ingesta incremental el EDA actualiza sus agregados con los dias nuevos
+        with stage("eda", rows=len(df_clean)):
+            eda = run_full_eda(
+                df_clean, self.city, incremental=incremental, n_jobs=self.n_jobs
+            )
+        files.append(save_eda_report(eda, self.city))
+        return (metrics, eda), files
 
-        plot_temperature_trends(df_clean, self.city)
-        plot_precipitation(df_clean, self.city)
-        return metrics, eda
+    def _train_direct(self, df_clean, horizons, params=None):
+        X_direct, Y_direct, features = prepare_direct_training_data(
+            df_clean, horizons
+        )
+        with stage("train_direct", rows=len(X_direct), horizons=horizons):
+            model = train_direct_model(
+                X_direct, Y_direct, n_jobs=self.n_jobs, params=params
+            )
+        with stage("cv_direct", rows=len(X_direct), horizons=horizons):
+            metrics, y_true, y_pred = evaluate_direct_model(
+                X_direct, Y_direct, n_jobs=self.n_jobs, params=params
+            )
+        path = save_model(
+            self.city, model, features, strategy="direct", horizons=horizons
+        )
+        # el estimador de h=1 equivale al modelo recursivo (para importance);
+        # residuos de todos los horizontes juntos
+        return model.estimators_[0], metrics, y_true.ravel(), y_pred.ravel(), path
 
-    def run_modeling(self, df_clean):
-        X, y, features = prepare_training_data(df_clean)
+    def run_modeling(
+        self,
+        df_clean,
+        strategy=FORECAST_STRATEGY,
+        horizons=DEFAULT_FORECAST_DAYS,
+    ):
+        # hiperparametros de `main.py tune` si existen (None = settings)
+        params = load_best_params(self.city)
+        if params is not None:
+            logger.info("usando hiperparametros de tuning: %s", params)
 
-        model = train_temperature_model(X, y)
-        metrics, y_true, y_pred = evaluate_model(X, y)
+        config = {
+            "strategy": strategy,
+            "horizons": horizons if strategy == "direct" else None,
+            "backend": "xgboost" if USE_XGB else "random_forest",
+            "params": params or default_model_params(),
+            # el reporte de importance depende de estos settings
+            "importance": {
+                "mode": IMPORTANCE_MODE,
+                "max_rows": IMPORTANCE_MAX_ROWS,
+                "repeats": IMPORTANCE_REPEATS,
+                "time_budget_s": IMPORTANCE_TIME_BUDGET_S,
+            },
+        }
+        with stage("modeling", self.city, rows=len(df_clean)):
+            return self._cached_stage(
+                "modeling",
+                lambda: self._run_modeling(df_clean, strategy, horizons, params),
+                df_clean,
+                config=config,
+                modules=[
+                    "src.pipeline",
+                    "src.modeling.train",
+                    "src.modeling.engine",
+                    "src.modeling.features.temporal_features",
+                    "src.analysis.importance",
+                    "src.analysis.exploratory",
+                ],
+            )
 
-        save_model(self.city, model, features)
-        save_feature_metadata(self.city, features)
+    def _run_modeling(self, df_clean, strategy, horizons, params):
+        with stage("features", rows=len(df_clean)):
+            X, y, features = prepare_training_data(df_clean)
+            log_frame_memory(X, "features", self.city)
+
+        if strategy == "direct":
+            # metricas y residuos del modelo directo que se guarda (sin CV recursiva)
+            model, metrics, y_true, y_pred, model_file = self._train_direct(
+                df_clean, horizons, params
+            )
+        else:
+            # modelo final y folds de CV en paralelo sobre la misma matriz cuantizada;
+            # engine anota en la etapa el tiempo de cada parte (fit_s, cv_s)
+            with stage("train", rows=len(X)):
+                model, metrics, y_true, y_pred = train_and_evaluate(
+                    X, y, params=params, n_jobs=self.n_jobs
+                )
+            model_file = save_model(self.city, model, features)
+        metrics["strategy"] = strategy
+        files = [model_file, save_feature_metadata(self.city, features)]
 
         # feature importance
-        importance = run_feature_importance(model, X, y)
-        save_importance_report(importance, self.city)
+        with stage("importance", rows=len(X)):
+            importance = run_feature_importance(
+                model,
+                X,
+                y,
+                n_jobs=self.n_jobs or -1,
+                mode=IMPORTANCE_MODE,
+                time_budget=IMPORTANCE_TIME_BUDGET_S,
+            )
+        files.append(save_importance_report(importance, self.city))
 
         residual_report = residual_analysis(pd.Series(y_true), pd.Series(y_pred))
         logger.info("analisis de residuos: %s", residual_report)
 
-        # baseline persistence
-        y_baseline = y.shift(1).dropna()
-        y_actual = y.loc[y_baseline.index]
-        baseline_mae = mean_absolute_error(y_actual, y_baseline)
+        # baseline persistence: el ultimo dia conocido para cada horizonte evaluado
+        # (h=1 en recursivo, promedio de h=1..horizons en directo)
+        baseline_mae = np.mean(
+            [
+                mean_absolute_error(y.iloc[h:], y.shift(h).iloc[h:])
+                for h in range(1, (horizons if strategy == "direct" else 1) + 1)
+            ]
+        )
         logger.info(
             "baseline persistence MAE: %.2f (vs modelo MAE: %.2f)",
             baseline_mae,
@@ -103,6 +297,6 @@ class WeatherPipeline:
         metrics["baseline_persistence_MAE"] = round(float(baseline_mae), 2)
         metrics["residuals"] = residual_report
 
-        save_metrics_json(self.city, metrics)
+        files.append(save_metrics_json(self.city, metrics))
 
-        return metrics
+        return metrics, files
@@ -0,0 +1,118 @@
+"""
+CACHE DE MODELOS EN MEMORIA
+mantiene por ciudad el payload del modelo, su plan de features compilado y la
+ventana reciente del historial. LRU con presupuesto de memoria; una entrada se
+recarga cuando el modelo o los datos procesados cambian en disco
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+from src.etl.storage import dataset_version_path
+from src.etl.transform import load_clean_data
+from src.modeling.predict import compile_feature_plan, load_model_payload, model_path
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_stamp(city_name: str) -> tuple:
+    """
+    firma (mtime, tamaño) del modelo y de los datos procesados (su marca de
+    version: cambia aunque solo se reescriba una particion year=)
+    """
+    stamp = []
+    for path in (model_path(city_name), dataset_version_path(city_name, "processed")):
+        try:
+            st = path.stat()
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def load_entry(city_name: str) -> dict:
+    payload = load_model_payload(city_name)
+    plan = compile_feature_plan(payload["features"])
+    payload["plan"] = plan
+
+    # solo las columnas y filas que el forecast necesita
+    columns = list(
+        dict.fromkeys(
+            ["date"] + plan.columns + plan.base_features + ["temp_max", "temp_min"]
+        )
+    )
+    try:
+        history = load_clean_data(city_name, columns=columns)
+    except ValueError:
+        # alguna columna no existe en el dataset: se lee completo
+        history = load_clean_data(city_name)
+    history = history.tail(plan.depth).reset_index(drop=True)
+
+    model_bytes = model_path(city_name).stat().st_size
+    nbytes = model_bytes + int(history.memory_usage(deep=True).sum())
+    return {"payload": payload, "history": history, "nbytes": nbytes}
+
+
+class ModelCache:
+    """
+    el loader corre fuera del lock global: una carga lenta no bloquea a las
+    demas ciudades. un lock por ciudad hace que misses concurrentes de la misma
+    ciudad carguen una sola vez; el lock global solo cubre lectura, insercion
+    y expulsion
+    """
+
+    def __init__(self, max_bytes: int, loader=load_entry, stamp=artifact_stamp):
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._stamp = stamp
+        self._entries: OrderedDict[str, tuple[tuple, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["nbytes"] for _, entry in self._entries.values())
+
+    def _lookup(self, city_name: str, stamp: tuple) -> dict | None:
+        with self._lock:
+            cached = self._entries.get(city_name)
+            if cached is None or cached[0] != stamp:
+                return None
+            self._entries.move_to_end(city_name)
+            return cached[1]
+
+    def get(self, city_name: str) -> dict:
+        stamp = self._stamp(city_name)
+        entry = self._lookup(city_name, stamp)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            city_lock = self._loading.setdefault(city_name, threading.Lock())
+        with city_lock:
+            # otro hilo pudo cargarla mientras se esperaba el lock de la ciudad
+            entry = self._lookup(city_name, stamp)
+            if entry is not None:
+                return entry
+
+            if city_name in self._entries:
+                logger.info("artefactos de %s cambiaron en disco; recargando", city_name)
+            entry = self._loader(city_name)
+            with self._lock:
+                self._entries[city_name] = (stamp, entry)
+                self._entries.move_to_end(city_name)
+                self._evict()
+            return entry
+
+    def _evict(self) -> None:
+        # siempre se conserva la entrada mas reciente aunque exceda el presupuesto
+        while len(self._entries) > 1 and self.total_bytes > self.max_bytes:
+            city_name, _ = self._entries.popitem(last=False)
+            logger.info("modelo de %s expulsado de la cache", city_name)
+
+    def __contains__(self, city_name: str) -> bool:
+        return city_name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,213 @@
+"""
+SERVIDOR DE PRONOSTICOS
+proceso de larga vida que responde forecasts por HTTP (TCP o socket Unix)
+usando los modelos e historiales mantenidos en ModelCache
+
+GET /forecast?city=Santiago&days=3
+GET /forecast?lat=-33.04&lon=-71.62&days=3   (ubicacion entrenada mas cercana)
+GET /health
+"""
+
+import json
+import logging
+import os
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.config.settings import (
+    CITIES,
+    DEFAULT_FORECAST_DAYS,
+    SERVE_CACHE_MB,
+    SERVE_HOST,
+    SERVE_PORT,
+)
+from src.modeling.predict import forecast_future
+from src.serving.cache import ModelCache
+from src.utils.locations import LocationCatalog, trained_catalog
+from src.utils.serializer import NumpyEncoder
+
+logger = logging.getLogger(__name__)
+
+MAX_FORECAST_DAYS = 16
+
+
+class ForecastRequestError(ValueError):
+    pass
+
+
+def resolve_city(value: str | None) -> str:
+    if not value:
+        raise ForecastRequestError("falta el parametro 'city' (o 'lat' y 'lon')")
+    # acepta "puerto_montt" o "Puerto Montt"
+    city = CITIES.resolve(value)
+    if city is None:
+        raise ForecastRequestError(f"ciudad desconocida: {value}")
+    return city
+
+
+def resolve_location(
+    params: dict, locations: LocationCatalog
+) -> tuple[str, float | None]:
+    """(ubicacion, distancia_km): por nombre, o la entrenada mas cercana a lat/lon."""
+    if "lat" not in params and "lon" not in params:
+        return resolve_city(params.get("city")), None
+    try:
+        latitude, longitude = float(params["lat"]), float(params["lon"])
+    except KeyError as e:
+        raise ForecastRequestError(f"falta el parametro '{e.args[0]}'") from None
+    except ValueError:
+        raise ForecastRequestError("'lat'/'lon' invalidos") from None
+    try:
+        return locations.nearest(latitude, longitude)[0]
+    except ValueError as e:
+        raise ForecastRequestError(str(e)) from None
+
+
+def parse_days(value: str | None) -> int:
+    if value is None:
+        return DEFAULT_FORECAST_DAYS
+    try:
+        days = int(value)
+    except ValueError:
+        raise ForecastRequestError(f"'days' invalido: {value}") from None
+    if not 1 <= days <= MAX_FORECAST_DAYS:
+        raise ForecastRequestError(f"'days' debe estar entre 1 y {MAX_FORECAST_DAYS}")
+    return days
+
+
+def handle_forecast(cache: ModelCache, city: str, days: int) -> dict:
+    entry = cache.get(city)
+    payload = entry["payload"]
+    # el modelo directo solo cubre sus horizontes entrenados
+    if payload.get("strategy") == "direct" and days > payload["horizons"]:
+        raise ForecastRequestError(
+            f"'days' debe estar entre 1 y {payload['horizons']} para {city}"
+        )
+    forecast_df = forecast_future(payload, entry["history"], days_ahead=days)
+    forecast_df["date"] = forecast_df["date"].dt.strftime("%Y-%m-%d")
+    return {
+        "city": city,
+        "strategy": payload.get("strategy", "recursive"),
+        "forecast": forecast_df.to_dict(orient="records"),
+    }
+
+
+class ForecastHandler(BaseHTTPRequestHandler):
+    cache: ModelCache = None
+    # ubicaciones con modelo, indexadas para busqueda por coordenadas
+    locations: LocationCatalog = None
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False, cls=NumpyEncoder).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/health":
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "cached": len(self.cache),
+                    "bytes": self.cache.total_bytes,
+                },
+            )
+            return
+        if url.path != "/forecast":
+            self._send_json(404, {"error": f"ruta desconocida: {url.path}"})
+            return
+
+        try:
+            city, distance_km = resolve_location(params, self.locations)
+            days = parse_days(params.get("days"))
+            body = handle_forecast(self.cache, city, days)
+            if distance_km is not None:
+                body["distance_km"] = distance_km
+            self._send_json(200, body)
+        except ForecastRequestError as e:
+            self._send_json(400, {"error": str(e)})
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except Exception as e:
+            logger.exception("error sirviendo forecast: %s", e)
+            self._send_json(500, {"error": str(e)})
+
+    def address_string(self):
+        # en sockets Unix client_address es vacio
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+class ThreadingUnixHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+
+
+def make_server(
+    cache: ModelCache,
+    host: str = SERVE_HOST,
+    port: int = SERVE_PORT,
+    socket_path: str | None = None,
+    locations: LocationCatalog | None = None,
+):
+    """locations: ubicaciones para lat/lon (None = las del catalogo con modelo al iniciar)."""
+    if locations is None:
+        locations = trained_catalog(CITIES)
+    handler = type(
+        "BoundForecastHandler",
+        (ForecastHandler,),
+        {"cache": cache, "locations": locations},
+    )
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(
+    host: str = SERVE_HOST,
+    port: int = SERVE_PORT,
+    socket_path: str | None = None,
+    cache_mb: int = SERVE_CACHE_MB,
+) -> None:
+    cache = ModelCache(max_bytes=cache_mb * 1024 * 1024)
+
+    # precarga de modelos para que el primer request no pague la carga; solo
+    # ubicaciones entrenadas y hasta llenar el presupuesto (catalogos grandes)
+    locations = trained_catalog(CITIES)
+    for city in locations:
+        if cache.total_bytes >= cache.max_bytes:
+            break
+        try:
+            cache.get(city)
+        except FileNotFoundError as e:
+            logger.warning("sin modelo para precargar %s: %s", city, e)
+
+    server = make_server(cache, host, port, socket_path, locations=locations)
+    logger.info(
+        "sirviendo pronosticos en %s (cache %d MB, %d/%d ubicaciones con modelo)",
+        socket_path or f"http://{host}:{port}",
+        cache_mb,
+        len(locations),
+        len(CITIES),
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("servidor detenido")
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
@@ -0,0 +1,135 @@
+"""
+AGREGADOS INCREMENTALES
+estadisticas que se actualizan chunk a chunk y se combinan (merge) sin volver
+a leer los datos: conteo, media y varianza (formula de Chan), min y max.
+permiten calcular valores globales (p.ej. medias de imputacion) con memoria fija
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values) -> "RunningStats":
+        """agrega un chunk de valores (los NaN se ignoran)."""
+        arr = np.asarray(values, dtype="float64")
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return self
+
+        chunk = RunningStats()
+        chunk.count = int(arr.size)
+        chunk.mean = float(arr.mean())
+        chunk._m2 = float(((arr - chunk.mean) ** 2).sum())
+        chunk.min = float(arr.min())
+        chunk.max = float(arr.max())
+        return self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta**2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def var(self) -> float:
+        """varianza poblacional (ddof=0)."""
+        return self._m2 / self.count if self.count else math.nan
+
+    def result(self, default: float = math.nan) -> float:
+        return self.mean if self.count else default
+
+
+class FrameStats:
+    """un RunningStats por columna, para frames que llegan por chunks."""
+
+    def __init__(self, columns: list[str]):
+        self.stats = {col: RunningStats() for col in columns}
+
+    def update(self, df: pd.DataFrame) -> "FrameStats":
+        for col, stats in self.stats.items():
+            if col in df.columns:
+                stats.update(df[col].to_numpy(dtype="float64", na_value=np.nan))
+        return self
+
+    def merge(self, other: "FrameStats") -> "FrameStats":
+        for col, stats in other.stats.items():
+            self.stats.setdefault(col, RunningStats()).merge(stats)
+        return self
+
+    def means(self, default: float | None = None) -> dict[str, float]:
+        """media por columna; las columnas sin datos quedan en `default` (si se da)."""
+        means = {}
+        for col, stats in self.stats.items():
+            if stats.count:
+                means[col] = stats.mean
+            elif default is not None:
+                means[col] = default
+        return means
+
+
+class RunningCovariance:
+    """
+    co-momentos combinables entre columnas (solo filas completas), para la
+    matriz de correlacion sin releer el historial
+    """
+
+    def __init__(self, columns: list[str]):
+        self.columns = list(columns)
+        self.count = 0
+        self.mean = np.zeros(len(self.columns))
+        self._comoment = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, df: pd.DataFrame) -> "RunningCovariance":
+        arr = df[self.columns].to_numpy(dtype="float64", na_value=np.nan)
+        arr = arr[~np.isnan(arr).any(axis=1)]
+        if len(arr) == 0:
+            return self
+        mean = arr.mean(axis=0)
+        dev = arr - mean
+        return self._merge(len(arr), mean, dev.T @ dev)
+
+    def merge(self, other: "RunningCovariance") -> "RunningCovariance":
+        return self._merge(other.count, other.mean, other._comoment)
+
+    def _merge(self, count: int, mean: np.ndarray, comoment: np.ndarray):
+        if count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self._comoment = count, mean.copy(), comoment.copy()
+            return self
+
+        total = self.count + count
+        delta = mean - self.mean
+        self._comoment = (
+            self._comoment + comoment + np.outer(delta, delta) * self.count * count / total
+        )
+        self.mean = self.mean + delta * count / total
+        self.count = total
+        return self
+
+    def corr(self) -> pd.DataFrame:
+        std = np.sqrt(np.diag(self._comoment))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self._comoment / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
@@ -0,0 +1,190 @@
+"""
+CACHE DE ETAPAS
+guarda el resultado y los archivos de salida de una etapa de la pipeline bajo una
+clave = hash(datos de entrada, settings relevantes, version del codigo). si la
+clave ya existe la etapa no se ejecuta: se restauran sus archivos y se devuelve
+el resultado guardado. el directorio tiene un presupuesto de tamaño con
+expulsion de las entradas usadas hace mas tiempo
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from src.utils import paths
+from src.utils.serializer import NumpyEncoder
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """hash del contenido (columnas, tipos, indice y valores) del DataFrame."""
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _module_digest(module_name: str) -> str:
+    # se lee el archivo sin importar el modulo (p.ej. matplotlib en plots)
+    origin = importlib.util.find_spec(module_name).origin
+    with open(origin, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def code_version(*module_names: str) -> str:
+    """hash del codigo fuente de los modulos que producen la etapa."""
+    h = hashlib.sha256()
+    for name in sorted(module_names):
+        h.update(f"{name}:{_module_digest(name)}".encode())
+    return h.hexdigest()
+
+
+def stage_key(stage: str, data: str, config: dict | None = None, code: str = "") -> str:
+    raw = json.dumps(
+        {
+            "v": CACHE_VERSION,
+            "stage": stage,
+            "data": data,
+            "config": config or {},
+            "code": code,
+        },
+        sort_keys=True,
+        cls=NumpyEncoder,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    if not b.exists() or a.stat().st_size != b.stat().st_size:
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        return fa.read() == fb.read()
+
+
+class StageCache:
+    def __init__(self, root: str | Path | None = None, max_bytes: int = 1024**3):
+        # DATA_DIR se lee al crear la cache (los tests lo redirigen)
+        self.root = Path(root) if root else paths.DATA_DIR / ".cache" / "stages"
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def __contains__(self, key: str) -> bool:
+        return (self._entry_dir(key) / "manifest.json").exists()
+
+    def load(self, key: str):
+        """devuelve el resultado guardado y restaura sus archivos (KeyError si no existe)."""
+        entry = self._entry_dir(key)
+        try:
+            with open(entry / "manifest.json", encoding="utf-8") as f:
+                manifest = json.load(f)
+            value = joblib.load(entry / "value.pkl")
+        except (OSError, json.JSONDecodeError, EOFError) as e:
+            raise KeyError(key) from e
+
+        for stored, target in manifest["files"].items():
+            target = Path(target)
+            if not _same_file(entry / "files" / stored, target):
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(entry / "files" / stored, target)
+
+        # mtime = ultimo uso, para la expulsion LRU
+        os.utime(entry / "manifest.json")
+        return value
+
+    def store(self, key: str, value, files: list[str | Path] = ()) -> None:
+        entry = self._entry_dir(key)
+        # se arma en un directorio temporal y se renombra: los procesos de
+        # `train --workers` pueden escribir la misma cache a la vez
+        tmp = entry.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        (tmp / "files").mkdir(parents=True)
+
+        manifest = {"files": {}}
+        for i, path in enumerate(f for f in files if f and Path(f).exists()):
+            stored = f"{i}_{Path(path).name}"
+            shutil.copy2(path, tmp / "files" / stored)
+            manifest["files"][stored] = str(Path(path).resolve())
+
+        joblib.dump(value, tmp / "value.pkl")
+        with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            tmp.rename(entry)
+        except OSError:
+            # otro proceso guardo la misma clave primero
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._evict(keep=key)
+
+    def run(self, stage: str, fn, data: str, config: dict | None = None, code: str = ""):
+        """
+        ejecuta fn() solo si la clave no esta en cache. fn devuelve
+        (resultado, archivos_de_salida); run devuelve el resultado
+        """
+        key = stage_key(stage, data, config, code)
+        if key in self:
+            try:
+                value = self.load(key)
+                logger.info("etapa %s sin cambios: se reutiliza la cache", stage)
+                return value
+            except KeyError:
+                logger.warning("entrada de cache corrupta para %s; se recalcula", stage)
+
+        value, files = fn()
+        try:
+            self.store(key, value, files)
+        except OSError as e:
+            logger.warning("no se pudo guardar la etapa %s en cache: %s", stage, e)
+        return value
+
+    def entries(self) -> list[Path]:
+        if not self.root.exists():
+            return []
+        return [
+            p
+            for p in self.root.glob("*/*")
+            if not p.name.endswith(".tmp") and (p / "manifest.json").exists()
+        ]
+
+    def total_bytes(self) -> int:
+        return sum(_dir_size(p) for p in self.entries())
+
+    def _evict(self, keep: str | None = None) -> None:
+        entries = []
+        for path in self.entries():
+            try:
+                last_used = (path / "manifest.json").stat().st_mtime
+                entries.append((last_used, _dir_size(path), path))
+            except FileNotFoundError:
+                # otro proceso la expulso mientras se recorria
+                continue
+
+        entries.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path.name == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info("cache de etapas: expulsada %s", path.name[:12])
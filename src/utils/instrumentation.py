@@ -0,0 +1,344 @@
+"""
+INSTRUMENTACION POR ETAPA
+mide cada etapa de la pipeline (fetch, clean, persist, eda, train, importance,
+plots, forecast...) con tiempo de pared, tiempo de CPU, pico de memoria (RSS),
+filas procesadas y bytes leidos/escritos. cada run deja un reporte JSON y un
+archivo de metricas estilo textfile de Prometheus en data/runs/. opcionalmente
+un profiler por muestreo (stdlib) guarda stacks en formato "folded" para
+flamegraphs. sin un run activo, stage() no hace nada (costo ~cero)
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.config.settings import PROFILE_INTERVAL_S
+from src.utils import paths
+from src.utils.serializer import NumpyEncoder
+
+try:
+    import resource
+
+    HAS_RESOURCE = True
+except ImportError:  # windows
+    HAS_RESOURCE = False
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "weather_pipeline"
+
+# campos numericos de cada etapa que se exportan como metricas
+STAGE_METRICS = {
+    "wall_s": ("stage_wall_seconds", "tiempo de pared de la etapa"),
+    "cpu_s": ("stage_cpu_seconds", "tiempo de CPU del proceso durante la etapa"),
+    "rows": ("stage_rows", "filas procesadas por la etapa"),
+    "read_bytes": ("stage_read_bytes", "bytes leidos (archivos y red) durante la etapa"),
+    "written_bytes": ("stage_written_bytes", "bytes escritos durante la etapa"),
+    "peak_rss_mb": ("stage_peak_rss_megabytes", "pico de RSS del proceso al cerrar la etapa"),
+}
+
+
+def runs_dir() -> Path:
+    # DATA_DIR se lee en cada llamada (los tests lo redirigen)
+    path = paths.DATA_DIR / "runs"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _peak_rss_mb() -> float:
+    if not HAS_RESOURCE:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reporta KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _io_counters() -> tuple[int, int] | None:
+    """(leidos, escritos) del proceso segun /proc (incluye red); None fuera de linux."""
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SamplingProfiler:
+    """
+    muestrea los stacks de todos los hilos cada `interval` segundos desde un hilo
+    aparte. el resultado es formato folded ("a;b;c N"), compatible con
+    flamegraph.pl y speedscope
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_S):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_folded(self, path: Path) -> Path:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class RunRecorder:
+    def __init__(self, command: str, profile: bool = False, profile_interval: float = PROFILE_INTERVAL_S):
+        self.command = command
+        self.started_at = datetime.now()
+        self.records: list[dict] = []
+        self._stack: list[dict] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self.profiler = SamplingProfiler(profile_interval) if profile else None
+        if self.profiler is not None:
+            self.profiler.start()
+
+    @contextmanager
+    def stage(self, name: str, city: str | None = None, **fields):
+        """
+        mide el bloque; el dict que se entrega admite campos extra (p.ej.
+        record["rows"] = len(df)). las etapas anidadas guardan su `parent`
+        """
+        record = {"stage": name, "city": city, **fields}
+        with self._lock:
+            if self._stack:
+                record["parent"] = self._stack[-1]["stage"]
+                if record["city"] is None:
+                    record["city"] = self._stack[-1]["city"]
+            self._stack.append(record)
+
+        io_start = _io_counters()
+        rss_start = _peak_rss_mb()
+        start, cpu_start = time.perf_counter(), time.process_time()
+        record["offset_s"] = round(start - self._t0, 4)
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_s"] = round(time.perf_counter() - start, 4)
+            record["cpu_s"] = round(time.process_time() - cpu_start, 4)
+            record["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+            record["rss_growth_mb"] = round(record["peak_rss_mb"] - rss_start, 1)
+            io_end = _io_counters()
+            if io_start is not None and io_end is not None:
+                record["read_bytes"] = io_end[0] - io_start[0]
+                record["written_bytes"] = io_end[1] - io_start[1]
+            with self._lock:
+                self._stack = [r for r in self._stack if r is not record]
+                self.records.append(record)
+
+    def annotate(self, **fields) -> None:
+        """agrega campos a la etapa abierta mas interna (desde cualquier hilo)."""
+        with self._lock:
+            if self._stack:
+                self._stack[-1].update(fields)
+
+    def merge(self, partial: dict) -> None:
+        """etapas (y stacks del profiler) medidos en otro proceso (train --workers)."""
+        with self._lock:
+            self.records.extend(partial.get("stages", []))
+        if self.profiler is not None:
+            self.profiler.samples.update(partial.get("samples", {}))
+
+    def summary(self) -> dict[str, dict]:
+        """totales por nombre de etapa (una etapa anidada tambien cuenta dentro de su padre)."""
+        totals: dict[str, dict] = {}
+        for record in self.records:
+            entry = totals.setdefault(
+                record["stage"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0}
+            )
+            entry["count"] += 1
+            entry["wall_s"] = round(entry["wall_s"] + record.get("wall_s", 0.0), 4)
+            entry["cpu_s"] = round(entry["cpu_s"] + record.get("cpu_s", 0.0), 4)
+            entry["rows"] += int(record.get("rows") or 0)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["wall_s"]))
+
+    def report(self) -> dict:
+        return {
+            "command": self.command,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "cpu_s": round(time.process_time() - self._cpu0, 4),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "summary": self.summary(),
+            "stages": self.records,
+        }
+
+    def prometheus(self, report: dict | None = None) -> str:
+        """metricas en formato de exposicion de texto (node_exporter textfile)."""
+        report = report or self.report()
+        lines = []
+
+        def family(name: str, help_text: str, kind: str = "gauge") -> str:
+            full = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        def labels(**values) -> str:
+            body = ",".join(
+                f'{k}="{_escape_label(v)}"' for k, v in values.items() if v is not None
+            )
+            return "{" + body + "}"
+
+        command = report["command"]
+        for field, value, help_text in (
+            ("run_wall_seconds", report["wall_s"], "tiempo de pared del run"),
+            ("run_cpu_seconds", report["cpu_s"], "tiempo de CPU del run"),
+            ("run_peak_rss_megabytes", report["peak_rss_mb"], "pico de RSS del run"),
+            ("run_timestamp_seconds", self.started_at.timestamp(), "inicio del run (epoch)"),
+        ):
+            lines.append(f"{family(field, help_text)}{labels(command=command)} {value}")
+
+        # una serie por (etapa, ciudad): las repeticiones de una etapa se suman
+        totals: dict[tuple, dict] = {}
+        for record in report["stages"]:
+            key = (record["stage"], record.get("city"))
+            entry = totals.setdefault(key, {})
+            for field in STAGE_METRICS:
+                if record.get(field) is None:
+                    continue
+                if field == "peak_rss_mb":
+                    entry[field] = max(entry.get(field, 0), record[field])
+                else:
+                    entry[field] = entry.get(field, 0) + record[field]
+
+        for field, (name, help_text) in STAGE_METRICS.items():
+            full = family(name, help_text)
+            for (stage, city), entry in sorted(totals.items(), key=lambda item: str(item[0])):
+                if field in entry:
+                    lines.append(
+                        f"{full}{labels(command=command, stage=stage, city=city)} {entry[field]}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write(self, folder: Path | None = None) -> dict[str, str]:
+        """escribe el reporte JSON, el .prom (reemplazo atomico) y los stacks si hay profiler."""
+        folder = Path(folder) if folder else runs_dir()
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%S")
+        report = self.report()
+        written = {}
+
+        report_path = folder / f"{self.command}_{stamp}_{os.getpid()}.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, cls=NumpyEncoder, ensure_ascii=False)
+        written["report"] = str(report_path)
+
+        # un archivo fijo por subcomando: el collector de node_exporter lo relee
+        prom_path = folder / f"{METRIC_PREFIX}_{self.command}.prom"
+        tmp = prom_path.with_suffix(".prom.tmp")
+        tmp.write_text(self.prometheus(report), encoding="utf-8")
+        os.replace(tmp, prom_path)
+        written["metrics"] = str(prom_path)
+
+        if self.profiler is not None:
+            written["profile"] = str(
+                self.profiler.write_folded(folder / f"{self.command}_{stamp}_{os.getpid()}.folded")
+            )
+        return written
+
+    def close(self) -> dict[str, str]:
+        if self.profiler is not None:
+            self.profiler.stop()
+        written = self.write()
+        for name, entry in self.summary().items():
+            logger.info(
+                "etapa %-12s x%-3d pared %.2fs  cpu %.2fs  filas %d",
+                name,
+                entry["count"],
+                entry["wall_s"],
+                entry["cpu_s"],
+                entry["rows"],
+            )
+        logger.info("reporte del run: %s", written["report"])
+        return written
+
+
+_current: RunRecorder | None = None
+
+
+def start_run(command: str, profile: bool = False, profile_interval: float = PROFILE_INTERVAL_S) -> RunRecorder:
+    global _current
+    _current = RunRecorder(command, profile=profile, profile_interval=profile_interval)
+    return _current
+
+
+def current_run() -> RunRecorder | None:
+    return _current
+
+
+def finish_run() -> dict[str, str]:
+    """cierra el run activo y escribe sus archivos; {} si no habia run."""
+    global _current
+    run, _current = _current, None
+    return run.close() if run is not None else {}
+
+
+def detach_run() -> dict:
+    """
+    cierra el run activo sin escribir archivos (procesos worker); el resultado
+    se combina en el run del proceso padre con RunRecorder.merge
+    """
+    global _current
+    run, _current = _current, None
+    if run is None:
+        return {}
+    partial = {"stages": [{**record, "pid": os.getpid()} for record in run.records]}
+    if run.profiler is not None:
+        run.profiler.stop()
+        partial["samples"] = dict(run.profiler.samples)
+    return partial
+
+
+@contextmanager
+def stage(name: str, city: str | None = None, **fields):
+    """etapa del run activo; sin run activo entrega un dict descartable."""
+    if _current is None:
+        yield dict(fields)
+        return
+    with _current.stage(name, city, **fields) as record:
+        yield record
+
+
+def annotate(**fields) -> None:
+    if _current is not None:
+        _current.annotate(**fields)
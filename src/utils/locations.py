@@ -0,0 +1,216 @@
+"""
+CATALOGO DE UBICACIONES
+ubicaciones (nombre, lat, lon) cargadas desde un CSV externo en vez de un dict
+literal: las comunas de Chile o una grilla regular. el catalogo se comporta como
+un Mapping nombre → (lat, lon) (igual que el antiguo CITIES) y guarda las
+coordenadas (y la elevacion, columna opcional) en arrays; un KD-tree sobre
+coordenadas 3D (esfera unitaria, la distancia de cuerda ordena igual que la
+distancia geodesica) resuelve la ubicacion mas cercana a unas coordenadas
+arbitrarias en microsegundos
+
+uso:
+    python -m src.utils.locations --grid 0.5 --output data/grid.csv
+    WEATHER_LOCATIONS=data/grid.csv python main.py train
+"""
+
+import argparse
+import csv
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+import numpy as np
+
+from src.utils import paths
+from src.utils.paths import city_slug
+
+EARTH_RADIUS_KM = 6371.0088
+
+REQUIRED_COLUMNS = ("name", "latitude", "longitude")
+
+# caja de Chile continental para grillas (lat sur → norte, lon oeste → este)
+CHILE_BOUNDS = ((-56.0, -17.5), (-76.0, -66.0))
+
+
+def _unit_vectors(latitudes, longitudes) -> np.ndarray:
+    lat = np.radians(np.asarray(latitudes, dtype="float64"))
+    lon = np.radians(np.asarray(longitudes, dtype="float64"))
+    return np.column_stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)]
+    )
+
+
+def _chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+class LocationCatalog(Mapping):
+    def __init__(self, names: list[str], latitudes, longitudes, elevations=None):
+        self.names = list(names)
+        self.latitudes = np.asarray(latitudes, dtype="float64")
+        self.longitudes = np.asarray(longitudes, dtype="float64")
+        # metros sobre el nivel del mar; NaN si el catalogo no la trae
+        self.elevations = (
+            np.full(len(self.names), np.nan)
+            if elevations is None
+            else np.asarray(elevations, dtype="float64")
+        )
+        if not (
+            len(self.names)
+            == len(self.latitudes)
+            == len(self.longitudes)
+            == len(self.elevations)
+        ):
+            raise ValueError("names, latitudes y longitudes deben tener el mismo largo")
+        if (np.abs(self.latitudes) > 90).any() or (np.abs(self.longitudes) > 180).any():
+            raise ValueError("coordenadas fuera de rango en el catalogo")
+
+        self._position = {name: i for i, name in enumerate(self.names)}
+        if len(self._position) != len(self.names):
+            raise ValueError("el catalogo tiene nombres repetidos")
+        # "puerto_montt" y "Puerto Montt" son la misma ubicacion (carpeta de datos)
+        self._by_slug = {city_slug(name): name for name in self.names}
+        if len(self._by_slug) != len(self.names):
+            raise ValueError("el catalogo tiene nombres con el mismo slug")
+        self._tree = None
+
+    @classmethod
+    def from_csv(cls, path: str | Path) -> "LocationCatalog":
+        """CSV con columnas name, latitude, longitude y opcional elevation (otras se ignoran)."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"no existe el catalogo de ubicaciones {path}")
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"faltan columnas en {path.name}: {missing}")
+            has_elevation = "elevation" in reader.fieldnames
+            rows = [row for row in reader if row["name"].strip()]
+        try:
+            elevations = None
+            if has_elevation:
+                elevations = [float(row["elevation"] or "nan") for row in rows]
+            return cls(
+                [row["name"].strip() for row in rows],
+                [float(row["latitude"]) for row in rows],
+                [float(row["longitude"]) for row in rows],
+                elevations,
+            )
+        except ValueError as e:
+            raise ValueError(f"catalogo invalido {path.name}: {e}") from None
+
+    @classmethod
+    def from_dict(cls, locations: Mapping[str, tuple[float, float]]) -> "LocationCatalog":
+        names = list(locations)
+        coords = np.array([locations[n] for n in names], dtype="float64").reshape(-1, 2)
+        return cls(names, coords[:, 0], coords[:, 1])
+
+    def to_csv(self, path: str | Path) -> str:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([*REQUIRED_COLUMNS, "elevation"])
+            for name, lat, lon, elev in zip(
+                self.names, self.latitudes, self.longitudes, self.elevations
+            ):
+                elev = "" if np.isnan(elev) else round(float(elev), 1)
+                writer.writerow([name, round(float(lat), 4), round(float(lon), 4), elev])
+        return str(path)
+
+    def __getitem__(self, name: str) -> tuple[float, float]:
+        i = self._position[name]
+        return float(self.latitudes[i]), float(self.longitudes[i])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"LocationCatalog({len(self)} ubicaciones)"
+
+    def elevation(self, name: str) -> float:
+        return float(self.elevations[self._position[name]])
+
+    def resolve(self, value: str) -> str | None:
+        """nombre del catalogo para un nombre o slug ("puerto_montt"); None si no existe."""
+        return self._by_slug.get(city_slug(value))
+
+    def subset(self, names) -> "LocationCatalog":
+        idx = [self._position[n] for n in names]
+        return LocationCatalog(
+            [self.names[i] for i in idx],
+            self.latitudes[idx],
+            self.longitudes[idx],
+            self.elevations[idx],
+        )
+
+    def _index(self):
+        if self._tree is None:
+            # scipy solo cuando se busca por coordenadas (no en cada import de settings)
+            from scipy.spatial import cKDTree
+
+            self._tree = cKDTree(_unit_vectors(self.latitudes, self.longitudes))
+        return self._tree
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int = 1
+    ) -> list[tuple[str, float]]:
+        """las k ubicaciones mas cercanas: [(nombre, distancia_km)], de menor a mayor."""
+        if not len(self):
+            raise ValueError("el catalogo de ubicaciones esta vacio")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError(f"coordenadas fuera de rango: ({latitude}, {longitude})")
+        k = min(k, len(self))
+        chords, idx = self._index().query(_unit_vectors([latitude], [longitude])[0], k=k)
+        chords, idx = np.atleast_1d(chords), np.atleast_1d(idx)
+        return [
+            (self.names[i], round(float(km), 3))
+            for i, km in zip(idx, _chord_to_km(chords))
+        ]
+
+
+def load_catalog(path: str | Path) -> LocationCatalog:
+    return LocationCatalog.from_csv(path)
+
+
+def grid_catalog(
+    step: float,
+    lat_range: tuple[float, float] = CHILE_BOUNDS[0],
+    lon_range: tuple[float, float] = CHILE_BOUNDS[1],
+) -> LocationCatalog:
+    """grilla regular de `step` grados; nombres "Grilla -33.50 -70.50"."""
+    if step <= 0:
+        raise ValueError("step debe ser positivo")
+    lats = np.arange(lat_range[0], lat_range[1] + step / 2, step)
+    lons = np.arange(lon_range[0], lon_range[1] + step / 2, step)
+    lat_grid, lon_grid = (a.ravel() for a in np.meshgrid(lats, lons, indexing="ij"))
+    names = [f"Grilla {lat:.2f} {lon:.2f}" for lat, lon in zip(lat_grid, lon_grid)]
+    return LocationCatalog(names, lat_grid.round(4), lon_grid.round(4))
+
+
+def has_model(city_name: str) -> bool:
+    # sin get_city_path: no crear carpetas de datos por cada ubicacion del catalogo
+    slug = city_slug(city_name)
+    return (paths.DATA_DIR / slug / "models" / f"{slug}_temp_model.pkl").exists()
+
+
+def trained_catalog(catalog: LocationCatalog) -> LocationCatalog:
+    """sub-catalogo de las ubicaciones con modelo entrenado."""
+    return catalog.subset([name for name in catalog if has_model(name)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="genera un catalogo de ubicaciones en grilla")
+    parser.add_argument("--grid", type=float, required=True, metavar="DEGREES")
+    parser.add_argument("--lat", type=float, nargs=2, default=CHILE_BOUNDS[0])
+    parser.add_argument("--lon", type=float, nargs=2, default=CHILE_BOUNDS[1])
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    catalog = grid_catalog(args.grid, tuple(args.lat), tuple(args.lon))
+    print(f"{len(catalog)} ubicaciones → {catalog.to_csv(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
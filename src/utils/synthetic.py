@@ -0,0 +1,188 @@
+"""
+DATOS DE CLIMA SINTETICOS
+generador reproducible (semilla) de frames diarios con el mismo esquema que
+devuelve el archive API (ver src.etl.extract.COLUMN_MAP): estacionalidad del
+hemisferio sur segun la latitud, ruido autocorrelacionado, lluvia intermitente
+mas frecuente en invierno y algunos faltantes. hourly_from_daily expande un
+frame diario a horas con ciclo diurno (ingesta horaria). para benchmarks y tests
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.etl.schema import compact_frame
+
+# rango de latitudes de Chile continental (norte → sur)
+LATITUDE_RANGE = (-18.5, -53.2)
+LONGITUDE_RANGE = (-70.0, -73.5)
+
+
+def _ar1(rng: np.random.Generator, n: int, phi: float, scale: float) -> np.ndarray:
+    """ruido AR(1): los dias calidos/frios vienen en rachas como en datos reales."""
+    shocks = rng.normal(0, scale, n)
+    out = np.empty(n)
+    out[0] = shocks[0]
+    for i in range(1, n):
+        out[i] = phi * out[i - 1] + shocks[i]
+    return out
+
+
+def synthetic_weather(
+    latitude: float,
+    longitude: float,
+    start: date | str = "2000-01-01",
+    days: int = 365,
+    seed: int = 42,
+    missing_rate: float = 0.01,
+) -> pd.DataFrame:
+    """un frame raw diario para una ubicacion (columnas locales, como extract)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D")
+    doy = dates.dayofyear.to_numpy()
+
+    # verano en enero (hemisferio sur); mas frio y con mas amplitud hacia el sur
+    season = np.cos(2 * np.pi * (doy - 15) / 365.25)
+    south = (abs(latitude) - 18) / 35
+    mean_temp = 19 - 12 * south
+    amplitude = 3 + 4 * south
+
+    temp_avg = mean_temp + amplitude * season + _ar1(rng, days, 0.7, 1.2)
+    temp_range = np.clip(11 - 4 * south + 3 * season + rng.normal(0, 1.5, days), 2, None)
+    temp_max = temp_avg + temp_range / 2
+    temp_min = temp_avg - temp_range / 2
+
+    # lluvia: probabilidad diaria mayor en invierno y hacia el sur
+    rain_prob = np.clip(0.05 + 0.5 * south - 0.15 * season * (0.3 + south), 0.01, 0.9)
+    raining = rng.random(days) < rain_prob
+    precipitation = np.where(raining, rng.gamma(0.8, 4 + 10 * south, days), 0.0)
+
+    cloud = np.clip(30 + 60 * raining + rng.normal(0, 15, days), 0, 100)
+    radiation = np.clip(
+        (18 + 10 * season) * (1 - 0.6 * cloud / 100) + rng.normal(0, 1, days), 0.5, None
+    )
+    sunshine = np.clip((1 - cloud / 100) * (36000 + 10000 * season), 0, None)
+    rh_max = np.clip(75 + 15 * south + 10 * raining + rng.normal(0, 5, days), 20, 100)
+    rh_min = np.clip(rh_max - 25 - 10 * (1 - raining) + rng.normal(0, 5, days), 5, rh_max)
+    dew_avg = temp_min - (100 - rh_max) / 5
+    weather_code = np.select(
+        [precipitation > 10, precipitation > 0, cloud > 70, cloud > 40],
+        [63, 61, 3, 2],
+        default=0,
+    )
+
+    df = pd.DataFrame(
+        {
+            "date": dates,
+            "temp_max": temp_max,
+            "temp_min": temp_min,
+            "precipitation": precipitation,
+            "sunshine_duration": sunshine,
+            "windspeed_10m_max": np.clip(rng.gamma(4, 4 + 4 * south, days), 0, None),
+            "shortwave_radiation_sum": radiation,
+            "et0_fao_evapotranspiration": np.clip(radiation / 5 + rng.normal(0, 0.3, days), 0, None),
+            "relative_humidity_max": rh_max,
+            "relative_humidity_min": rh_min,
+            "dew_point_min": dew_avg - 2,
+            "dew_point_max": dew_avg + 2,
+            "cloud_cover_mean": cloud,
+            "weather_code": weather_code,
+        }
+    )
+
+    # faltantes sueltos (sensores caidos) en las mediciones
+    if missing_rate > 0:
+        for col in df.columns.drop(["date", "temp_max", "temp_min"]):
+            df.loc[rng.random(days) < missing_rate, col] = np.nan
+
+    df["latitude"] = latitude
+    df["longitude"] = longitude
+    return compact_frame(df, drop_location=False)
+
+
+def _diurnal_shape(hours: np.ndarray) -> np.ndarray:
+    """0 a las 6h (minimo) y 1 a las 15h (maximo), con subida y bajada cosenoidal."""
+    rising = 0.5 - 0.5 * np.cos(np.pi * (hours - 6) / 9)
+    falling = 0.5 + 0.5 * np.cos(np.pi * ((hours - 15) % 24) / 15)
+    return np.where((hours >= 6) & (hours <= 15), rising, falling)
+
+
+def hourly_from_daily(daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    serie horaria (hora local, columnas de src.etl.hourly) coherente con un frame
+    diario: deterministica, y al agregarla por dia devuelve los maximos, minimos
+    y sumas del frame original
+    """
+    n = len(daily)
+    hours = np.tile(np.arange(24), n)
+    shape = _diurnal_shape(hours)
+
+    def per_day(col):
+        values = daily[col].to_numpy(dtype="float64", na_value=np.nan)
+        return np.repeat(values, 24)
+
+    # radiacion, sol y ET0 entre las 7 y las 19 con forma de seno
+    daylight = np.clip(np.sin(np.pi * (np.arange(24) - 7) / 12), 0, None)
+    daylight = np.tile(daylight / daylight.sum(), n)
+
+    # la lluvia del dia cae en las primeras k horas (~1.5 mm/h)
+    precip = per_day("precipitation")
+    rain_hours = np.clip(np.ceil(np.nan_to_num(precip) / 1.5), 1, 24)
+    precip_hourly = np.where(hours < rain_hours, precip / rain_hours, 0.0)
+
+    temp_min, temp_max = per_day("temp_min"), per_day("temp_max")
+    rh_min, rh_max = per_day("relative_humidity_min"), per_day("relative_humidity_max")
+    dew_min, dew_max = per_day("dew_point_min"), per_day("dew_point_max")
+
+    df = pd.DataFrame(
+        {
+            "time": (
+                np.repeat(pd.to_datetime(daily["date"]).to_numpy(dtype="datetime64[s]"), 24)
+                + hours.astype("timedelta64[h]")
+            ),
+            "temp": temp_min + (temp_max - temp_min) * shape,
+            "humidity": rh_min + (rh_max - rh_min) * (1 - shape),
+            "dew_point": dew_min + (dew_max - dew_min) * shape,
+            "precipitation": precip_hourly,
+            "cloud_cover": per_day("cloud_cover_mean"),
+            "windspeed_10m": per_day("windspeed_10m_max") * (0.6 + 0.4 * shape),
+            # MJ/m² del dia → W/m² medios de cada hora
+            "shortwave_radiation": per_day("shortwave_radiation_sum") * 1e6 / 3600 * daylight,
+            "sunshine_duration": per_day("sunshine_duration") * daylight,
+            "et0_fao_evapotranspiration": per_day("et0_fao_evapotranspiration") * daylight,
+            "surface_pressure": 1013 - 0.8 * np.nan_to_num(precip) + np.cos(np.pi * hours / 12),
+            "weather_code": per_day("weather_code"),
+        }
+    )
+    for col in df.columns.drop("time"):
+        df[col] = df[col].astype("float32")
+    return compact_frame(df, drop_location=False)
+
+
+def synthetic_locations(n_locations: int, seed: int = 42) -> dict[str, tuple[float, float]]:
+    """n ubicaciones repartidas de norte a sur, como CITIES: {nombre: (lat, lon)}."""
+    rng = np.random.default_rng(seed)
+    lats = np.linspace(*LATITUDE_RANGE, n_locations)
+    lons = rng.uniform(*sorted(LONGITUDE_RANGE), n_locations)
+    return {
+        f"Sintetica {i:03d}": (round(float(lat), 4), round(float(lon), 4))
+        for i, (lat, lon) in enumerate(zip(lats, lons))
+    }
+
+
+def synthetic_dataset(
+    n_locations: int = 1,
+    years: int = 1,
+    seed: int = 42,
+    start: date | str = "2000-01-01",
+    missing_rate: float = 0.01,
+) -> dict[str, pd.DataFrame]:
+    """N ubicaciones x Y años de datos raw diarios: {nombre: frame}."""
+    days = int(round(years * 365.25))
+    return {
+        name: synthetic_weather(
+            lat, lon, start=start, days=days, seed=seed + i, missing_rate=missing_rate
+        )
+        for i, (name, (lat, lon)) in enumerate(synthetic_locations(n_locations, seed).items())
+    }
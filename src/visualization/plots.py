@@ -1,17 +1,58 @@
 import logging
-from matplotlib.dates import DateFormatter, MonthLocator
 
-import matplotlib.pyplot as plt
-import pandas as pd
+import matplotlib
 
-from src.utils.paths import get_city_path
+# backend sin ventana: los graficos solo se guardan a PNG (tambien en procesos hijos)
+matplotlib.use("Agg")
+
+from matplotlib.dates import DateFormatter, MonthLocator  # noqa: E402
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.utils.paths import get_city_path  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
 plt.style.use("seaborn-v0_8-whitegrid")
 
 
-def plot_temperature_trends(df: pd.DataFrame, city_name: str) -> None:
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(int)
+
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, buckets: int):
+    """
+    reduce la serie a su minimo y maximo por bucket (un bucket por pixel de
+    ancho), en orden temporal: la linea dibujada se ve igual que con todos los puntos
+    """
+    n = len(y)
+    if buckets <= 0 or n <= 2 * buckets:
+        return x, y
+
+    edges = _bucket_edges(n, buckets)
+    bucket_id = np.repeat(np.arange(buckets), np.diff(edges))
+    # orden por (bucket, valor): el primero de cada bucket es el minimo y el ultimo el maximo
+    order = np.lexsort((np.nan_to_num(y, nan=np.inf), bucket_id))
+    keep = np.unique(np.concatenate([order[edges[:-1]], order[edges[1:] - 1]]))
+    return x[keep], y[keep]
+
+
+def decimate_max(x: np.ndarray, y: np.ndarray, buckets: int):
+    """maximo por bucket (para barras), con la fecha de inicio del bucket."""
+    n = len(y)
+    if buckets <= 0 or n <= buckets:
+        return x, y
+    starts = _bucket_edges(n, buckets)[:-1]
+    return x[starts], np.fmax.reduceat(y, starts)
+
+
+def _pixel_width(fig, dpi: float | None = None) -> int:
+    return int(fig.get_figwidth() * (dpi or fig.dpi))
+
+
+def plot_temperature_trends(df: pd.DataFrame, city_name: str) -> str | None:
     if df.empty:
         logger.warning("no hay datos para graficar tendencias en %s", city_name)
         return
@@ -20,9 +61,15 @@ def plot_temperature_trends(df: pd.DataFrame, city_name: str) -> None:
         df["date"] = pd.to_datetime(df["date"])
 
     fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df["date"], df["temp_max"], label="Max Temp", color="#d62728", linewidth=2)
-    ax.plot(df["date"], df["temp_min"], label="Min Temp", color="#1f77b4", linewidth=2)
-    ax.plot(df["date"], df["temp_avg"], label="Avg Temp", color="#ff7f0e", linestyle="--")
+    buckets = _pixel_width(fig)
+    dates = df["date"].to_numpy()
+
+    def series(col):
+        return decimate_minmax(dates, df[col].to_numpy(dtype="float64"), buckets)
+
+    ax.plot(*series("temp_max"), label="Max Temp", color="#d62728", linewidth=2)
+    ax.plot(*series("temp_min"), label="Min Temp", color="#1f77b4", linewidth=2)
+    ax.plot(*series("temp_avg"), label="Avg Temp", color="#ff7f0e", linestyle="--")
 
     ax.xaxis.set_major_locator(MonthLocator(interval=2))
     ax.xaxis.set_major_formatter(DateFormatter("%b %Y"))
@@ -39,9 +86,10 @@ def plot_temperature_trends(df: pd.DataFrame, city_name: str) -> None:
     fig.savefig(path)
     plt.close(fig)
     logger.info("grafico guardado: %s", path)
+    return str(path)
 
 
-def plot_precipitation(df: pd.DataFrame, city_name: str) -> None:
+def plot_precipitation(df: pd.DataFrame, city_name: str) -> str | None:
     if df.empty:
         return
 
@@ -49,7 +97,13 @@ def plot_precipitation(df: pd.DataFrame, city_name: str) -> None:
         df["date"] = pd.to_datetime(df["date"])
 
     fig, ax = plt.subplots(figsize=(10, 4))
-    ax.bar(df["date"], df["precipitation"], width=0.8, color="#17becf")
+    buckets = _pixel_width(fig, dpi=150)
+    dates, precipitation = decimate_max(
+        df["date"].to_numpy(), df["precipitation"].to_numpy(dtype="float64"), buckets
+    )
+    # con decimacion cada barra cubre un bucket de varios dias
+    width = 0.8 * max(1, len(df) / max(len(dates), 1))
+    ax.bar(dates, precipitation, width=width, color="#17becf")
 
     ax.xaxis.set_major_locator(MonthLocator(interval=2))
     ax.xaxis.set_major_formatter(DateFormatter("%b %Y"))
@@ -64,13 +118,14 @@ def plot_precipitation(df: pd.DataFrame, city_name: str) -> None:
     fig.savefig(path, dpi=150, bbox_inches="tight")
     plt.close(fig)
     logger.info("grafico guardado: %s", path)
+    return str(path)
 
 
 def plot_forecast(
     forecast_df: pd.DataFrame,
     city_name: str,
     history: pd.DataFrame | None = None,
-) -> None:
+) -> str | None:
     if forecast_df.empty:
         return
 
@@ -107,3 +162,4 @@ def plot_forecast(
     fig.savefig(path, dpi=150, bbox_inches="tight")
     plt.close(fig)
     logger.info("grafico guardado: %s", path)
+    return str(path)
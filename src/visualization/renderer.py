@@ -0,0 +1,166 @@
+"""
+RENDER DE GRAFICOS EN SEGUNDO PLANO
+encola los graficos en un pool de procesos (backend Agg) para que no sumen
+tiempo a train/predict. un grafico no se vuelve a dibujar si su PNG existe y la
+huella de sus datos de entrada (y del codigo de plots.py) no cambio
+"""
+
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from src.config.settings import PLOT_WORKERS
+from src.utils.cache import code_version, frame_fingerprint, stage_key
+from src.utils import paths
+from src.utils.paths import get_city_path
+
+logger = logging.getLogger(__name__)
+
+# tipo → (funcion en plots.py, archivo, columnas que usa)
+PLOTS = {
+    "temperature_trend": (
+        "plot_temperature_trends",
+        "temperature_trend.png",
+        ["date", "temp_max", "temp_min", "temp_avg"],
+    ),
+    "precipitation": ("plot_precipitation", "precipitation.png", ["date", "precipitation"]),
+    "forecast": ("plot_forecast", "forecast.png", ["date", "predicted_temp_avg"]),
+}
+
+# plot_forecast solo dibuja los ultimos 30 dias del historial
+FORECAST_HISTORY_DAYS = 30
+
+STATE_FILE = ".render_state.json"
+
+
+def _render(
+    func_name: str, df: pd.DataFrame, city_name: str, kwargs: dict, data_dir: Path
+) -> str:
+    from src.visualization import plots
+
+    # con spawn el hijo no hereda DATA_DIR si el proceso padre lo redirigio
+    paths.DATA_DIR = data_dir
+    return getattr(plots, func_name)(df, city_name, **kwargs)
+
+
+def _project(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    return df[[c for c in columns if c in df.columns]].copy()
+
+
+def _fingerprint(kind: str, df: pd.DataFrame, kwargs: dict) -> str:
+    parts = {"df": frame_fingerprint(df)}
+    for name, value in kwargs.items():
+        parts[name] = frame_fingerprint(value) if isinstance(value, pd.DataFrame) else value
+    return stage_key(kind, data=json.dumps(parts, default=str), code=code_version("src.visualization.plots"))
+
+
+class PlotRenderer:
+    def __init__(self, workers: int = PLOT_WORKERS):
+        # workers=0 dibuja en el mismo proceso (sincrono)
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending: list[Future] = []
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: los hijos no heredan hilos de XGBoost/OpenMP del proceso padre
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _state_path(self, city_name: str):
+        return get_city_path(city_name, "plots") / STATE_FILE
+
+    def _load_state(self, city_name: str) -> dict:
+        path = self._state_path(city_name)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _record(self, city_name: str, filename: str, fingerprint: str) -> None:
+        with self._lock:
+            state = self._load_state(city_name)
+            state[filename] = fingerprint
+            with open(self._state_path(city_name), "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+
+    def is_current(self, city_name: str, filename: str, fingerprint: str) -> bool:
+        path = get_city_path(city_name, "plots") / filename
+        return path.exists() and self._load_state(city_name).get(filename) == fingerprint
+
+    def submit(self, kind: str, city_name: str, df: pd.DataFrame, **kwargs) -> Future | None:
+        """encola el grafico; devuelve None si no hacia falta dibujarlo o fue sincrono."""
+        func_name, filename, columns = PLOTS[kind]
+        df = _project(df, columns)
+        if isinstance(kwargs.get("history"), pd.DataFrame):
+            history = kwargs["history"].sort_values("date")
+            kwargs["history"] = _project(history.tail(FORECAST_HISTORY_DAYS), ["date", "temp_avg"])
+
+        fingerprint = _fingerprint(kind, df, kwargs)
+        if self.is_current(city_name, filename, fingerprint):
+            logger.info("grafico %s de %s sin cambios; se omite", filename, city_name)
+            return None
+
+        if self.workers <= 0:
+            _render(func_name, df, city_name, kwargs, paths.DATA_DIR)
+            self._record(city_name, filename, fingerprint)
+            return None
+
+        future = self._executor().submit(
+            _render, func_name, df, city_name, kwargs, paths.DATA_DIR
+        )
+
+        def done(f: Future) -> None:
+            if f.exception() is not None:
+                logger.error("fallo el grafico %s de %s: %s", filename, city_name, f.exception())
+            else:
+                self._record(city_name, filename, fingerprint)
+
+        future.add_done_callback(done)
+        self._pending.append(future)
+        return future
+
+    def wait(self) -> None:
+        """espera los graficos encolados (los errores ya se registraron en el log)."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        self.wait()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_default: PlotRenderer | None = None
+
+
+def get_renderer() -> PlotRenderer:
+    global _default
+    if _default is None:
+        _default = PlotRenderer()
+    return _default
+
+
+def flush_renders() -> None:
+    """espera los graficos pendientes del renderer por defecto y cierra su pool."""
+    global _default
+    if _default is not None:
+        _default.close()
+        _default = None
@@ -3,6 +3,45 @@ import pandas as pd
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def no_http_cache(monkeypatch):
+    # los tests de extract simulan la API: sin cache entre tests
+    monkeypatch.setenv("WEATHER_HTTP_CACHE", "0")
+
+
+class FakeApiClient:
+    """reemplazo de OpenMeteoClient: handler(url, params) devuelve el JSON o lanza."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    def get_json(self, url, params, timeout):
+        self.calls.append(params)
+        return self.handler(url, params)
+
+    def get_many(self, url, params_list, timeout):
+        results = []
+        for params in params_list:
+            try:
+                results.append(self.get_json(url, params, timeout))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    import src.etl.http_cache
+
+    def install(handler) -> FakeApiClient:
+        client = FakeApiClient(handler)
+        monkeypatch.setattr(src.etl.http_cache, "get_client", lambda: client)
+        return client
+
+    return install
+
+
 @pytest.fixture
 def sample_weather_df() -> pd.DataFrame:
     dates = pd.date_range("2025-01-01", periods=60, freq="D")
@@ -36,3 +75,11 @@ def sample_clean_df(sample_weather_df) -> pd.DataFrame:
     from src.etl.transform import clean_and_transform
 
     return clean_and_transform(sample_weather_df)
+
+
+@pytest.fixture
+def tmp_data_dir(tmp_path, monkeypatch):
+    import src.utils.paths
+
+    monkeypatch.setattr(src.utils.paths, "DATA_DIR", tmp_path)
+    return tmp_path
@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.utils.aggregates import FrameStats, RunningStats
+
+
+def test_running_stats_merge_matches_full_pass():
+    rng = np.random.default_rng(0)
+    values = rng.normal(10, 3, 1000)
+    values[::7] = np.nan
+
+    merged = RunningStats()
+    for chunk in np.array_split(values, 9):
+        merged.merge(RunningStats().update(chunk))
+
+    valid = values[~np.isnan(values)]
+    assert merged.count == valid.size
+    assert np.isclose(merged.mean, valid.mean())
+    assert np.isclose(merged.var, valid.var())
+    assert merged.min == valid.min() and merged.max == valid.max()
+
+
+def test_frame_stats_means_default_for_empty_columns(sample_weather_df):
+    stats = FrameStats(["precipitation", "missing"])
+    stats.update(sample_weather_df.iloc[:30]).update(sample_weather_df.iloc[30:])
+
+    means = stats.means(default=0)
+    assert np.isclose(means["precipitation"], sample_weather_df["precipitation"].mean())
+    assert means["missing"] == 0
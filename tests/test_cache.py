@@ -0,0 +1,44 @@
+from src.utils.cache import StageCache, frame_fingerprint, stage_key
+
+
+def test_frame_fingerprint_changes_with_values(sample_clean_df):
+    other = sample_clean_df.copy()
+    assert frame_fingerprint(other) == frame_fingerprint(sample_clean_df)
+
+    other.loc[other.index[0], "temp_avg"] += 0.01
+    assert frame_fingerprint(other) != frame_fingerprint(sample_clean_df)
+
+
+def test_stage_cache_skips_and_restores_outputs(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    output = tmp_path / "out" / "report.json"
+    calls = []
+
+    def stage():
+        calls.append(1)
+        output.parent.mkdir(exist_ok=True)
+        output.write_text('{"ok": true}')
+        return {"MAE": 1.0}, [output]
+
+    assert cache.run("analysis", stage, data="abc") == {"MAE": 1.0}
+    output.unlink()
+
+    assert cache.run("analysis", stage, data="abc") == {"MAE": 1.0}
+    assert len(calls) == 1
+    assert output.read_text() == '{"ok": true}'
+
+    cache.run("analysis", stage, data="abc", config={"strategy": "direct"})
+    assert len(calls) == 2
+
+
+def test_stage_cache_evicts_least_recently_used(tmp_path):
+    big = tmp_path / "big.bin"
+    big.write_bytes(b"x" * 4000)
+    cache = StageCache(tmp_path / "cache", max_bytes=6000)
+
+    cache.store(stage_key("a", "1"), None, [big])
+    cache.store(stage_key("b", "1"), None, [big])
+
+    assert stage_key("a", "1") not in cache
+    assert stage_key("b", "1") in cache
+    assert cache.total_bytes() <= 6000
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+import requests
+
+from src.etl import client as client_module
+from src.etl.client import (
+    OpenMeteoClient,
+    TokenBucket,
+    max_batch_locations,
+    parse_retry_after,
+    request_weight,
+)
+
+URL = "https://archive-api.open-meteo.com/v1/archive"
+
+
+class _FakeTransport:
+    """responde con la lista de (status, body) en orden, luego siempre 200."""
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.calls = 0
+
+    async def get(self, url, params, timeout):
+        self.calls += 1
+        status, body = self.script.pop(0) if self.script else (200, {"ok": params})
+        return status, {"Retry-After": "0"}, json.dumps(body).encode()
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    monkeypatch.setattr(client_module, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+    clients = []
+
+    def make(script=(), max_retries=3):
+        c = OpenMeteoClient(
+            max_retries=max_retries, rate_limits={}, transport=_FakeTransport(script)
+        )
+        clients.append(c)
+        return c
+
+    yield make
+    for c in clients:
+        c.close()
+
+
+def test_request_weight_follows_api_rules():
+    base = {"latitude": "-33.45", "daily": "temperature_2m_max"}
+    assert request_weight({**base, "start_date": "2025-01-01", "end_date": "2025-01-14"}) == 1
+    year = {**base, "start_date": "2025-01-01", "end_date": "2025-12-31"}
+    assert request_weight(year) == pytest.approx(365 / 14)
+    assert request_weight({**year, "latitude": "-33.45,-36.82"}) == pytest.approx(2 * 365 / 14)
+    assert request_weight({**base, "daily": ",".join(["v"] * 20), "forecast_days": 7}) == 2
+
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    bucket = TokenBucket(limit=10, window_s=60, clock=lambda: now[0])
+
+    bucket.consume(10)
+    assert bucket.wait_time(1) == pytest.approx(6.0)
+    now[0] = 30.0
+    assert bucket.wait_time(5) == 0.0
+    # un request mas pesado que el bucket espera a tenerlo lleno...
+    assert bucket.wait_time(50) == pytest.approx(30.0)
+    now[0] = 60.0
+    # ...y se cobra completo: los siguientes esperan la deuda
+    bucket.consume(50)
+    assert bucket.wait_time(1) == pytest.approx(6 * 41)
+
+
+def test_max_batch_locations_fits_smallest_limit():
+    params = {
+        "daily": ",".join(["v"] * 13),
+        "start_date": "2025-01-01",
+        "end_date": "2025-12-31",
+    }
+    limits = {60: 600, 86400: 10000}
+
+    n = max_batch_locations(params, limits)
+    lats = ",".join(["-33.45"] * n)
+    assert request_weight({**params, "latitude": lats}) <= 600
+    assert request_weight({**params, "latitude": lats + ",-33.45"}) > 600
+    assert max_batch_locations(params, {60: 10}) == 1
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("mañana") is None
+
+
+def test_client_retries_throttled_requests(make_client):
+    c = make_client([(429, {"error": True}), (503, {"error": True})])
+
+    assert c.get_json(URL, {"latitude": "1"}, timeout=5) == {"ok": {"latitude": "1"}}
+    assert c.transport.calls == 3
+    assert c.stats["retries"] == 2
+
+
+def test_client_raises_on_client_errors_and_exhausted_retries(make_client):
+    c = make_client([(400, {"error": True, "reason": "malo"})])
+    with pytest.raises(requests.HTTPError, match="400"):
+        c.get_json(URL, {}, timeout=5)
+    assert c.transport.calls == 1
+
+    c = make_client([(500, {})] * 3, max_retries=2)
+    with pytest.raises(requests.HTTPError, match="500"):
+        c.get_json(URL, {}, timeout=5)
+
+
+def test_get_many_returns_errors_in_place(make_client):
+    c = make_client([(404, {})])
+    results = c.get_many(URL, [{"i": 0}, {"i": 1}], timeout=5)
+
+    assert isinstance(results[0], requests.HTTPError)
+    assert results[1] == {"ok": {"i": 1}}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+import src.analysis.exploratory as exploratory
+from src.analysis.exploratory import run_full_eda
+
+
+def test_incremental_eda_matches_full_recompute(sample_clean_df, tmp_data_dir):
+    history = sample_clean_df.iloc[:50]
+    run_full_eda(history, "Santiago")
+
+    incremental = run_full_eda(sample_clean_df, "Santiago", incremental=True)
+    full = run_full_eda(sample_clean_df, "Concepcion")
+
+    assert incremental["mode"] == "incremental" and full["mode"] == "full"
+    for col in ["temp_avg", "precipitation", "weather_code"]:
+        for stat, value in full["descriptive_stats"][col].items():
+            got = incremental["descriptive_stats"][col][stat]
+            assert np.isclose(got, value, atol=0.011)
+    for col, value in full["correlations"]["target_correlations"].items():
+        got = incremental["correlations"]["target_correlations"][col]
+        assert np.isclose(got, value, atol=0.0011, equal_nan=True)
+
+
+def test_incremental_eda_falls_back_when_history_changes(sample_clean_df, tmp_data_dir):
+    run_full_eda(sample_clean_df.iloc[:50], "Santiago")
+
+    revised = sample_clean_df.copy()
+    revised.loc[revised.index[0], "temp_avg"] += 1
+    assert run_full_eda(revised, "Santiago", incremental=True)["mode"] == "full"
+
+
+def test_stationarity_cached_per_window(sample_clean_df, tmp_data_dir, monkeypatch):
+    calls = []
+    original = exploratory.stationarity_test
+
+    def counting(series):
+        calls.append(len(series))
+        return original(series)
+
+    monkeypatch.setattr(exploratory, "stationarity_test", counting)
+    first = run_full_eda(sample_clean_df, "Santiago")
+    second = run_full_eda(sample_clean_df, "Santiago")
+
+    assert len(calls) == 1
+    assert first["stationarity"] == second["stationarity"]
+
+
+def test_stl_uses_recent_window(tmp_data_dir, sample_clean_df, monkeypatch):
+    monkeypatch.setattr(exploratory, "EDA_WINDOW_DAYS", 30)
+    eda = run_full_eda(sample_clean_df, "Santiago")
+
+    assert eda["window"]["end"] == str(sample_clean_df["date"].max().date())
+    expected_start = sample_clean_df["date"].max() - pd.Timedelta(days=29)
+    assert pd.Timestamp(eda["window"]["start"]) == expected_start
@@ -0,0 +1,67 @@
+import requests
+
+from src.etl.extract import fetch_historical_batch
+
+
+def _api_item(temp):
+    return {
+        "daily": {
+            "time": ["2025-01-01", "2025-01-02"],
+            "temperature_2m_max": [temp, temp + 1],
+            "temperature_2m_min": [temp - 10, temp - 9],
+        }
+    }
+
+
+LOCATIONS = {
+    "Santiago": (-33.45, -70.66),
+    "Concepcion": (-36.82, -73.05),
+    "Antofagasta": (-23.65, -70.40),
+}
+
+
+def test_fetch_historical_batch_splits_response(fake_api):
+    def handler(url, params):
+        n = len(params["latitude"].split(","))
+        if n == 1:
+            return _api_item(30.0)
+        return [_api_item(20.0 + i) for i in range(n)]
+
+    client = fake_api(handler)
+    frames = fetch_historical_batch(LOCATIONS, days=30, batch_size=2)
+
+    assert len(client.calls) == 2
+    assert client.calls[0]["latitude"] == "-33.45,-36.82"
+    assert list(frames) == ["Santiago", "Concepcion", "Antofagasta"]
+    assert frames["Concepcion"]["temp_max"].tolist() == [21.0, 22.0]
+    assert frames["Concepcion"]["latitude"].iloc[0] == -36.82
+    assert frames["Antofagasta"]["temp_max"].tolist() == [30.0, 31.0]
+
+
+def test_fetch_historical_batch_skips_failed_batch(fake_api):
+    def handler(url, params):
+        if params["latitude"].startswith("-33.45"):
+            raise requests.ConnectionError("boom")
+        return _api_item(15.0)
+
+    fake_api(handler)
+    frames = fetch_historical_batch(LOCATIONS, days=30, batch_size=2)
+
+    assert list(frames) == ["Antofagasta"]
+
+
+def test_fetch_historical_batch_sizes_batches_to_rate_limit(fake_api):
+    from src.config.settings import API_RATE_LIMITS
+    from src.etl.client import request_weight
+
+    locations = {f"Ciudad {i}": (-30.0 - i / 10, -71.0) for i in range(50)}
+    client = fake_api(
+        lambda url, params: [_api_item(10.0)] * len(params["latitude"].split(","))
+    )
+
+    frames = fetch_historical_batch(locations, days=365)
+
+    assert len(frames) == 50
+    assert len(client.calls) > 1
+    limit = min(API_RATE_LIMITS.values())
+    assert all(request_weight(params) <= limit for params in client.calls)
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.etl.transform import clean_and_transform
+from src.modeling.global_model import (
+    DESCRIPTOR_FEATURES,
+    build_global_frame,
+    date_splits,
+    forecast_global,
+    load_global_payload,
+    train_global_model,
+)
+from src.modeling.predict import forecast_future
+from src.utils.locations import LocationCatalog
+from src.utils.synthetic import synthetic_dataset, synthetic_locations
+
+
+@pytest.fixture
+def histories():
+    raw = synthetic_dataset(n_locations=3, years=1)
+    return {name: clean_and_transform(df) for name, df in raw.items()}
+
+
+@pytest.fixture
+def catalog():
+    locations = synthetic_locations(3)
+    names = list(locations)
+    lat, lon = zip(*locations.values())
+    return LocationCatalog(names, lat, lon, [10.0, np.nan, 300.0])
+
+
+def test_build_global_frame_stacks_locations(histories, catalog):
+    X, y, locations, dates, features, descriptors = build_global_frame(
+        histories, catalog
+    )
+
+    assert features[-len(DESCRIPTOR_FEATURES) :] == DESCRIPTOR_FEATURES
+    assert set(locations) == set(histories)
+    assert len(X) == len(y) == len(locations)
+    # orden temporal entre ubicaciones (TimeSeriesSplit): dia a dia, no ciudad a ciudad
+    assert locations.iloc[:3].nunique() == 3
+    assert X.groupby(locations.to_numpy())["latitude"].nunique().eq(1).all()
+    name = list(histories)[1]
+    assert descriptors[name]["elevation"] == 0.0
+    assert descriptors[name]["clim_temp_amplitude"] > 0
+
+
+def test_date_splits_cut_on_date_changes(histories, catalog):
+    _, _, locations, dates, _, _ = build_global_frame(histories, catalog)
+    splits = date_splits(dates)
+
+    assert len(splits) == 3
+    for train_idx, test_idx in splits:
+        # ningun dia queda repartido entre train y test
+        assert dates.iloc[train_idx].max() < dates.iloc[test_idx].min()
+        assert set(locations.iloc[test_idx]) == set(histories)
+
+
+def test_train_and_forecast_global(tmp_data_dir, histories, catalog):
+    metrics, files = train_global_model(histories, catalog)
+
+    assert set(metrics["MAE_by_location"]) == set(histories)
+    assert all(Path(f).exists() for f in files)
+
+    payload = load_global_payload()
+    assert payload["global"] is True
+    forecasts = forecast_global(payload, histories, catalog, days_ahead=4)
+
+    assert set(forecasts) == set(histories)
+    # el lote da lo mismo que el forecast de a una ubicacion
+    name = list(histories)[2]
+    single = forecast_future(
+        payload,
+        histories[name].assign(
+            **{c: np.float32(v) for c, v in payload["descriptors"][name].items()}
+        ),
+        days_ahead=4,
+    )
+    pd.testing.assert_frame_equal(forecasts[name], single)
+
+
+def test_train_global_skips_cities_without_data(tmp_data_dir, monkeypatch, histories):
+    import main
+    from src.etl.transform import save_processed_data
+    from src.modeling.global_model import GLOBAL_MODEL_NAME
+
+    names = list(histories)
+    for name in names[:2]:
+        save_processed_data(histories[name], name)
+    lat, lon = zip(*(synthetic_locations(3)[n] for n in names))
+    monkeypatch.setattr(main, "CITIES", LocationCatalog(names, lat, lon))
+
+    # la tercera ciudad "termino bien" pero sin datos procesados (primer run sin datos)
+    errors = {name: None for name in names}
+    main._train_global(errors)
+
+    assert errors[GLOBAL_MODEL_NAME] is None
+    assert set(load_global_payload()["descriptors"]) == set(names[:2])
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from src.etl.hourly import aggregate_daily, build_hourly_frame, fetch_daily_from_hourly
+from src.etl.standin import respond
+from src.etl.storage import load_dataset
+from src.modeling.train import prepare_training_data
+from src.utils.synthetic import hourly_from_daily, synthetic_weather
+
+
+def test_aggregate_daily_recovers_daily_columns():
+    daily = synthetic_weather(-41.47, -72.94, days=20, missing_rate=0)
+    hourly = hourly_from_daily(daily)
+    # un dia incompleto al final (borde de la ventana) se descarta
+    hourly = hourly.iloc[:-10]
+
+    result = aggregate_daily(hourly)
+
+    assert len(result) == 19
+    for col in ["temp_max", "temp_min", "relative_humidity_min", "dew_point_max"]:
+        np.testing.assert_allclose(result[col], daily[col].iloc[:19], rtol=1e-6)
+    np.testing.assert_allclose(result["precipitation"], daily["precipitation"].iloc[:19], atol=1e-4)
+    np.testing.assert_allclose(
+        result["shortwave_radiation_sum"], daily["shortwave_radiation_sum"].iloc[:19], rtol=1e-5
+    )
+    assert (result["temp_max_hour"] == 15).all()
+    rainy = daily["precipitation"].iloc[:19].to_numpy() > 0
+    assert (result["precip_hours"][rainy] >= 1).all()
+    assert (result["precip_hours"][~rainy] == 0).all()
+    assert result["temp_max"].dtype == "float32"
+
+
+def test_build_hourly_frame_uses_local_days():
+    # 04:00 UTC = 00:00 en Santiago (UTC-4 en invierno)
+    start = int(pd.Timestamp("2024-07-01 04:00", tz="UTC").timestamp())
+    data = {
+        "timezone": "America/Santiago",
+        "utc_offset_seconds": -14400,
+        "hourly": {
+            "time": [start + 3600 * h for h in range(24)],
+            "temperature_2m": [10.0] * 23 + [None],
+        },
+    }
+
+    hourly = build_hourly_frame(data)
+
+    assert hourly["time"].iloc[0] == pd.Timestamp("2024-07-01 00:00")
+    assert np.isnan(hourly["temp"].iloc[-1])
+    daily = aggregate_daily(hourly)
+    assert daily["date"].tolist() == [pd.Timestamp("2024-07-01")]
+    assert daily["temp_max"].iloc[0] == 10.0
+
+
+def test_fetch_daily_from_hourly_stores_hours(tmp_data_dir, fake_api):
+    # el stand-in recibe los parametros como texto, igual que por HTTP
+    fake_api(lambda url, params: respond(url, {k: str(v) for k, v in params.items()}))
+
+    daily = fetch_daily_from_hourly("Santiago", -33.45, -70.66, days_back=30)
+    hourly = load_dataset("Santiago", "hourly")
+
+    assert len(daily) == 31
+    assert len(hourly) == 31 * 24
+    assert {"precip_hours", "pressure_tendency"} <= set(daily.columns)
+
+    last_day = hourly["time"].max().normalize()
+    tail = load_dataset("Santiago", "hourly", start=last_day, end=last_day)
+    assert len(tail) == 24
+
+
+def test_prepare_training_data_uses_intraday_features(sample_clean_df):
+    df = sample_clean_df.copy()
+    df["precip_hours"] = np.float32(2)
+    df["pressure_tendency"] = np.float32(-1.5)
+
+    _, _, features = prepare_training_data(df)
+
+    assert {"precip_hours", "pressure_tendency"} <= set(features)
+    assert "temp_max_hour" not in features
+
+
+def test_save_hourly_data_keeps_repeated_dst_hour(tmp_data_dir):
+    from src.etl.hourly import save_hourly_data
+
+    # fin del horario de verano 2024: a las 00:00 del 7/4 (UTC-3) vuelve a ser
+    # 23:00 del 6/4 (UTC-4); el 6/4 local tiene 25 horas
+    start = int(pd.Timestamp("2024-04-06 03:00", tz="UTC").timestamp())
+    data = {
+        "timezone": "America/Santiago",
+        "hourly": {
+            "time": [start + 3600 * h for h in range(25)],
+            "temperature_2m": [float(h) for h in range(25)],
+        },
+    }
+    hourly = build_hourly_frame(data)
+    assert hourly["time"].duplicated().sum() == 1
+
+    save_hourly_data(hourly, "Santiago")
+    # una ingesta incremental que repite la ventana no pierde la hora repetida
+    save_hourly_data(hourly.tail(3), "Santiago", replace=False)
+    stored = load_dataset("Santiago", "hourly")
+
+    assert len(stored) == 25
+    daily = aggregate_daily(stored)
+    assert daily["date"].tolist() == [pd.Timestamp("2024-04-06")]
+    assert daily["temp_max"].iloc[0] == 24.0
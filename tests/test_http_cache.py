@@ -0,0 +1,91 @@
+import time
+from datetime import date, timedelta
+
+from src.etl import http_cache
+from src.etl.http_cache import ResponseCache, get_json, normalize_params, request_key, ttl_for
+from src.etl.standin import respond
+
+ARCHIVE = "https://archive-api.open-meteo.com/v1/archive"
+
+
+def test_request_key_ignores_formatting_and_order():
+    a = {"latitude": -33.45, "longitude": -70.66, "daily": "temperature_2m_max,precipitation_sum"}
+    b = {"daily": "precipitation_sum,temperature_2m_max", "longitude": "-70.6600", "latitude": "-33.450"}
+
+    assert normalize_params(a) == normalize_params(b)
+    assert request_key(ARCHIVE, a) == request_key("http://127.0.0.1:8099/v1/archive", b)
+    assert request_key(ARCHIVE, a) != request_key("https://api.open-meteo.com/v1/forecast", a)
+
+
+def test_archive_ttl_depends_on_end_date():
+    old = {"end_date": str(date.today() - timedelta(days=400))}
+    recent = {"end_date": str(date.today() - timedelta(days=1))}
+
+    assert ttl_for(ARCHIVE, old) is None
+    assert ttl_for(ARCHIVE, recent) == http_cache.HTTP_CACHE_TTL_ARCHIVE_S
+    assert ttl_for("https://api.open-meteo.com/v1/forecast", recent) == http_cache.HTTP_CACHE_TTL_FORECAST_S
+
+
+def test_get_json_serves_repeats_from_disk(tmp_path, monkeypatch, fake_api):
+    calls = fake_api(lambda url, params: {"daily": {"time": ["2025-01-01"]}}).calls
+    cache = ResponseCache(tmp_path)
+    params = {"latitude": -33.45, "longitude": -70.66, "end_date": str(date.today())}
+
+    first = get_json(ARCHIVE, params, timeout=5, cache=cache)
+    second = get_json(ARCHIVE, params, timeout=5, cache=cache)
+    assert first == second and len(calls) == 1
+    assert list(tmp_path.rglob("*.json.gz"))
+
+    # vencido el TTL se vuelve a pedir
+    later = time.time() + 30 * 24 * 3600
+    monkeypatch.setattr(http_cache.time, "time", lambda: later)
+    get_json(ARCHIVE, params, timeout=5, cache=cache)
+    assert len(calls) == 2
+
+
+def test_standin_is_consistent_across_windows(tmp_path):
+    day = date.today() - timedelta(days=40)
+    base = {"latitude": "-33.45", "longitude": "-70.66", "daily": "temperature_2m_max,weathercode"}
+    short = respond("/v1/archive", {**base, "start_date": str(day), "end_date": str(day)})
+    long = respond(
+        "/v1/archive",
+        {**base, "start_date": str(day - timedelta(days=30)), "end_date": str(day)},
+    )
+
+    assert short["daily"]["time"] == [str(day)]
+    assert short["daily"]["temperature_2m_max"][0] == long["daily"]["temperature_2m_max"][-1]
+
+    batch = respond(
+        "/v1/archive",
+        {**base, "latitude": "-33.45,-41.47", "longitude": "-70.66,-72.94",
+         "start_date": str(day), "end_date": str(day)},
+    )
+    assert isinstance(batch, list) and len(batch) == 2
+    assert batch[0]["daily"] == short["daily"]
+
+    # una grabacion tiene prioridad sobre los datos sinteticos
+    params = {**base, "start_date": str(day), "end_date": str(day)}
+    ResponseCache(tmp_path).put(ARCHIVE, params, {"recorded": True})
+    assert respond("/v1/archive", params, ResponseCache(tmp_path)) == {"recorded": True}
+
+
+def test_standin_extends_series_when_the_day_changes(monkeypatch):
+    from src.etl import standin
+
+    today = date.today()
+
+    class _Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return today + timedelta(days=3)
+
+    base = {"latitude": "-20.21", "longitude": "-70.15", "daily": "temperature_2m_max"}
+    before = respond("/v1/forecast", {**base, "forecast_days": "16"})
+    monkeypatch.setattr(standin, "date", _Tomorrow)
+    after = respond("/v1/forecast", {**base, "forecast_days": "16"})
+
+    assert len(after["daily"]["time"]) == 16
+    assert after["daily"]["time"][-1] == str(today + timedelta(days=18))
+    # los dias ya servidos no cambian
+    overlap = before["daily"]["temperature_2m_max"][3:]
+    assert after["daily"]["temperature_2m_max"][:13] == overlap
@@ -27,3 +27,74 @@ def test_permutation_importance_returns_structured(sample_clean_df):
     top_feat = list(result["importance"].keys())[0]
     assert "mean" in result["importance"][top_feat]
     assert "std" in result["importance"][top_feat]
+
+
+def test_feature_groups_bundle_lags_with_source():
+    from src.analysis.importance import feature_groups
+
+    groups = feature_groups(
+        ["precipitation", "temp_avg_lag_1", "temp_avg_rolling_3", "month"]
+    )
+    assert groups == {
+        "precipitation": ["precipitation"],
+        "temp_avg": ["temp_avg_lag_1", "temp_avg_rolling_3"],
+        "month": ["month"],
+    }
+
+
+def test_native_contributions_cover_all_rows(sample_clean_df):
+    from src.analysis.importance import compute_native_contributions
+    from src.modeling.train import _make_model, prepare_training_data
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    model = _make_model().fit(X, y)
+    result = compute_native_contributions(model, X)
+
+    assert set(result["importance"]) == set(X.columns)
+    if hasattr(model, "get_booster"):
+        assert result["n_samples"] == len(X)
+
+
+def test_native_contributions_budget_uses_large_chunks(sample_clean_df):
+    from src.analysis.importance import compute_native_contributions
+    from src.modeling.train import _make_model, prepare_training_data
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    model = _make_model().fit(X, y)
+    if not hasattr(model, "get_booster"):
+        pytest.skip("requiere xgboost")
+
+    # sin presupuesto restante igual se calcula el primer bloque (1/n_chunks)
+    result = compute_native_contributions(model, X, time_budget=0, n_chunks=4)
+    assert result["truncated"]
+    assert result["n_samples"] == -(-len(X) // 4)
+
+
+def test_run_feature_importance_passes_time_budget(sample_clean_df):
+    from src.analysis.importance import run_feature_importance
+    from src.modeling.train import _make_model, prepare_training_data
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    model = _make_model().fit(X, y)
+
+    report = run_feature_importance(model, X, y, mode="fast", time_budget=None)
+    assert not report["permutation"]["truncated"]
+
+
+def test_grouped_permutation_respects_budget(sample_clean_df):
+    from src.analysis.importance import compute_grouped_permutation_importance
+    from src.modeling.train import _make_model, prepare_training_data
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    model = _make_model().fit(X, y)
+
+    full = compute_grouped_permutation_importance(model, X, y, n_repeats=2, max_rows=20)
+    assert full["n_rows"] == 20 and not full["truncated"]
+    assert "temp_avg" in full["importance"]
+    assert all(v["n_repeats"] == 2 for v in full["importance"].values())
+
+    # el presupuesto se revisa entre rondas: la primera siempre cubre todos los grupos
+    cut = compute_grouped_permutation_importance(model, X, y, time_budget=0)
+    assert cut["truncated"]
+    assert set(cut["importance"]) == set(full["importance"])
+    assert all(v["n_repeats"] == 1 for v in cut["importance"].values())
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from src.etl.extract import archive_window
+from src.etl.incremental import (
+    compute_watermark,
+    load_watermark,
+    merge_history,
+    plan_fetch_range,
+    save_watermark,
+)
+
+
+def test_merge_history_prefers_new_rows(sample_weather_df):
+    existing = sample_weather_df.iloc[:40]
+    new = sample_weather_df.iloc[35:].copy()
+    new["temp_max"] = 99.0
+
+    merged = merge_history(existing, new)
+    assert len(merged) == len(sample_weather_df)
+    assert merged["date"].is_monotonic_increasing
+    assert (merged.iloc[35:]["temp_max"] == 99.0).all()
+
+
+def test_compute_watermark_skips_unpublished_days(sample_weather_df):
+    df = sample_weather_df.copy()
+    df.loc[df.index[-2:], ["temp_max", "temp_min"]] = None
+    assert compute_watermark(df) == date(2025, 2, 27)
+
+
+def test_watermark_roundtrip(tmp_data_dir):
+    assert load_watermark("Santiago") is None
+    save_watermark("Santiago", date(2025, 3, 1))
+    assert load_watermark("Santiago") == date(2025, 3, 1)
+
+
+def test_plan_fetch_range():
+    window_start, window_end = archive_window(365)
+    assert plan_fetch_range(None, 365) == (window_start, window_end)
+    assert plan_fetch_range(window_end, 365) is None
+
+    recent = window_end - timedelta(days=2)
+    assert plan_fetch_range(recent, 365) == (window_end - timedelta(days=1), window_end)
+
+    stale = window_start - timedelta(days=100)
+    assert plan_fetch_range(stale, 365) == (window_start, window_end)
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from src.utils import instrumentation
+from src.utils.instrumentation import RunRecorder, annotate, finish_run, stage, start_run
+
+
+def test_stage_without_run_is_noop():
+    with stage("clean", "Santiago", rows=3) as record:
+        record["extra"] = 1
+    assert instrumentation.current_run() is None
+
+
+def test_run_records_nested_stages_and_writes_report(tmp_data_dir):
+    start_run("train")
+    with stage("modeling", "Santiago", rows=100):
+        with stage("train") as record:
+            annotate(cv_s=0.5)
+            record["rows"] = 90
+            sum(i * i for i in range(10_000))
+    with pytest.raises(ValueError):
+        with stage("fetch", "Antofagasta"):
+            raise ValueError("sin red")
+    written = finish_run()
+
+    report = json.loads(open(written["report"], encoding="utf-8").read())
+    stages = {(s["stage"], s["city"]): s for s in report["stages"]}
+
+    train = stages[("train", "Santiago")]
+    assert train["parent"] == "modeling"
+    assert train["rows"] == 90 and train["cv_s"] == 0.5
+    assert train["wall_s"] >= 0 and train["cpu_s"] >= 0 and train["peak_rss_mb"] > 0
+    assert stages[("fetch", "Antofagasta")]["error"] == "ValueError: sin red"
+    assert report["summary"]["modeling"]["rows"] == 100
+
+    prom = open(written["metrics"], encoding="utf-8").read()
+    assert '# TYPE weather_pipeline_stage_wall_seconds gauge' in prom
+    assert 'stage_rows{command="train",stage="train",city="Santiago"} 90' in prom
+    assert instrumentation.current_run() is None
+
+
+def test_merge_adds_worker_stages():
+    parent = RunRecorder("train")
+    parent.merge({"stages": [{"stage": "train", "city": "Santiago", "wall_s": 2.0, "pid": 1}]})
+    parent.merge({"stages": [{"stage": "train", "city": "Concepcion", "wall_s": 1.0, "pid": 2}]})
+
+    assert parent.summary()["train"] == {"count": 2, "wall_s": 3.0, "cpu_s": 0.0, "rows": 0}
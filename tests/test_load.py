@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from src.etl.load import read_from_database, save_to_database
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path}/weather.db")
+
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def test_save_to_database_is_idempotent(engine, sample_clean_df):
+    save_to_database(sample_clean_df, "santiago_weather", engine, location="santiago")
+    save_to_database(sample_clean_df, "santiago_weather", engine, location="santiago")
+    assert _count(engine, "santiago_weather") == len(sample_clean_df)
+
+    indexes = {ix["name"] for ix in inspect(engine).get_indexes("santiago_weather")}
+    assert {"ux_santiago_weather_location_date", "ix_santiago_weather_date"} <= indexes
+
+
+def test_save_to_database_updates_existing_rows(engine, sample_clean_df):
+    save_to_database(sample_clean_df, "santiago_weather", engine, location="santiago")
+
+    updated = sample_clean_df.tail(5).copy()
+    updated["temp_max"] = 99.0
+    save_to_database(updated, "santiago_weather", engine, location="santiago")
+
+    df = read_from_database("santiago_weather", engine, columns=["date", "temp_max"])
+    assert len(df) == len(sample_clean_df)
+    assert (df["temp_max"].tail(5) == 99.0).all()
+    assert (df["temp_max"].head(5) != 99.0).all()
+
+
+def test_save_to_database_replaces_legacy_table(engine, sample_clean_df):
+    sample_clean_df.to_sql("santiago_weather", engine, index=False)
+    sample_clean_df.to_sql("santiago_weather", engine, index=False, if_exists="append")
+
+    save_to_database(sample_clean_df, "santiago_weather", engine, location="santiago")
+    assert _count(engine, "santiago_weather") == len(sample_clean_df)
+
+
+def test_read_from_database_pushes_range_and_columns(engine, sample_clean_df):
+    save_to_database(sample_clean_df, "santiago_weather", engine, location="santiago")
+
+    df = read_from_database(
+        "santiago_weather",
+        engine,
+        columns=["date", "temp_avg"],
+        start="2025-01-10",
+        end="2025-01-19",
+    )
+    assert list(df.columns) == ["date", "temp_avg"]
+    assert len(df) == 10
+    assert df["date"].min() == pd.Timestamp("2025-01-10")
+    assert df["date"].max() == pd.Timestamp("2025-01-19")
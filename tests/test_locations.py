@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.utils.locations import LocationCatalog, grid_catalog, load_catalog, trained_catalog
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    path = tmp_path / "locations.csv"
+    path.write_text(
+        "name,latitude,longitude,elevation,region\n"
+        "Santiago,-33.45,-70.66,570,Metropolitana\n"
+        "Puerto Montt,-41.47,-72.94,,Los Lagos\n"
+        "Arica,-18.48,-70.31,2,Arica y Parinacota\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_catalog_behaves_like_the_cities_mapping(catalog_csv):
+    catalog = load_catalog(catalog_csv)
+
+    assert len(catalog) == 3
+    assert list(catalog) == ["Santiago", "Puerto Montt", "Arica"]
+    assert catalog["Puerto Montt"] == (-41.47, -72.94)
+    assert dict(catalog.items())["Arica"] == (-18.48, -70.31)
+    assert catalog.resolve("puerto_montt") == "Puerto Montt"
+    assert catalog.resolve("Lima") is None
+    assert catalog.elevation("Santiago") == 570
+    assert np.isnan(catalog.elevation("Puerto Montt"))
+
+
+def test_catalog_rejects_invalid_files(tmp_path):
+    bad = tmp_path / "bad.csv"
+    bad.write_text("name,lat\nSantiago,-33.45\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="faltan columnas"):
+        load_catalog(bad)
+
+    dup = tmp_path / "dup.csv"
+    dup.write_text("name,latitude,longitude\nA,1,1\nA,2,2\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="repetidos"):
+        load_catalog(dup)
+
+    with pytest.raises(FileNotFoundError):
+        load_catalog(tmp_path / "missing.csv")
+
+
+def test_nearest_uses_geodesic_distance(catalog_csv):
+    catalog = load_catalog(catalog_csv)
+
+    (name, km), = catalog.nearest(-33.04, -71.62)
+    assert name == "Santiago" and 80 < km < 120
+    ranked = catalog.nearest(-40.0, -73.0, k=5)
+    assert [n for n, _ in ranked] == ["Puerto Montt", "Santiago", "Arica"]
+    assert catalog.nearest(-33.45, -70.66)[0][1] == pytest.approx(0, abs=1e-3)
+
+
+def test_grid_catalog_roundtrip(tmp_path):
+    grid = grid_catalog(1.0, lat_range=(-34, -33), lon_range=(-71, -70))
+    assert len(grid) == 4
+    assert grid.nearest(-33.1, -70.9)[0][0] == "Grilla -33.00 -71.00"
+
+    path = grid.to_csv(tmp_path / "grid.csv")
+    assert list(load_catalog(path)) == list(grid)
+
+
+def test_trained_catalog_only_keeps_locations_with_models(tmp_data_dir):
+    catalog = LocationCatalog.from_dict({"Santiago": (-33.45, -70.66), "Arica": (-18.48, -70.31)})
+    model_dir = tmp_data_dir / "santiago" / "models"
+    model_dir.mkdir(parents=True)
+    (model_dir / "santiago_temp_model.pkl").write_bytes(b"")
+
+    trained = trained_catalog(catalog)
+
+    assert list(trained) == ["Santiago"]
+    assert trained.nearest(-18.5, -70.3)[0][0] == "Santiago"
+    assert not (tmp_data_dir / "arica").exists()
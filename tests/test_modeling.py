@@ -46,3 +46,73 @@ def test_evaluate_model_returns_metrics(sample_clean_df):
 def test_prepare_training_data_empty_df():
     with pytest.raises(ValueError, match="vacio"):
         prepare_training_data(pd.DataFrame())
+
+
+def test_prepare_direct_training_data_shifts_targets(sample_clean_df):
+    from src.modeling.train import prepare_direct_training_data
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    X_direct, Y_direct, features = prepare_direct_training_data(sample_clean_df, 3)
+
+    assert list(Y_direct.columns) == ["temp_avg_h1", "temp_avg_h2", "temp_avg_h3"]
+    assert len(X_direct) == len(X) - 2
+    assert Y_direct["temp_avg_h1"].iloc[0] == y.iloc[0]
+    assert Y_direct["temp_avg_h3"].iloc[0] == y.iloc[2]
+
+
+def test_train_and_evaluate_matches_evaluate_model_format(sample_clean_df):
+    from src.modeling.engine import train_and_evaluate
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    model, metrics, y_true, y_pred = train_and_evaluate(X, y, n_jobs=2)
+    ref_metrics, ref_true, _ = evaluate_model(X, y)
+
+    assert set(metrics) == set(ref_metrics)
+    assert len(y_true) == len(y_pred) == len(ref_true)
+    np.testing.assert_array_equal(y_true, ref_true)
+    assert len(model.predict(X)) == len(X)
+
+
+def test_train_and_evaluate_without_final_fit(sample_clean_df):
+    from src.modeling.engine import train_and_evaluate
+
+    X, y, _ = prepare_training_data(sample_clean_df)
+    model, metrics, _, _ = train_and_evaluate(X, y, fit_final=False)
+    assert model is None
+    assert metrics["MAE"] >= 0
+
+
+def test_evaluate_direct_model_reports_all_horizons(sample_clean_df):
+    from src.modeling.train import evaluate_direct_model, prepare_direct_training_data
+
+    X, Y, _ = prepare_direct_training_data(sample_clean_df, 3)
+    metrics, y_true, y_pred = evaluate_direct_model(X, Y, n_jobs=1)
+
+    assert set(metrics["MAE_by_horizon"]) == {"h1", "h2", "h3"}
+    assert y_true.shape == y_pred.shape and y_true.shape[1] == 3
+    assert metrics["MAE"] == round(float(abs(y_true - y_pred).mean()), 2)
+
+
+def test_prepare_direct_training_data_targets_follow_dates(sample_clean_df):
+    from src.modeling.train import prepare_direct_training_data
+
+    df = sample_clean_df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    # un dia intermedio se pierde en dropna (columna sin lags)
+    df.loc[30, "windspeed_10m_max"] = np.nan
+    gap = df.loc[30, "date"]
+
+    X_direct, Y_direct, _ = prepare_direct_training_data(df, 3)
+
+    temps = df.set_index("date")["temp_avg"]
+    offsets = pd.to_timedelta(X_direct["day_of_year"] - 1, unit="D")
+    days = pd.Timestamp("2025-01-01") + offsets
+    for h in (1, 2, 3):
+        target_days = days + pd.Timedelta(days=h - 1)
+        # el target es temp_avg de d+h-1, nunca el de un dia posterior
+        assert (target_days != gap).all()
+        np.testing.assert_array_equal(
+            Y_direct[f"temp_avg_h{h}"].to_numpy(), temps[target_days].to_numpy()
+        )
+    # las filas cuyo h2/h3 cae en el dia faltante se descartan
+    assert len(X_direct) == len(prepare_training_data(df)[0]) - 2 - 2
@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.visualization.plots import decimate_max, decimate_minmax
+from src.visualization.renderer import PlotRenderer
+
+
+def test_decimate_minmax_keeps_extremes_in_order():
+    x = np.arange(10_000)
+    y = np.sin(x / 50.0) + (x == 1234) * 5.0
+
+    xd, yd = decimate_minmax(x, y, buckets=500)
+
+    assert len(xd) <= 1000
+    assert np.all(np.diff(xd) > 0)
+    assert yd.max() == y.max()
+    assert yd.min() == y.min()
+
+
+def test_decimate_max_keeps_peak():
+    x = np.arange(5000)
+    y = np.zeros(5000)
+    y[4321] = 80.0
+
+    xd, yd = decimate_max(x, y, buckets=100)
+
+    assert len(xd) == 100
+    assert yd.max() == 80.0
+
+
+def test_renderer_skips_unchanged_plot(tmp_data_dir, sample_clean_df, monkeypatch):
+    import src.visualization.plots as plots
+
+    calls = []
+    original = plots.plot_precipitation
+
+    def counting(df, city_name):
+        calls.append(len(df))
+        return original(df, city_name)
+
+    monkeypatch.setattr(plots, "plot_precipitation", counting)
+    renderer = PlotRenderer(workers=0)
+
+    renderer.submit("precipitation", "Test City", sample_clean_df)
+    renderer.submit("precipitation", "Test City", sample_clean_df)
+    assert len(calls) == 1
+    assert (tmp_data_dir / "test_city" / "plots" / "precipitation.png").exists()
+
+    changed = sample_clean_df.copy()
+    changed.loc[changed.index[-1], "precipitation"] += 1
+    renderer.submit("precipitation", "Test City", changed)
+    assert len(calls) == 2
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from src.modeling.predict import compile_feature_plan, forecast_future
+from src.modeling.train import _make_model, prepare_training_data
+
+
+@pytest.fixture
+def model_payload(sample_clean_df):
+    X, y, features = prepare_training_data(sample_clean_df)
+    model = _make_model()
+    model.fit(X, y)
+    return {"model": model, "features": features}
+
+
+def test_compile_feature_plan(model_payload):
+    plan = compile_feature_plan(model_payload["features"])
+    assert plan.depth == 7
+    assert "precipitation" in plan.base_features
+    assert "temp_avg_lag_1" not in plan.base_features
+    assert "month" not in plan.base_features
+    assert plan.columns[0] == "temp_avg"
+
+
+def test_forecast_future_dates(model_payload, sample_clean_df):
+    forecast = forecast_future(model_payload, sample_clean_df, days_ahead=5)
+    assert len(forecast) == 5
+    assert forecast["date"].iloc[0] == pd.Timestamp("2025-03-02")
+    assert forecast["predicted_temp_avg"].notna().all()
+
+
+def test_forecast_future_only_needs_recent_window(model_payload, sample_clean_df):
+    plan = compile_feature_plan(model_payload["features"])
+    full = forecast_future(model_payload, sample_clean_df, days_ahead=10)
+    tail = forecast_future(
+        model_payload, sample_clean_df.tail(plan.depth), days_ahead=10
+    )
+    pd.testing.assert_frame_equal(full, tail)
+
+
+def test_forecast_future_missing_base_feature(model_payload, sample_clean_df):
+    with pytest.raises(ValueError, match="features base faltantes"):
+        forecast_future(
+            model_payload, sample_clean_df.drop(columns=["precipitation"])
+        )
+
+
+def test_forecast_future_batch_skips_invalid_locations(model_payload, sample_clean_df):
+    from src.modeling.predict import forecast_future_batch
+
+    histories = {
+        "Santiago": sample_clean_df,
+        "Concepcion": sample_clean_df.drop(columns=["precipitation"]),
+    }
+    forecasts = forecast_future_batch(model_payload, histories, days_ahead=3)
+
+    assert list(forecasts) == ["Santiago"]
+    pd.testing.assert_frame_equal(
+        forecasts["Santiago"], forecast_future(model_payload, sample_clean_df, 3)
+    )
+
+
+def test_forecast_future_direct_strategy(sample_clean_df):
+    from src.modeling.train import prepare_direct_training_data, train_direct_model
+
+    X, Y, features = prepare_direct_training_data(sample_clean_df, 3)
+    payload = {
+        "model": train_direct_model(X, Y, n_jobs=1),
+        "features": features,
+        "strategy": "direct",
+        "horizons": 3,
+    }
+
+    forecast = forecast_future(payload, sample_clean_df, days_ahead=3)
+    assert len(forecast) == 3
+    assert forecast["date"].iloc[-1] == pd.Timestamp("2025-03-04")
+
+    with pytest.raises(ValueError, match="cubre 3 dias"):
+        forecast_future(payload, sample_clean_df, days_ahead=4)
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from src.etl.schema import (
+    compact_frame,
+    frame_memory_mb,
+    load_location_metadata,
+    save_location_metadata,
+)
+
+
+def test_compact_frame_dtypes(sample_weather_df):
+    raw = sample_weather_df.copy()
+    raw["date"] = raw["date"].dt.strftime("%Y-%m-%d")
+    raw["weather_code"] = raw["weather_code"].astype("float64")
+    raw.loc[2, "weather_code"] = None
+
+    df = compact_frame(raw)
+
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df["temp_max"].dtype == "float32"
+    assert df["weather_code"].dtype == "Int16"
+    assert df["weather_code"].isna().sum() == 1
+    assert "latitude" not in df.columns and "longitude" not in df.columns
+    assert frame_memory_mb(df) < frame_memory_mb(raw) / 2
+
+
+def test_location_metadata_roundtrip(tmp_data_dir):
+    assert load_location_metadata("Santiago") is None
+    save_location_metadata("Santiago", -33.45, -70.66)
+    meta = load_location_metadata("Santiago")
+    assert (meta["latitude"], meta["longitude"]) == (-33.45, -70.66)
@@ -0,0 +1,139 @@
+import json
+import threading
+from urllib.request import urlopen
+
+import pytest
+
+from src.serving.cache import ModelCache, artifact_stamp
+from src.serving.server import make_server
+from src.utils.locations import LocationCatalog
+
+
+class _FakeLoader:
+    def __init__(self, nbytes=100):
+        self.nbytes = nbytes
+        self.calls = []
+
+    def __call__(self, city):
+        self.calls.append(city)
+        return {"city": city, "nbytes": self.nbytes}
+
+
+def test_artifact_stamp_sees_partition_rewrites(tmp_data_dir, sample_clean_df):
+    from src.etl.storage import save_dataset
+
+    save_dataset(sample_clean_df, "Santiago", "processed")
+    before = artifact_stamp("Santiago")
+    # reescritura de un año existente (ETL por streaming)
+    save_dataset(sample_clean_df.tail(5), "Santiago", "processed", replace=False)
+
+    assert artifact_stamp("Santiago") != before
+
+
+def test_model_cache_reuses_entries():
+    loader = _FakeLoader()
+    cache = ModelCache(1000, loader=loader, stamp=lambda city: (1,))
+    cache.get("Santiago")
+    cache.get("Santiago")
+    assert loader.calls == ["Santiago"]
+
+
+def test_model_cache_evicts_least_recently_used():
+    loader = _FakeLoader(nbytes=400)
+    cache = ModelCache(1000, loader=loader, stamp=lambda city: (1,))
+    cache.get("Santiago")
+    cache.get("Concepcion")
+    cache.get("Santiago")
+    cache.get("Antofagasta")
+
+    assert "Concepcion" not in cache
+    assert "Santiago" in cache and "Antofagasta" in cache
+    assert cache.total_bytes <= 1000
+
+
+def test_model_cache_reloads_when_artifact_changes():
+    loader = _FakeLoader()
+    stamps = {"Santiago": (1,)}
+    cache = ModelCache(1000, loader=loader, stamp=lambda city: stamps[city])
+    cache.get("Santiago")
+    stamps["Santiago"] = (2,)
+    cache.get("Santiago")
+    assert loader.calls == ["Santiago", "Santiago"]
+
+
+def test_handle_forecast_rejects_days_beyond_direct_horizons():
+    from src.serving.server import ForecastRequestError, handle_forecast
+
+    entry = {"payload": {"strategy": "direct", "horizons": 3}, "history": None}
+    cache = ModelCache(1000, loader=lambda city: entry, stamp=lambda city: (1,))
+    with pytest.raises(ForecastRequestError, match="entre 1 y 3"):
+        handle_forecast(cache, "Santiago", 5)
+
+
+def test_model_cache_loads_outside_global_lock():
+    release = threading.Event()
+    loader = _FakeLoader()
+
+    def slow_loader(city):
+        if city == "Lento":
+            release.wait(5)
+        return loader(city)
+
+    cache = ModelCache(1000, loader=slow_loader, stamp=lambda city: (1,))
+    cache.get("Santiago")
+    threads = [threading.Thread(target=cache.get, args=("Lento",)) for _ in range(3)]
+    for t in threads:
+        t.start()
+
+    # con "Lento" cargando, una ciudad ya cacheada responde sin esperar
+    assert cache.get("Santiago")["city"] == "Santiago"
+    release.set()
+    for t in threads:
+        t.join()
+    # los misses concurrentes de la misma ciudad cargan una sola vez
+    assert loader.calls.count("Lento") == 1
+
+
+@pytest.fixture
+def running_server(sample_clean_df):
+    from src.modeling.predict import compile_feature_plan
+    from src.modeling.train import _make_model, prepare_training_data
+
+    X, y, features = prepare_training_data(sample_clean_df)
+    model = _make_model()
+    model.fit(X, y)
+    payload = {"model": model, "features": features}
+    payload["plan"] = compile_feature_plan(features)
+    entry = {"payload": payload, "history": sample_clean_df, "nbytes": 1}
+
+    cache = ModelCache(1000, loader=lambda city: entry, stamp=lambda city: (1,))
+    locations = LocationCatalog.from_dict({"Santiago": (-33.45, -70.66), "Concepcion": (-36.82, -73.05)})
+    server = make_server(cache, host="127.0.0.1", port=0, locations=locations)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_forecast_endpoint(running_server):
+    with urlopen(f"{running_server}/forecast?city=santiago&days=2") as resp:
+        body = json.loads(resp.read())
+    assert body["city"] == "Santiago"
+    assert [row["date"] for row in body["forecast"]] == ["2025-03-02", "2025-03-03"]
+
+
+def test_forecast_endpoint_rejects_unknown_city(running_server):
+    from urllib.error import HTTPError
+
+    with pytest.raises(HTTPError) as exc:
+        urlopen(f"{running_server}/forecast?city=Lima")
+    assert exc.value.code == 400
+
+
+def test_forecast_endpoint_resolves_coordinates(running_server):
+    # Valparaiso → Santiago es la ubicacion entrenada mas cercana (~100 km)
+    with urlopen(f"{running_server}/forecast?lat=-33.04&lon=-71.62&days=1") as resp:
+        body = json.loads(resp.read())
+    assert body["city"] == "Santiago"
+    assert 80 < body["distance_km"] < 120
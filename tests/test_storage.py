@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+from src.etl.storage import USE_PARQUET, dataset_path, load_dataset, save_dataset
+
+
+@pytest.fixture
+def two_year_df(sample_weather_df):
+    df = sample_weather_df.copy()
+    df["date"] = pd.date_range("2024-12-01", periods=len(df), freq="D")
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    df.loc[3, "weather_code"] = None
+    return df
+
+
+def test_save_and_load_roundtrip(tmp_data_dir, two_year_df):
+    save_dataset(two_year_df, "Santiago", "raw")
+    df = load_dataset("Santiago", "raw")
+
+    assert len(df) == len(two_year_df)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df["date"].is_monotonic_increasing
+    assert "year" not in df.columns
+    # mediciones en float32 (esquema compacto)
+    assert df["temp_max"].dtype == "float32"
+    pd.testing.assert_series_equal(
+        df["temp_max"], two_year_df["temp_max"], check_names=False, check_dtype=False
+    )
+
+
+@pytest.mark.skipif(not USE_PARQUET, reason="pyarrow no instalado")
+def test_partitioned_by_year(tmp_data_dir, two_year_df):
+    save_dataset(two_year_df, "Santiago", "raw")
+    path = dataset_path("Santiago", "raw")
+    partitions = sorted(p.name for p in path.iterdir() if p.is_dir())
+    assert partitions == ["year=2024", "year=2025"]
+    assert (path / "_version").exists()
+
+
+def test_load_projection_and_date_range(tmp_data_dir, two_year_df):
+    save_dataset(two_year_df, "Santiago", "processed")
+    df = load_dataset(
+        "Santiago",
+        "processed",
+        columns=["date", "temp_max"],
+        start="2024-12-30",
+        end="2025-01-05",
+    )
+
+    assert list(df.columns) == ["date", "temp_max"]
+    assert len(df) == 7
+    assert df["date"].min() == pd.Timestamp("2024-12-30")
+    assert df["date"].max() == pd.Timestamp("2025-01-05")
+
+
+def test_replace_drops_stale_years(tmp_data_dir, two_year_df):
+    save_dataset(two_year_df, "Santiago", "raw")
+    only_2025 = two_year_df[two_year_df["date"] >= "2025-01-01"]
+    save_dataset(only_2025, "Santiago", "raw")
+
+    df = load_dataset("Santiago", "raw")
+    assert len(df) == len(only_2025)
+
+
+def test_load_missing_dataset(tmp_data_dir):
+    with pytest.raises(FileNotFoundError):
+        load_dataset("Santiago", "raw")
+
+
+def test_csv_fallback_replaces_only_given_years(tmp_data_dir, two_year_df, monkeypatch):
+    import src.etl.storage
+
+    monkeypatch.setattr(src.etl.storage, "USE_PARQUET", False)
+    save_dataset(two_year_df, "Santiago", "raw")
+
+    update = two_year_df[two_year_df["date"] >= "2025-01-01"].copy()
+    update["temp_max"] = 99.0
+    save_dataset(update, "Santiago", "raw", replace=False)
+
+    df = load_dataset("Santiago", "raw")
+    assert len(df) == len(two_year_df)
+    assert (df.loc[df["date"] >= "2025-01-01", "temp_max"] == 99.0).all()
+    assert (df.loc[df["date"] < "2025-01-01", "temp_max"] != 99.0).all()
+
+
+@pytest.mark.skipif(not USE_PARQUET, reason="pyarrow no instalado")
+def test_version_marker_changes_on_partial_rewrite(tmp_data_dir, two_year_df):
+    from src.etl.storage import dataset_version_path
+
+    save_dataset(two_year_df, "Santiago", "processed")
+    marker = dataset_version_path("Santiago", "processed")
+    before = marker.stat().st_mtime_ns, marker.read_text()
+
+    # reescribir solo un año (streaming) no cambia la carpeta, si la marca
+    last_year = two_year_df[two_year_df["date"].str.startswith("2025")]
+    save_dataset(last_year, "Santiago", "processed", replace=False)
+
+    assert (marker.stat().st_mtime_ns, marker.read_text()) != before
+    assert len(load_dataset("Santiago", "processed")) == len(two_year_df)
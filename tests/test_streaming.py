@@ -0,0 +1,47 @@
+from datetime import date
+
+import pandas as pd
+
+from src.etl.storage import load_dataset
+from src.etl.streaming import stream_city_history, year_chunks
+from src.etl.transform import clean_and_transform
+
+
+def test_year_chunks_align_with_calendar_years():
+    assert year_chunks(date(2022, 11, 5), date(2024, 2, 1)) == [
+        (date(2022, 11, 5), date(2022, 12, 31)),
+        (date(2023, 1, 1), date(2023, 12, 31)),
+        (date(2024, 1, 1), date(2024, 2, 1)),
+    ]
+
+
+def test_stream_matches_in_memory_transform(sample_weather_df, tmp_data_dir):
+    raw = sample_weather_df.copy()
+    raw["date"] = pd.date_range("2023-12-10", periods=len(raw), freq="D")
+    raw.loc[5:15, "cloud_cover_mean"] = None
+    raw.loc[40:, "windspeed_10m_max"] = None
+
+    def fake_fetch(lat, lon, start_date, end_date):
+        dates = raw["date"].dt.date
+        return raw[(dates >= start_date) & (dates <= end_date)].reset_index(drop=True)
+
+    chunks = []
+    summary = stream_city_history(
+        "Santiago",
+        -33.45,
+        -70.66,
+        date(2023, 12, 10),
+        date(2024, 2, 7),
+        fetch=fake_fetch,
+        on_chunk=chunks.append,
+    )
+
+    expected = clean_and_transform(raw).reset_index(drop=True)
+    streamed = load_dataset("Santiago", "processed")
+
+    assert summary["chunks"] == 2 and len(chunks) == 2
+    assert summary["watermark"] == date(2024, 2, 7)
+    for col in ["temp_avg", "cloud_cover_mean", "windspeed_10m_max", "precipitation"]:
+        pd.testing.assert_series_equal(
+            streamed[col], expected[col], check_names=False, check_dtype=False
+        )
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from src.etl.transform import clean_and_transform
+from src.utils.synthetic import synthetic_dataset
+
+
+def test_synthetic_dataset_is_reproducible():
+    first = synthetic_dataset(n_locations=2, years=1, seed=7)
+    second = synthetic_dataset(n_locations=2, years=1, seed=7)
+
+    assert list(first) == list(second)
+    for name in first:
+        pd.testing.assert_frame_equal(first[name], second[name])
+    assert not first[list(first)[0]].equals(first[list(first)[1]])
+
+
+def test_synthetic_weather_is_plausible():
+    frames = synthetic_dataset(n_locations=3, years=2, seed=1)
+    north, south = frames["Sintetica 000"], frames["Sintetica 002"]
+
+    assert len(north) == 730
+    assert (north["temp_max"] >= north["temp_min"]).all()
+    assert north["temp_max"].mean() > south["temp_max"].mean()
+    assert (south["precipitation"] > 0).mean() > (north["precipitation"] > 0).mean()
+
+    # enero (verano) mas calido que julio
+    by_month = north.groupby(north["date"].dt.month)["temp_max"].mean()
+    assert by_month[1] > by_month[7]
+
+    clean = clean_and_transform(north)
+    assert clean[["temp_avg", "humidity_avg"]].notna().all().all()
@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
 import pytest
 
-from src.modeling.features.temporal_features import add_temporal_features
+from src.modeling.features.temporal_features import (
+    add_temporal_features,
+    add_temporal_features_long,
+)
 
 
 def test_add_temporal_features_lags(sample_weather_df):
@@ -41,3 +45,29 @@ def test_add_temporal_features_nans_at_start(sample_weather_df):
     df, _ = add_temporal_features(sample_weather_df)
     assert df["temp_avg_lag_7"].isna().sum() == 7
     assert df["temp_avg_lag_1"].isna().sum() == 1
+
+
+def test_add_temporal_features_long_matches_per_location(sample_weather_df):
+    north = sample_weather_df.assign(location="Arica")
+    south = sample_weather_df.assign(
+        location="Punta Arenas", temp_avg=sample_weather_df["temp_avg"] - 10
+    )
+    south.loc[20, "precipitation"] = np.nan
+    # filas desordenadas y ubicaciones intercaladas
+    long = pd.concat([south, north]).sample(frac=1, random_state=0)
+
+    result, features = add_temporal_features_long(long)
+
+    assert result["location"].tolist() == ["Arica"] * 60 + ["Punta Arenas"] * 60
+    for name, frame in [("Arica", north), ("Punta Arenas", south)]:
+        expected, expected_features = add_temporal_features(frame)
+        assert features == expected_features
+        got = result[result["location"] == name].reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            got[features], expected[features].reset_index(drop=True), check_exact=False
+        )
+
+
+def test_add_temporal_features_long_requires_key(sample_weather_df):
+    with pytest.raises(ValueError, match="columna 'location' no encontrada"):
+        add_temporal_features_long(sample_weather_df)
@@ -0,0 +1,35 @@
+from src.modeling.train import default_model_params, prepare_training_data
+from src.modeling.tuning import (
+    halving_rungs,
+    load_best_params,
+    sample_candidates,
+    tune_hyperparameters,
+)
+
+
+def test_halving_rungs_end_at_max():
+    assert halving_rungs(50, 600, 3) == [50, 150, 450, 600]
+    assert halving_rungs(100, 100, 3) == [100]
+
+
+def test_sample_candidates_includes_base_first():
+    base = {"max_depth": 6, "random_state": 42}
+    candidates = sample_candidates({"max_depth": [2, 4, 6]}, base, n_candidates=10)
+
+    assert candidates[0] == base
+    assert len(candidates) == 3
+    assert all(c["random_state"] == 42 for c in candidates)
+
+
+def test_tune_reuses_cached_trials(sample_clean_df, tmp_data_dir):
+    X, y, _ = prepare_training_data(sample_clean_df)
+    kwargs = dict(n_candidates=4, n_jobs=2, min_resource=5, max_resource=15)
+
+    first = tune_hyperparameters("Santiago", X, y, **kwargs)
+    assert first["trials_evaluated"] > 0
+    assert set(default_model_params()) <= set(first["params"])
+
+    second = tune_hyperparameters("Santiago", X, y, **kwargs)
+    assert second["trials_evaluated"] == 0
+    assert second["params"] == first["params"]
+    assert load_best_params("Santiago") == first["params"]